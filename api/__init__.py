@@ -6,21 +6,34 @@ It also:
 2. Registers the error handlers.
 3. Registers the blueprints.
 4. Registers the request loggers.
+5. Registers the SQL instrumentation.
 """
 import os
 import sys
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, send_from_directory
+from flask_jwt_extended import jwt_required
 
 from .article.controller.helpers import handle_get_image
 from .config import Config
-from .config.logger import app_logger
+from .config.logger import app_logger, log_queue
 from .extensions import db
 from .helpers import check_configuration, register_blueprints, register_extensions
-from .helpers.blueprint_helpers import handle_delete_image
+from .helpers.autocomplete import handle_autocomplete
+from .helpers.blueprint_helpers import handle_delete_image, handle_receive_image
+from .helpers.cache import cache
 from .helpers.error_handlers import register_error_handlers
-from .helpers.hooks import get_exception, get_response, log_get_request, log_post_request
+from .helpers.hooks import (
+    get_exception,
+    get_response,
+    log_get_request,
+    log_post_request,
+    sample_request,
+)
 from .helpers.http_status_codes import HTTP_200_OK
+from .helpers.instrumentation import register_sql_instrumentation
+from .helpers.variant_queue import variant_queue
+from .helpers.view_recorder import view_recorder
 
 
 def create_app(config_name=os.environ.get("FLASK_ENV", "development")):
@@ -66,6 +79,8 @@ def create_app(config_name=os.environ.get("FLASK_ENV", "development")):
     @app.before_request
     def log_request():
         """Log the data held in the request."""
+        if not sample_request():
+            return
         if request.method in {"POST", "PUT"}:
             log_post_request()
         elif request.method in {"GET", "DELETE"}:
@@ -90,30 +105,72 @@ def create_app(config_name=os.environ.get("FLASK_ENV", "development")):
     app_logger.info("Registered the extensions!")
     register_blueprints(app)
     app_logger.info("Registered the blueprints!")
+    register_sql_instrumentation(app)
+    app_logger.info("Registered the SQL instrumentation!")
 
     @app.route("/")
     def health_check():
         """Check if the application is running."""
         return jsonify({"success": "hello from flask"}), HTTP_200_OK
 
-    @app.route("/image")
-    def get_image():
-        """Fetch an image uploaded and stored in the server.
-
-        This route is accessed by the Lambda function in
-        order to upload the image stored locally to s3.
-        """
-        return handle_get_image(request.args.get("filename"))
-
-    @app.route("/delete")
-    def delete_image():
-        """Delete an image after being uploaded to s3.
-
-        This route is accessed by a lambda function to
-        trigger the deletion of animage after it's uploaded
-        to s3.
-        """
-        return handle_delete_image(request.args.get("filename"))
+    @app.route("/metrics/views")
+    def view_recorder_stats():
+        """Report the depth of the view buffer and the last flush latency."""
+        return jsonify(view_recorder.stats()), HTTP_200_OK
+
+    @app.route("/metrics/variants")
+    def variant_queue_stats():
+        """Report the depth of the image queue and the copies made."""
+        return jsonify(variant_queue.stats()), HTTP_200_OK
+
+    @app.route("/metrics/cache")
+    def cache_stats():
+        """Report the hits, misses and evictions of the article cache."""
+        return jsonify(cache.stats()), HTTP_200_OK
+
+    @app.route("/metrics/logging")
+    def logging_stats():
+        """Report the depth of the log queue and the dropped records."""
+        return jsonify(log_queue.stats()), HTTP_200_OK
+
+    @app.route("/autocomplete")
+    @jwt_required()
+    def autocomplete():
+        """Suggest article titles, tags or author names for a prefix."""
+        return handle_autocomplete(request.args.get("prefix"), request.args.get("kind"))
+
+    if app.config["STORAGE_BACKEND"] == "queue":
+
+        @app.route("/image")
+        def get_image():
+            """Fetch an image uploaded and stored in the server.
+
+            This route is accessed by the Lambda function in
+            order to upload the image stored locally to s3.
+            """
+            return handle_get_image(request.args.get("filename"))
+
+        @app.route("/delete")
+        def delete_image():
+            """Delete an image after being uploaded to s3.
+
+            This route is accessed by a lambda function to
+            trigger the deletion of animage after it's uploaded
+            to s3.
+            """
+            return handle_delete_image(request.args.get("filename"))
+
+    if app.config["STORAGE_BACKEND"] == "local":
+
+        @app.route(app.config["STORAGE_LOCAL_URL"] + "<path:key>")
+        def get_stored_image(key):
+            """Serve an image stored in the local folder."""
+            return send_from_directory(app.config["STORAGE_LOCAL_FOLDER"], key)
+
+        @app.route(app.config["STORAGE_LOCAL_URL"] + "<path:key>", methods=["POST"])
+        def receive_stored_image(key):
+            """Take an image posted with a signed upload form."""
+            return handle_receive_image(key, request.form, request.files.get("file"))
 
     app.shell_context_processor({"app": app, "db": db})
 
@@ -1,25 +1,36 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=unexpected-keyword-arg
-import os
+from datetime import datetime
 from typing import Tuple
 
-from flask import jsonify
+from flask import current_app, jsonify
 from sqlalchemy.exc import NoForeignKeysError
 from werkzeug.datastructures import FileStorage
 
 from ...author.models.author import Author
 from ...extensions import db
-from ...helpers.blueprint_helpers import (
-    handle_upload_image,
-    send_notification,
-    validate_article_data,
-)
+from ...helpers.blueprint_helpers import adopt_image, handle_upload_image, validate_article_data
+from ...helpers.conditional import conditional, make_etag
 from ...helpers.http_status_codes import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST
-from ..models.article import Article, article_schema, articles_schema
+from ...helpers.pagination import (
+    count_rows,
+    paginate,
+    paginate_ranked,
+    seek_query,
+    validate_limit,
+    validate_total,
+)
+from ...helpers.storage import storage
+from ...helpers.streaming import json_rows, stream_response, validate_stream
+from ...helpers.variant_queue import variant_queue
+from ...helpers.view_recorder import view_recorder
+from ..models.article import ENGAGEMENTS, Article, article_schema, articles_schema
 from ..models.bookmark import Bookmark, bookmark_schema
 from ..models.comment import Comment, comment_schema
 from ..models.like import Like, like_schema
+from ..models.rollup import EngagementRollup
 from ..models.views import View
+from .helpers import validate_article_ids, validate_article_tags, validate_tags
 
 
 def create_article(
@@ -37,6 +48,8 @@ def create_article(
             'Title': 'Title',
             'Text': 'Text'
         }
+        The 'Image key' of an image uploaded through an upload url
+        can be given instead of the image.
     article_image: FileStorage
         The article image
 
@@ -67,15 +80,22 @@ def create_article(
         title=article_data["Title"],
         text=article_data["Text"],
         author=Author.get_user(int(id)),
+        search_vector=Article.search_document(
+            article_data["Title"], article_data["Text"]
+        ),
     )
 
-    if article_image:
+    if "Image key" in article_data.keys():
+        article.image = adopt_image(article_data["Image key"])
+    elif article_image:
         if article_image["Image"]:
             profile_pic = handle_upload_image(article_image["Image"])
             article.image = profile_pic
 
     db.session.add(article)
     db.session.commit()
+    if article.image:
+        variant_queue.enqueue(article.id)
 
     return article_schema.dumps(article), HTTP_201_CREATED
 
@@ -133,9 +153,9 @@ def get_article(article_id: str, id: str) -> Tuple[str, int]:
 
     Returns
     -------
-    Tuple[str, int]:
-        The jsong string representing the request
-        response as well as the response code.
+    Tuple[dict, int, dict]:
+        The article, or no body when the client's copy is
+        current, the response code and the validator headers.
     """
     if not id:
         raise ValueError("The id has to be provided.")
@@ -147,15 +167,28 @@ def get_article(article_id: str, id: str) -> Tuple[str, int]:
         raise ValueError("The article_id has to be provided.")
     if not isinstance(article_id, str):
         raise TypeError("The article_id has to be a string.")
-    if not Article.article_with_id_exists(int(article_id)):
+    article = Article.get_cached(int(article_id))
+    if not article:
         raise ValueError(f"The article with id {article_id} does not exist.")
-    article = Article.get_article(int(article_id))
-    author = Author.get_user(int(id))
-    view = View(author=author, article=article)
-    db.session.add(view)
-    db.session.commit()
+    view_recorder.record(int(article_id), int(id))
+    last_modified = datetime.fromisoformat(
+        article.get("date_edited") or article["date_published"]
+    )
 
-    return article_schema.dump(article), HTTP_200_OK
+    # The counters, and the version bumped when the image copies are
+    # recorded, change without the article being edited, so they are
+    # part of its ETag. The likes, bookmarks and comments drop the
+    # cached article, the views counted in batches may lag behind
+    # until it expires. The articles cached before the version was
+    # served have none.
+    version = article.get("version", 0)
+    counters = [article[f"{name}_count"] for name in ENGAGEMENTS]
+    return conditional(
+        article,
+        make_etag(article["id"], last_modified, version, *counters),
+        last_modified,
+        weak=True,
+    )
 
 
 def handle_get_article(article_id: str, author_id: str) -> Tuple[str, int]:
@@ -199,6 +232,8 @@ def update_article(
             'Title': 'Title',
             'Text': 'Text'
         }
+        The 'Image key' of an image uploaded through an upload url
+        can be given instead of the image.
     article_image: FileStorage
         The article image
 
@@ -237,6 +272,7 @@ def update_article(
     valid_keys = [
         "Title",
         "Text",
+        "Image key",
     ]
     for key in article_data.keys():
         if key not in valid_keys:
@@ -249,16 +285,28 @@ def update_article(
         article.title = article_data["Title"]
     if "Text" in article_data.keys():
         Article.validate_text(article_data["Text"])
-
-    if article_image:
+        article.text = article_data["Text"]
+    article.search_vector = Article.search_document(article.title, article.text)
+
+    image_changed = False
+    if "Image key" in article_data.keys():
+        image = adopt_image(article_data["Image key"])
+        article.delete_image()
+        article.image = image
+        image_changed = True
+    elif article_image:
         if article_image["Image"]:
-            if article.image:
-                send_notification(os.path.basename(article.image), "delete")
             profile_pic = handle_upload_image(article_image["Image"])
+            article.delete_image()
             article.image = profile_pic
+            image_changed = True
 
+    article.date_edited = datetime.utcnow()
     db.session.add(article)
     db.session.commit()
+    Article.invalidate(article.id)
+    if image_changed:
+        variant_queue.enqueue(article.id)
 
     return article_schema.dumps(article), HTTP_200_OK
 
@@ -332,6 +380,8 @@ def handle_update_article(
             'Title': 'Title',
             'Text': 'Text'
         }
+        The 'Image key' of an image uploaded through an upload url
+        can be given instead of the image.
     article_image: FileStorage
         The article image
 
@@ -349,60 +399,282 @@ def handle_update_article(
         return article
 
 
-def list_articles(author_id: str) -> Tuple[str, int]:
-    """List all the articles.
+def list_articles(
+    author_id: str, tag: str, limit: str, cursor: str, stream: str = None
+) -> Tuple[dict, int]:
+    """List a page of articles, newest first.
+
+    When streamed, all the articles after the cursor are sent as
+    they are read from the database, instead of a page.
 
     Parameters
     ----------
     author_id: str, optional
         The author id
+    tag: str, optional
+        Only list articles with this tag
+    limit: str, optional
+        The number of articles on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    stream: str, optional
+        Either 'true' or 'false', whether to stream all the articles
+
+    Raises
+    ------
+    ValueError:
+        When the author does not exist or the limit, cursor
+        or stream are not valid
+    TypeError:
+        When the author id, tag or cursor is not a string
 
     Returns
     -------
-    Tuple[str, int]:
-        The jsong string representing the request
-        response as well as the response code.
+    Tuple[dict, int, dict]:
+        The page of articles along with the cursor for the
+        next page, or no body when the client's copy is current,
+        the response code and the validator headers.
     """
     if author_id:
         if not isinstance(author_id, str):
             raise ValueError("The author_id has to be a string.")
         if not Author.user_with_id_exists(int(author_id)):
             raise ValueError(f"The user with id {author_id} does not exist.")
-        return articles_schema.dump(Article.all_articles(int(author_id))), HTTP_200_OK
-    return articles_schema.dump(Article.all_articles()), HTTP_200_OK
+        author_id = int(author_id)
+    if tag and not isinstance(tag, str):
+        raise TypeError("The tag has to be a string!")
+    if validate_stream(stream):
+        query = seek_query(
+            Article.all_articles(author_id, tag),
+            Article.date_published,
+            Article.id,
+            cursor,
+        )
+        chunks = json_rows(
+            query, article_schema, '{"articles":[', '],"next_cursor":null}'
+        )
+        return stream_response(chunks), HTTP_200_OK
+    articles, next_cursor = paginate(
+        Article.all_articles(author_id, tag),
+        Article.date_published,
+        Article.id,
+        validate_limit(limit),
+        cursor,
+    )
+    # The counters are served with the articles, so they are part of
+    # their versions, as for a single article.
+    versions = [
+        (
+            article.id,
+            article.date_edited or article.date_published,
+            article.version,
+            *(getattr(article, f"{name}_count") for name in ENGAGEMENTS),
+        )
+        for article in articles
+    ]
+    return conditional(
+        lambda: {
+            "articles": articles_schema.dump(articles),
+            "next_cursor": next_cursor,
+        },
+        make_etag(next_cursor, versions),
+        weak=True,
+    )
 
 
-def handle_list_articles(author_id: str) -> Tuple[str, int]:
+def handle_list_articles(
+    author_id: str, tag: str, limit: str, cursor: str, stream: str = None
+) -> Tuple[dict, int]:
     """Handle the GET request to list articles.
 
     Parameters
     ----------
     author_id: str, optional
         The author id
+    tag: str, optional
+        Only list articles with this tag
+    limit: str, optional
+        The number of articles on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    stream: str, optional
+        Either 'true' or 'false', whether to stream all the articles
 
     Returns
     -------
-    Tuple[str, int]:
+    Tuple[dict, int]:
         The jsong string representing the request
         response as well as the response code.
     """
     try:
-        articles = list_articles(author_id)
+        articles = list_articles(author_id, tag, limit, cursor, stream)
     except (ValueError, TypeError) as e:
         return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
     else:
         return articles
 
 
-def comments(article_id: str, author_id: str) -> Tuple[str, int]:
-    """Coment on an article.
+def articles_by_tag(tags: str, match: str, limit: str, cursor: str) -> Tuple[dict, int]:
+    """List a page of the articles with the given tags, newest first.
+
+    Parameters
+    ----------
+    tags: str
+        Comma separated tags e.g 'python,flask'
+    match: str, optional
+        'all' to list the articles with every tag or 'any' to
+        list those with at least one, defaults to 'all'
+    limit: str, optional
+        The number of articles on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+
+    Raises
+    ------
+    ValueError:
+        When the tags, match, limit or cursor are not valid
+    TypeError:
+        When the tags or cursor are not strings
+
+    Returns
+    -------
+    Tuple[dict, int]:
+        The page of articles along with the cursor for the
+        next page, as well as the response code.
+    """
+    tags = validate_tags(tags)
+    match = match.lower() if isinstance(match, str) else "all"
+    if match not in {"all", "any"}:
+        raise ValueError("The match has to be either all or any.")
+    articles, next_cursor = paginate(
+        Article.tagged(tags, match_all=match == "all"),
+        Article.date_published,
+        Article.id,
+        validate_limit(limit),
+        cursor,
+    )
+    return {
+        "articles": articles_schema.dump(articles),
+        "next_cursor": next_cursor,
+    }, HTTP_200_OK
+
+
+def handle_articles_by_tag(
+    tags: str, match: str, limit: str, cursor: str
+) -> Tuple[dict, int]:
+    """Handle the GET request to list articles by tag.
+
+    Parameters
+    ----------
+    tags: str
+        Comma separated tags e.g 'python,flask'
+    match: str, optional
+        Either 'all' or 'any', defaults to 'all'
+    limit: str, optional
+        The number of articles on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+
+    Returns
+    -------
+    Tuple[dict, int]:
+        The jsong string representing the request
+        response as well as the response code.
+    """
+    try:
+        articles = articles_by_tag(tags, match, limit, cursor)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
+    else:
+        return articles
+
+
+def search_articles(terms: str, limit: str, cursor: str) -> Tuple[dict, int]:
+    """Search the article titles and texts, best match first.
+
+    Parameters
+    ----------
+    terms: str
+        The search terms e.g 'flask "connection pool" -django'
+    limit: str, optional
+        The number of articles on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+
+    Raises
+    ------
+    ValueError:
+        When no terms are given or the limit or cursor are not valid
+    TypeError:
+        When the terms or cursor are not strings
+
+    Returns
+    -------
+    Tuple[dict, int]:
+        The page of articles, each with its rank and a highlighted
+        snippet, along with the cursor for the next page, as well
+        as the response code.
+    """
+    if not terms:
+        raise ValueError("The search terms have to be provided")
+    if not isinstance(terms, str):
+        raise TypeError("The search terms have to be a string")
+    query, rank = Article.search(terms)
+    rows, next_cursor = paginate_ranked(
+        query, rank, Article.id, validate_limit(limit), cursor
+    )
+    articles = []
+    for article, article_rank, snippet in rows:
+        result = article_schema.dump(article)
+        result["rank"] = article_rank
+        result["snippet"] = snippet
+        articles.append(result)
+    return {"articles": articles, "next_cursor": next_cursor}, HTTP_200_OK
+
+
+def handle_search_articles(terms: str, limit: str, cursor: str) -> Tuple[dict, int]:
+    """Handle the GET request to search the articles.
+
+    Parameters
+    ----------
+    terms: str
+        The search terms
+    limit: str, optional
+        The number of articles on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+
+    Returns
+    -------
+    Tuple[dict, int]:
+        The json string representing the request
+        response as well as the response code.
+    """
+    try:
+        articles = search_articles(terms, limit, cursor)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
+    else:
+        return articles
+
+
+def comments(
+    article_id: str, author_id: str, limit: str, cursor: str, total: str
+) -> Tuple[dict, int]:
+    """Get a page of an article's comments.
 
     Parameters
     ----------
     article_id: str
         The article id
-    author_id: str
-        The author id
+    author_id: str, optional
+        Only list the comments by this author
+    limit: str, optional
+        The number of comments on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    total: str, optional
+        Whether to include the total number of comments
 
     Raises
     ------
@@ -413,9 +685,9 @@ def comments(article_id: str, author_id: str) -> Tuple[str, int]:
 
     Returns
     -------
-    Tuple[str, int]:
-        The jsong string representing the request
-        response as well as the response code.
+    Tuple[dict, int]:
+        The page of comments along with the cursor for the
+        next page, as well as the response code.
     """
     if not article_id:
         raise ValueError("The article id has to be provided")
@@ -428,53 +700,149 @@ def comments(article_id: str, author_id: str) -> Tuple[str, int]:
             raise TypeError("The author id has to be a string")
         if not Author.user_with_id_exists(int(author_id)):
             raise ValueError(f"Their is no author with id {author_id}")
-        comments = Article.query.filter_by(id=article_id).first().comments
-        art_comments = []
-        for comment in comments:
-            if comment.author.id == int(author_id):
-                art_comments.append(comment)
-        return art_comments
-    return Article.query.filter_by(id=article_id).first().comments, HTTP_200_OK
+        author_id = int(author_id)
+    page_size, with_total = validate_limit(limit), validate_total(total)
+    query = Comment.for_article(int(article_id), author_id)
+    page, next_cursor = paginate(query, Comment.date, Comment.id, page_size, cursor)
+    data = {"comments": page, "next_cursor": next_cursor}
+    if with_total:
+        data["total"] = count_rows(query)
+    return data, HTTP_200_OK
 
 
-def handle_comments(article_id: str, author_id: str) -> Tuple[str, int]:
-    """Handle the get request for articles published."""
+def handle_comments(
+    article_id: str, author_id: str, limit: str, cursor: str, total: str
+) -> Tuple[dict, int]:
+    """Handle the GET request to get an article's comments.
+
+    Parameters
+    ----------
+    article_id: str
+        The article id
+    author_id: str, optional
+        Only list the comments by this author
+    limit: str, optional
+        The number of comments on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    total: str, optional
+        Whether to include the total number of comments
+
+    Returns
+    -------
+    Tuple[dict, int]:
+        The json string representing the request
+        response as well as the response code.
+    """
     try:
-        article_comments = comments(article_id, author_id)
+        article_comments = comments(article_id, author_id, limit, cursor, total)
     except (ValueError, TypeError) as e:
-        return jsonify({"error": str(e)}), 400
+        return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
     else:
         return article_comments
 
 
-def likes(article_id: str) -> Tuple[str, int]:
-    """Get all the likes for a given article."""
+def likes(
+    article_id: str, author_id: str, limit: str, cursor: str, total: str
+) -> Tuple[dict, int]:
+    """Get a page of an article's likes.
+
+    Parameters
+    ----------
+    article_id: str
+        The article id
+    author_id: str, optional
+        Only list the likes by this author
+    limit: str, optional
+        The number of likes on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    total: str, optional
+        Whether to include the total number of likes
+
+    Raises
+    ------
+    ValueError:
+        When the article id is not provided
+    TypeError:
+        When the article id is not a string
+
+    Returns
+    -------
+    Tuple[dict, int]:
+        The page of likes along with the cursor for the
+        next page, as well as the response code.
+    """
     if not article_id:
         raise ValueError("The article id has to be provided")
     if not isinstance(article_id, str):
         raise TypeError("The article id has to be a string")
     if not Article.article_with_id_exists(int(article_id)):
         raise ValueError(f"Their is no article with id {article_id}")
-    return Article.query.filter_by(id=article_id).first().likes, 200
+    if author_id:
+        if not isinstance(author_id, str):
+            raise TypeError("The author id has to be a string")
+        if not Author.user_with_id_exists(int(author_id)):
+            raise ValueError(f"Their is no author with id {author_id}")
+        author_id = int(author_id)
+    page_size, with_total = validate_limit(limit), validate_total(total)
+    query = Like.for_article(int(article_id), author_id)
+    page, next_cursor = paginate(query, Like.date, Like.id, page_size, cursor)
+    data = {"likes": page, "next_cursor": next_cursor}
+    if with_total:
+        data["total"] = count_rows(query)
+    return data, HTTP_200_OK
 
 
-def handle_likes(article_id: str):
-    """Handle the get request for articles published."""
+def handle_likes(
+    article_id: str, author_id: str, limit: str, cursor: str, total: str
+) -> Tuple[dict, int]:
+    """Handle the GET request to get an article's likes.
+
+    Parameters
+    ----------
+    article_id: str
+        The article id
+    author_id: str, optional
+        Only list the likes by this author
+    limit: str, optional
+        The number of likes on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    total: str, optional
+        Whether to include the total number of likes
+
+    Returns
+    -------
+    Tuple[dict, int]:
+        The json string representing the request
+        response as well as the response code.
+    """
     try:
-        article_likes = likes(article_id)
+        article_likes = likes(article_id, author_id, limit, cursor, total)
     except (ValueError, TypeError) as e:
-        return jsonify({"error": str(e)}), 400
+        return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
     else:
         return article_likes
 
 
-def bookmarks(article_id: str) -> Tuple[str, int]:
-    """Get an article's bookmarks.
+def bookmarks(
+    article_id: str, author_id: str, limit: str, cursor: str, total: str
+) -> Tuple[dict, int]:
+    """Get a page of an article's bookmarks.
 
     Parameters
     ----------
     article_id: str
-        The article's id
+        The article id
+    author_id: str, optional
+        Only list the bookmarks by this author
+    limit: str, optional
+        The number of bookmarks on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    total: str, optional
+        Whether to include the total number of bookmarks
 
     Raises
     ------
@@ -485,9 +853,9 @@ def bookmarks(article_id: str) -> Tuple[str, int]:
 
     Returns
     -------
-    Tuple[str, int]:
-        The json string representing the request
-        response as well as the response code.
+    Tuple[dict, int]:
+        The page of bookmarks along with the cursor for the
+        next page, as well as the response code.
     """
     if not article_id:
         raise ValueError("The article id has to be provided")
@@ -495,32 +863,47 @@ def bookmarks(article_id: str) -> Tuple[str, int]:
         raise TypeError("The article id has to be a string")
     if not Article.article_with_id_exists(int(article_id)):
         raise ValueError(f"Their is no article with id {article_id}")
-    return Article.query.filter_by(id=article_id).first().bookmarks, 200
-
-
-def handle_bookmarks(article_id: str) -> Tuple[str, int]:
+    if author_id:
+        if not isinstance(author_id, str):
+            raise TypeError("The author id has to be a string")
+        if not Author.user_with_id_exists(int(author_id)):
+            raise ValueError(f"Their is no author with id {author_id}")
+        author_id = int(author_id)
+    page_size, with_total = validate_limit(limit), validate_total(total)
+    query = Bookmark.for_article(int(article_id), author_id)
+    page, next_cursor = paginate(query, Bookmark.date, Bookmark.id, page_size, cursor)
+    data = {"bookmarks": page, "next_cursor": next_cursor}
+    if with_total:
+        data["total"] = count_rows(query)
+    return data, HTTP_200_OK
+
+
+def handle_bookmarks(
+    article_id: str, author_id: str, limit: str, cursor: str, total: str
+) -> Tuple[dict, int]:
     """Handle the GET request to get an article's bookmarks.
 
     Parameters
     ----------
     article_id: str
-        The article's id
-
-    Raises
-    ------
-    ValueError:
-        When the article id is not provided
-    TypeError:
-        When the article id is not a string
+        The article id
+    author_id: str, optional
+        Only list the bookmarks by this author
+    limit: str, optional
+        The number of bookmarks on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    total: str, optional
+        Whether to include the total number of bookmarks
 
     Returns
     -------
-    Tuple[str, int]:
+    Tuple[dict, int]:
         The json string representing the request
         response as well as the response code.
     """
     try:
-        article_bookmarks = bookmarks(article_id)
+        article_bookmarks = bookmarks(article_id, author_id, limit, cursor, total)
     except (ValueError, TypeError) as e:
         return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
     else:
@@ -555,7 +938,7 @@ def tags(article_id: str) -> Tuple[str, int]:
     if not Article.article_with_id_exists(int(article_id)):
         raise ValueError(f"Their is no article with id {article_id}")
     return (
-        jsonify({"Article tags": Article.query.filter_by(id=article_id).first().tags}),
+        jsonify({"Article tags": Article.get_article(int(article_id)).tags}),
         HTTP_200_OK,
     )
 
@@ -582,7 +965,9 @@ def handle_tags(article_id: str) -> Tuple[str, int]:
         return article_tags
 
 
-def views(article_id: str, author_id: str) -> Tuple[str, int]:
+def views(
+    article_id: str, author_id: str, limit: str, cursor: str, total: str
+) -> Tuple[dict, int]:
     """Get the data about an article's readership.
 
     This function lets you know about the authors and
@@ -592,8 +977,14 @@ def views(article_id: str, author_id: str) -> Tuple[str, int]:
     ----------
     article_id: str
         The article id
-    author_id: str
-        The author id
+    author_id: str, optional
+        Only list the views by this author
+    limit: str, optional
+        The number of views on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    total: str, optional
+        Whether to include the total number of views
 
     Raises
     ------
@@ -604,9 +995,9 @@ def views(article_id: str, author_id: str) -> Tuple[str, int]:
 
     Returns
     -------
-    Tuple[str, int]:
-        The json string representing the request
-        response as well as the response code.
+    Tuple[dict, int]:
+        The page of views along with the cursor for the
+        next page, as well as the response code.
     """
     if not article_id:
         raise ValueError("The article id has to be provided")
@@ -619,48 +1010,50 @@ def views(article_id: str, author_id: str) -> Tuple[str, int]:
             raise TypeError("The author id has to be a string")
         if not Author.user_with_id_exists(int(author_id)):
             raise ValueError(f"Their is no author with id {author_id}")
-        views = Article.query.filter_by(id=article_id).first().views
-        art_views = []
-        for view in views:
-            if views.author.id == int(author_id):
-                art_views.append(view)
-        return art_views
-    return Article.query.filter_by(id=article_id).first().views, HTTP_200_OK
+        author_id = int(author_id)
+    page_size, with_total = validate_limit(limit), validate_total(total)
+    query = View.for_article(int(article_id), author_id)
+    page, next_cursor = paginate(query, View.date, View.id, page_size, cursor)
+    data = {"views": page, "next_cursor": next_cursor}
+    if with_total:
+        data["total"] = count_rows(query)
+    return data, HTTP_200_OK
 
 
-def handle_views(article_id: str, author_id: str) -> Tuple[str, int]:
-    """Handle the GET request to get an articles stats.
+def handle_views(
+    article_id: str, author_id: str, limit: str, cursor: str, total: str
+) -> Tuple[dict, int]:
+    """Handle the GET request to get an article's views.
 
     Parameters
     ----------
     article_id: str
         The article id
-    author_id: str
-        The author id
-
-    Raises
-    ------
-    ValueError:
-        When the article id is not provided
-    TypeError:
-        When the article id is not a string
+    author_id: str, optional
+        Only list the views by this author
+    limit: str, optional
+        The number of views on the page
+    cursor: str, optional
+        The cursor returned with the previous page
+    total: str, optional
+        Whether to include the total number of views
 
     Returns
     -------
-    Tuple[str, int]:
+    Tuple[dict, int]:
         The json string representing the request
         response as well as the response code.
     """
     try:
-        article_views = views(article_id, author_id)
+        article_views = views(article_id, author_id, limit, cursor, total)
     except (ValueError, TypeError) as e:
         return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
     else:
         return article_views
 
 
-def article_stats(article_id: str) -> Tuple[str, int]:
-    """Get the stats for a given article.
+def article_stats(article_id: str, article_ids: str) -> Tuple[dict, int]:
+    """Get the stats for a given article or a batch of articles.
 
     This includes:
     1. Number of views/reads
@@ -672,6 +1065,9 @@ def article_stats(article_id: str) -> Tuple[str, int]:
     ----------
     article_id: str
         The article's id
+    article_ids: str, optional
+        A comma separated list of article ids, used instead of
+        the article id to get the stats for several articles.
 
     Raises
     ------
@@ -682,47 +1078,114 @@ def article_stats(article_id: str) -> Tuple[str, int]:
 
     Returns
     -------
-    Tuple[str, int]:
-        The json string representing the request
-        response as well as the response code.
+    Tuple[dict, int, dict]:
+        The stats, or no body when the client's copy is current,
+        the response code and the validator headers.
     """
+    if article_ids:
+        stats = Article.stats(validate_article_ids(article_ids))
+        stats = {str(key): value for key, value in stats.items()}
+        return conditional(stats, make_etag(stats))
     if not article_id:
         raise ValueError("The article id has to be provided")
     if not isinstance(article_id, str):
         raise TypeError("The article id has to be a string")
-    if not Article.article_with_id_exists(int(article_id)):
+    stats = Article.get_cached_stats(int(article_id))
+    if not stats:
         raise ValueError(f"Their is no article with id {article_id}")
-    stats = {
-        "views": len(Article.query.filter_by(id=article_id).first().views),
-        "likes": len(Article.query.filter_by(id=article_id).first().likes),
-        "comments": len(Article.query.filter_by(id=article_id).first().comments),
-        "bookmarks": len(Article.query.filter_by(id=article_id).first().bookmarks),
-    }
-    return stats, HTTP_200_OK
+    return conditional(stats, make_etag(stats))
 
 
-def handle_article_stats(article_id: str) -> Tuple[str, int]:
+def handle_article_stats(article_id: str, article_ids: str) -> Tuple[dict, int]:
     """Handle the GET request to obtain an article's stats.
 
     Parameters
     ----------
     article_id: str
         The article's id
+    article_ids: str, optional
+        A comma separated list of article ids
 
     Returns
     -------
-    Tuple[str, int]:
+    Tuple[dict, int]:
         The json string representing the request
         response as well as the response code.
     """
     try:
-        stats = article_stats(article_id)
+        stats = article_stats(article_id, article_ids)
     except (ValueError, TypeError) as e:
         return jsonify({"error": str(e)}), 400
     else:
         return stats
 
 
+def timeseries(article_id: str, start: str, end: str) -> Tuple[list, int]:
+    """Get the daily views, likes, comments and bookmarks of an article.
+
+    The counts are read from the engagement rollups.
+
+    Parameters
+    ----------
+    article_id: str
+        The article's id
+    start: str, optional
+        The first day e.g 2022-11-01
+    end: str, optional
+        The last day e.g 2022-11-30
+
+    Raises
+    ------
+    ValueError:
+        When the article id is not provided or the dates are not valid
+    TypeError:
+        When the article id is not a string
+
+    Returns
+    -------
+    Tuple[list, int]:
+        The json string representing the request
+        response as well as the response code.
+    """
+    if not article_id:
+        raise ValueError("The article id has to be provided")
+    if not isinstance(article_id, str):
+        raise TypeError("The article id has to be a string")
+    if not Article.article_with_id_exists(int(article_id)):
+        raise ValueError(f"Their is no article with id {article_id}")
+    start, end = EngagementRollup.validate_date_range(start, end)
+    return (
+        EngagementRollup.timeseries(start, end, article_id=int(article_id)),
+        HTTP_200_OK,
+    )
+
+
+def handle_timeseries(article_id: str, start: str, end: str) -> Tuple[list, int]:
+    """Handle the GET request to obtain an article's daily stats.
+
+    Parameters
+    ----------
+    article_id: str
+        The article's id
+    start: str, optional
+        The first day e.g 2022-11-01
+    end: str, optional
+        The last day e.g 2022-11-30
+
+    Returns
+    -------
+    Tuple[list, int]:
+        The json string representing the request
+        response as well as the response code.
+    """
+    try:
+        series = timeseries(article_id, start, end)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
+    else:
+        return series
+
+
 def bookmark(article_id: str, author_id: str) -> Tuple[str, int]:
     """Create a bookmark for a given article.
 
@@ -756,15 +1219,14 @@ def bookmark(article_id: str, author_id: str) -> Tuple[str, int]:
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    if Bookmark.query.filter(
-        Bookmark.author_id == int(author_id), Bookmark.article_id == int(article_id)
-    ).first():
+    bookmark = Bookmark.add(int(article_id), int(author_id))
+    if not bookmark:
+        db.session.rollback()
         raise ValueError("You have already bookmarked this article!")
-    author = Author.get_user(int(author_id))
-    article = Article.get_article(int(article_id))
-    bookmark = Bookmark(article=article, author=author)
-    db.session.add(bookmark)
+    Article.update_counter(bookmark.article_id, "bookmarks_count")
+    Author.update_counter(bookmark.author_id, "bookmarks_count")
     db.session.commit()
+    Article.invalidate(bookmark.article_id)
     return bookmark_schema.dump(bookmark), 200
 
 
@@ -832,15 +1294,14 @@ def unbookmark(article_id: str, author_id: str) -> Tuple[str, int]:
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    if not Bookmark.query.filter(
-        Bookmark.author_id == int(author_id), Bookmark.article_id == int(article_id)
-    ).first():
+    bookmark = Bookmark.remove(int(article_id), int(author_id))
+    if not bookmark:
+        db.session.rollback()
         raise ValueError("You have not bookmarked this article!")
-    bookmark = Bookmark.query.filter(
-        Bookmark.author_id == int(author_id), Bookmark.article_id == int(article_id)
-    ).first()
-    db.session.delete(bookmark)
+    Article.update_counter(bookmark.article_id, "bookmarks_count", -1)
+    Author.update_counter(bookmark.author_id, "bookmarks_count", -1)
     db.session.commit()
+    Article.invalidate(bookmark.article_id)
     return bookmark_schema.dump(bookmark), 200
 
 
@@ -908,15 +1369,14 @@ def like(article_id: str, author_id: str) -> Tuple[str, int]:
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    if Like.query.filter(
-        Like.author_id == int(author_id), Like.article_id == int(article_id)
-    ).first():
+    like = Like.add(int(article_id), int(author_id))
+    if not like:
+        db.session.rollback()
         raise ValueError("You have already liked this article!")
-    author = Author.get_user(int(author_id))
-    article = Article.get_article(int(article_id))
-    like = Like(article=article, author=author)
-    db.session.add(like)
+    Article.update_counter(like.article_id, "likes_count")
+    Author.update_counter(like.author_id, "likes_count")
     db.session.commit()
+    Article.invalidate(like.article_id)
     return like_schema.dump(like), HTTP_201_CREATED
 
 
@@ -977,15 +1437,14 @@ def unlike(article_id: str, author_id: str) -> Tuple[str, int]:
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    if not Like.query.filter(
-        Like.author_id == int(author_id), Like.article_id == int(article_id)
-    ).first():
+    like = Like.remove(int(article_id), int(author_id))
+    if not like:
+        db.session.rollback()
         raise ValueError("You have not liked this article!")
-    like = Like.query.filter(
-        Like.author_id == int(author_id), Like.article_id == int(article_id)
-    ).first()
-    db.session.delete(like)
+    Article.update_counter(like.article_id, "likes_count", -1)
+    Author.update_counter(like.author_id, "likes_count", -1)
     db.session.commit()
+    Article.invalidate(like.article_id)
     return like_schema.dump(like), HTTP_200_OK
 
 
@@ -1052,21 +1511,29 @@ def tag_article(article_id: str, author_id: str, tag: str) -> Tuple[str, int]:
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    if not Article.get_article(int(article_id)).author_id != int(author_id):
+    article = Article.get_article(int(article_id))
+    if article.author_id != int(author_id):
         raise ValueError("You can only tag your articles!")
-    if tag in Article.get_article(int(article_id)).tags:
+    tag = tag.strip()
+    if tag in (article.tags or []):
         raise ValueError(f"The article is already tagged as {tag}")
-    article = Article.get_article(int(article_id))
-
-    tags = article.tags.copy()
-    tags.append(tag)
-    article.tags = tags.copy()
-    db.session.add(article)
-    db.session.commit()
-    return (
-        jsonify({"article tags": Article.get_article(int(article_id)).tags}),
-        HTTP_201_CREATED,
+    validate_article_tags([*(article.tags or []), tag])
+    # The checks are made again in the UPDATE, another request may
+    # have tagged the article since it was read.
+    tags = Article.add_tag(
+        int(article_id),
+        int(author_id),
+        tag,
+        current_app.config["MAX_TAGS_PER_ARTICLE"],
     )
+    if tags is None:
+        db.session.rollback()
+        raise ValueError(
+            f"The article is already tagged as {tag} or has too many tags"
+        )
+    db.session.commit()
+    Article.invalidate(int(article_id))
+    return jsonify({"article tags": tags}), HTTP_201_CREATED
 
 
 def handle_tag(article_id: str, author_id: str, tag: str) -> Tuple[str, int]:
@@ -1134,21 +1601,15 @@ def untag_article(article_id: str, author_id: str, tag: str) -> Tuple[str, int]:
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    if not Article.get_article(int(article_id)).author_id != int(author_id):
+    if Article.get_article(int(article_id)).author_id != int(author_id):
         raise ValueError("You can only untag your articles!")
-    if tag not in Article.get_article(int(article_id)).tags:
+    tags = Article.remove_tag(int(article_id), int(author_id), tag)
+    if tags is None:
+        db.session.rollback()
         raise ValueError(f"The article is not tagged as {tag}")
-    article = Article.get_article(int(article_id))
-
-    tags = article.tags.copy()
-    tags.remove(tag)
-    article.tags = tags.copy()
-    db.session.add(article)
     db.session.commit()
-    return (
-        jsonify({"article tags": Article.get_article(int(article_id)).tags}),
-        HTTP_200_OK,
-    )
+    Article.invalidate(int(article_id))
+    return jsonify({"article tags": tags}), HTTP_200_OK
 
 
 def handle_untag(article_id: str, author_id: str, tag: str) -> Tuple[str, int]:
@@ -1177,6 +1638,84 @@ def handle_untag(article_id: str, author_id: str, tag: str) -> Tuple[str, int]:
         return article_tag
 
 
+def replace_tags(article_id: str, author_id: str, tags_data: dict) -> Tuple[str, int]:
+    """Replace all the tags of an article.
+
+    Parameters
+    ----------
+    article_id: str
+        The article id
+    author_id: str
+        The author id
+    tags_data: dict
+        The new tags e.g {'tags': ['python', 'flask']}
+
+    Raises
+    ------
+    ValueError:
+        When the article or author does not exist, the author does
+        not own the article or the tags are not valid
+    TypeError:
+        When the ids are not strings or the tags are not a list
+
+    Returns
+    -------
+    Tuple[str, int]:
+        The json string representing the request
+        response as well as the response code.
+    """
+    if not article_id:
+        raise ValueError("The article id has to be provided")
+    if not isinstance(article_id, str):
+        raise TypeError("The article id has to be a string")
+    if not Article.article_with_id_exists(int(article_id)):
+        raise ValueError(f"Their is no article with id {article_id}")
+    if not isinstance(author_id, str):
+        raise TypeError("The author id has to be a string")
+    if not Author.user_with_id_exists(int(author_id)):
+        raise ValueError(f"Their is no author with id {author_id}")
+    if not isinstance(tags_data, dict):
+        raise TypeError("The request body has to be a json object")
+    new_tags = validate_article_tags(tags_data.get("tags"))
+    if Article.get_article(int(article_id)).author_id != int(author_id):
+        raise ValueError("You can only tag your articles!")
+    tags = Article.update_tags(int(article_id), int(author_id), new_tags)
+    if tags is None:
+        db.session.rollback()
+        raise ValueError("You can only tag your articles!")
+    db.session.commit()
+    Article.invalidate(int(article_id))
+    return jsonify({"article tags": tags}), HTTP_200_OK
+
+
+def handle_replace_tags(
+    article_id: str, author_id: str, tags_data: dict
+) -> Tuple[str, int]:
+    """Handle the PUT request to replace an article's tags.
+
+    Parameters
+    ----------
+    article_id: str
+        The article id
+    author_id: str
+        The author id
+    tags_data: dict
+        The new tags e.g {'tags': ['python', 'flask']}
+
+    Returns
+    -------
+    Tuple[str, int]:
+        The json string representing the request
+        response as well as the response code.
+    """
+    try:
+        article_tags = replace_tags(article_id, author_id, tags_data)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
+    else:
+        return article_tags
+
+
 def comment_article(
     article_id: str, author_id: str, comment_data: dict
 ) -> Tuple[str, int]:
@@ -1229,7 +1768,10 @@ def comment_article(
         author=author, article=article, comment=comment_data["comment"]
     )
     db.session.add(article_comment)
+    Article.update_counter(article.id, "comments_count")
+    Author.update_counter(author.id, "comments_count")
     db.session.commit()
+    Article.invalidate(article.id)
     return comment_schema.dump(article_comment), HTTP_201_CREATED
 
 
@@ -1298,13 +1840,14 @@ def uncomment_article(comment_id: str, author_id: str) -> Tuple[str, int]:
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    if not Comment.query.filter_by(author_id=author_id).first().author_id == int(
-        author_id
-    ):
+    comment = Comment.get_comment(int(comment_id))
+    if comment.author_id != int(author_id):
         raise ValueError("You can only delete your own comments!")
-    comment = Comment.query.filter_by(id=comment_id).first()
     db.session.delete(comment)
+    Article.update_counter(comment.article_id, "comments_count", -1)
+    Author.update_counter(comment.author_id, "comments_count", -1)
     db.session.commit()
+    Article.invalidate(comment.article_id)
     return comment_schema.dump(comment), HTTP_200_OK
 
 
@@ -1330,3 +1873,53 @@ def handle_uncomment(comment_id: str, author_id: str) -> Tuple[str, int]:
         return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
     else:
         return article_comment
+
+
+def image_upload_url(content_type: str) -> Tuple[dict, int]:
+    """Sign the direct upload of an article image.
+
+    Parameters
+    ----------
+    content_type: str
+        The type of the image e.g 'image/png'
+
+    Raises
+    ------
+    ValueError:
+        When the type is not provided or not allowed.
+    TypeError:
+        When the type is not a string.
+
+    Returns
+    -------
+    Tuple[dict, int]:
+        The key of the image, the url and fields it is posted with
+        and the number of seconds they are valid for, as well as the
+        response code.
+    """
+    if not content_type:
+        raise ValueError("The type has to be provided.")
+    if not isinstance(content_type, str):
+        raise TypeError("The type has to be a string.")
+    return storage.upload_url(content_type), HTTP_200_OK
+
+
+def handle_image_upload_url(content_type: str) -> Tuple[dict, int]:
+    """Handle the GET request to sign the upload of an article image.
+
+    Parameters
+    ----------
+    content_type: str
+        The type of the image e.g 'image/png'
+
+    Returns
+    -------
+    Tuple[dict, int]:
+        The upload url and fields, as well as the response code.
+    """
+    try:
+        upload = image_upload_url(content_type)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
+    else:
+        return upload
@@ -7,6 +7,12 @@ Has the following functions:
     Handles the GET request to load an image stored locally.
 2. get_image():
     Loads a locally stored image.
+3. validate_article_ids():
+    Parses a comma separated list of article ids.
+4. validate_tags():
+    Parses a comma separated list of tags.
+5. validate_article_tags():
+    Validates the list of tags given to an article.
 """
 import os
 
@@ -52,3 +58,104 @@ def get_image(filename: str) -> Response:
     """
     file_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
     return send_file(file_path)
+
+
+def validate_article_ids(article_ids: str) -> list:
+    """Parse a comma separated list of article ids.
+
+    Parameters
+    ----------
+    article_ids: str
+        The article ids e.g '1,2,3'
+
+    Raises
+    ------
+    ValueError:
+        When an id is not an integer or there are too many ids.
+    TypeError:
+        When the ids are not a string.
+
+    Returns
+    -------
+    list:
+        The unique article ids.
+    """
+    if not isinstance(article_ids, str):
+        raise TypeError("The article ids have to be a string")
+    ids = [article_id.strip() for article_id in article_ids.split(",")]
+    if not all(article_id.isdigit() for article_id in ids):
+        raise ValueError("The article ids have to be comma separated integers")
+    ids = list(dict.fromkeys(int(article_id) for article_id in ids))
+    if len(ids) > current_app.config["MAX_STATS_BATCH"]:
+        raise ValueError(
+            f'At most {current_app.config["MAX_STATS_BATCH"]} article ids are allowed'
+        )
+    return ids
+
+
+def validate_tags(tags: str) -> list:
+    """Parse a comma separated list of tags.
+
+    Parameters
+    ----------
+    tags: str
+        The tags e.g 'python,flask'
+
+    Raises
+    ------
+    ValueError:
+        When no tag is given or there are too many tags.
+    TypeError:
+        When the tags are not a string.
+
+    Returns
+    -------
+    list:
+        The unique tags.
+    """
+    if not tags:
+        raise ValueError("At least one tag has to be provided")
+    if not isinstance(tags, str):
+        raise TypeError("The tags have to be a string")
+    tags = list(dict.fromkeys(tag.strip() for tag in tags.split(",") if tag.strip()))
+    if not tags:
+        raise ValueError("At least one tag has to be provided")
+    if len(tags) > current_app.config["MAX_TAG_FILTERS"]:
+        raise ValueError(
+            f'At most {current_app.config["MAX_TAG_FILTERS"]} tags are allowed'
+        )
+    return tags
+
+
+def validate_article_tags(tags: list) -> list:
+    """Validate the list of tags given to an article.
+
+    Parameters
+    ----------
+    tags: list
+        The tags e.g ['python', 'flask']
+
+    Raises
+    ------
+    ValueError:
+        When a tag is empty or too long or there are too many tags.
+    TypeError:
+        When the tags are not a list of strings.
+
+    Returns
+    -------
+    list:
+        The unique tags, in the given order.
+    """
+    if not isinstance(tags, list):
+        raise TypeError("The tags have to be a list")
+    if not all(isinstance(tag, str) for tag in tags):
+        raise TypeError("The tags have to be strings")
+    tags = list(dict.fromkeys(tag.strip() for tag in tags))
+    if not all(0 < len(tag) <= 100 for tag in tags):
+        raise ValueError("The tags have to be between 1 and 100 characters long")
+    if len(tags) > current_app.config["MAX_TAGS_PER_ARTICLE"]:
+        raise ValueError(
+            f'An article can have at most {current_app.config["MAX_TAGS_PER_ARTICLE"]} tags'
+        )
+    return tags
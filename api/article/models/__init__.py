@@ -20,12 +20,42 @@ The models include:
 6. View:
     Describes a instance when an article is read and consists
     of an author, article and the date.
+7. EngagementRollup:
+    Describes the number of views, likes, comments or bookmarks
+    an article received on a given day.
+8. RollupWatermark:
+    Describes how far the engagement rollups have been
+    aggregated for a given metric.
+9. Tag:
+    Describes a tag in use and the number of articles tagged
+    with it.
+10. Image:
+    Describes a stored image, by the digest of its content, and
+    the number of articles using it.
+11. RollupGap:
+    Describes an engagement id which was not visible when the
+    rollups went past it.
 """
 from .article import Article
 from .bookmark import Bookmark
 from .comment import Comment
+from .image import Image
 from .like import Like
+from .rollup import EngagementRollup, RollupGap, RollupWatermark
 from .share import Share
+from .tag import Tag
 from .views import View
 
-__all__ = ["Article", "Bookmark", "Comment", "Like", "Share", "View"]
+__all__ = [
+    "Article",
+    "Bookmark",
+    "Comment",
+    "EngagementRollup",
+    "Image",
+    "Like",
+    "RollupGap",
+    "RollupWatermark",
+    "Share",
+    "Tag",
+    "View",
+]
@@ -1,13 +1,32 @@
 # -*- coding: utf-8 -*-
-import os
 from dataclasses import dataclass
 from datetime import datetime
 
 from flask import current_app
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import DDL, Float, cast, event, func, not_, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
 
 from ...extensions import db, ma
-from ...helpers.blueprint_helpers import send_notification
+from ...helpers.cache import cache
+from ...helpers.identity_map import evict, load
+from ...helpers.storage import storage
+from .bookmark import Bookmark
+from .comment import Comment
+from .image import Image
+from .like import Like
+from .views import View
+
+# The trigram operator classes used by the autocomplete indexes.
+event.listen(
+    db.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
+
+ENGAGEMENTS = {
+    "views": View,
+    "likes": Like,
+    "comments": Comment,
+    "bookmarks": Bookmark,
+}
 
 
 @dataclass
@@ -15,25 +34,146 @@ class Article(db.Model):
     """The article class"""
 
     __tablename__ = "articles"
+    __table_args__ = (
+        db.Index("ix_articles_date_published_id", "date_published", "id"),
+        db.Index(
+            "ix_articles_author_id_date_published_id",
+            "author_id",
+            "date_published",
+            "id",
+        ),
+        db.Index("ix_articles_tags", "tags", postgresql_using="gin"),
+        db.Index("ix_articles_search_vector", "search_vector", postgresql_using="gin"),
+        db.Index(
+            "ix_articles_title_trgm",
+            db.text("lower(title) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+    )
 
     id: int = db.Column(db.Integer, primary_key=True)
     author_id: int = db.Column(db.Integer, db.ForeignKey("authors.id"))
     title: str = db.Column(db.String(100), nullable=False)
     text: str = db.Column(db.Text, nullable=False)
-    image: str = db.Column(db.String(100), nullable=True)
+    image: str = db.Column(db.String(255), nullable=True)
+    # The resized copies of the image, see api.helpers.images.
+    image_variants = db.Column(JSONB(none_as_null=True), nullable=True)
     date_published: datetime = db.Column(db.DateTime, default=datetime.utcnow)
     date_edited: datetime = db.Column(db.DateTime, nullable=True)
     tags = db.Column(ARRAY(db.String(100)), default=["tech"])
+    search_vector = db.Column(TSVECTOR, nullable=True)
+    views_count: int = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    likes_count: int = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    comments_count: int = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    bookmarks_count: int = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    # Bumped when the article changes without being edited, e.g when
+    # the copies of its image are recorded, for its ETag.
+    version: int = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     author = db.relationship("Author", backref="articles_published")
 
+    @property
+    def srcset(self) -> dict:
+        """The resized copies of the image as srcset attributes by type.
+
+        The copies made from a previous image are left out.
+
+        Returns
+        -------
+        dict:
+            e.g {'image/webp': 'https://.../a.webp 960w'}
+        """
+        variants = self.image_variants or {}
+        if not self.image or variants.get("source") != self.image:
+            return {}
+        srcset = {}
+        for variant in variants.get("variants", {}).values():
+            # The copies of a small image can share a width.
+            srcset.setdefault(variant["type"], {}).setdefault(
+                variant["width"], variant["url"]
+            )
+        return {
+            kind: ", ".join(
+                f"{candidates[width]} {width}w" for width in sorted(candidates)
+            )
+            for kind, candidates in srcset.items()
+        }
+
+    def delete_image(self) -> None:
+        """Drop the reference to the image.
+
+        The images stored before they were content addressed are
+        deleted along with their resized copies right away.
+        """
+        if self.image and not Image.release(self.image):
+            variants = (self.image_variants or {}).get("variants", {})
+            for variant in variants.values():
+                storage.delete(variant["url"])
+            storage.delete(self.image)
+        self.image_variants = None
+
     @staticmethod
     def article_with_id_exists(article_id):
         """Check if article with given id exists."""
-        if Article.query.filter_by(id=article_id).first():
+        if load(Article, article_id):
             return True
         return False
 
+    @staticmethod
+    def get_cached(article_id: int):
+        """Get the serialized article, from the cache when possible.
+
+        Returns
+        -------
+        dict:
+            The article as dumped by the article schema, or None if
+            it does not exist.
+        """
+
+        def load_article():
+            article = load(Article, article_id)
+            return article_schema.dump(article) if article else None
+
+        return cache.get(Article.cache_key(article_id), load_article)
+
+    @staticmethod
+    def get_cached_stats(article_id: int):
+        """Get the stats of an article, from the cache when possible.
+
+        The engagements do not invalidate the stats, which are
+        fresh for CACHE_STATS_TTL_SECONDS instead.
+
+        Returns
+        -------
+        dict:
+            The counts of the article's engagements, or None if it
+            does not exist.
+        """
+        return cache.get(
+            Article.cache_key(article_id, "stats"),
+            lambda: Article.stats([article_id]).get(article_id),
+            current_app.config["CACHE_STATS_TTL_SECONDS"],
+        )
+
+    @staticmethod
+    def cache_key(article_id: int, kind: str = "article") -> str:
+        """Get the key the article or its stats are cached under."""
+        return f"{kind}:{article_id}"
+
+    @staticmethod
+    def invalidate(article_id: int) -> None:
+        """Drop the cached copies of the article once it has changed."""
+        cache.invalidate(Article.cache_key(article_id))
+        cache.invalidate(Article.cache_key(article_id, "stats"))
+
     @staticmethod
     def validate_title(title):
         """Validate the given title."""
@@ -64,24 +204,214 @@ class Article(db.Model):
     @staticmethod
     def get_article(article_id: int):
         """Get an article."""
-        article = Article.query.filter_by(id=article_id).first()
+        article = load(Article, article_id)
         return article
 
     @staticmethod
-    def all_articles(author_id=None):
-        """List all users."""
+    def all_articles(author_id=None, tag=None):
+        """Build the query for all articles, optionally by author or tag."""
+        query = Article.query
         if author_id:
-            return Article.query.filter_by(author_id=author_id)
-        return Article.query.all()
+            query = query.filter_by(author_id=author_id)
+        if tag:
+            query = query.filter(Article.tags.contains([tag]))
+        return query
+
+    @staticmethod
+    def tagged(tags: list, match_all: bool = True):
+        """Build the query for the articles with all or any of the tags.
+
+        The containment (@>) and overlap (&&) operators are both
+        served by the GIN index on the tags.
+        """
+        if match_all:
+            return Article.query.filter(Article.tags.contains(tags))
+        return Article.query.filter(Article.tags.overlap(tags))
+
+    @staticmethod
+    def search_document(title, text):
+        """Build the search vector of a title and a text.
+
+        Matches in the title are weighted above matches in the text.
+        The title and text can be values or the article's columns.
+        """
+        language = current_app.config["SEARCH_LANGUAGE"]
+        title_vector = func.to_tsvector(language, func.coalesce(title, ""))
+        text_vector = func.to_tsvector(language, func.coalesce(text, ""))
+        return func.setweight(title_vector, "A").op("||")(
+            func.setweight(text_vector, "B")
+        )
+
+    @staticmethod
+    def search(terms: str):
+        """Build the query for the articles matching the search terms.
+
+        The terms use the web search syntax e.g 'flask -django' or
+        '"connection pool"'. Each row holds the article, its rank
+        and a snippet of the text with the matches highlighted.
+
+        Returns
+        -------
+        Tuple[Query, ColumnElement]:
+            The query and the rank to order it by.
+        """
+        language = current_app.config["SEARCH_LANGUAGE"]
+        tsquery = func.websearch_to_tsquery(language, terms)
+        # Cast to double precision so the rank survives a round trip
+        # through the cursor exactly.
+        rank = cast(func.ts_rank(Article.search_vector, tsquery), Float)
+        snippet = func.ts_headline(
+            language,
+            Article.text,
+            tsquery,
+            "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10",
+        )
+        query = db.session.query(
+            Article, rank.label("rank"), snippet.label("snippet")
+        ).filter(Article.search_vector.op("@@")(tsquery))
+        return query, rank
+
+    @staticmethod
+    def rebuild_search_vectors(first_id: int, last_id: int):
+        """Recompute the search vectors of the articles with first_id <= id < last_id."""
+        Article.query.filter(Article.id >= first_id, Article.id < last_id).update(
+            {
+                Article.search_vector: Article.search_document(
+                    Article.title, Article.text
+                )
+            },
+            synchronize_session=False,
+        )
+
+    @staticmethod
+    def update_tags(article_id: int, author_id: int, tags, *conditions):
+        """Set the tags of an author's article in a single statement.
+
+        The article's date_edited is set along with its tags.
+
+        Parameters
+        ----------
+        article_id: int
+            The article id.
+        author_id: int
+            The id of the author who owns the article.
+        tags:
+            The new tags, either a list or a SQL expression computed
+            from the current tags.
+        conditions:
+            Further conditions the article has to meet.
+
+        Returns
+        -------
+        list:
+            The updated tags, or None if no article was updated.
+        """
+        statement = (
+            update(Article)
+            .where(
+                Article.id == article_id, Article.author_id == author_id, *conditions
+            )
+            .values(tags=tags, date_edited=datetime.utcnow())
+            .returning(Article.tags)
+            .execution_options(synchronize_session=False)
+        )
+        return db.session.execute(statement).scalar()
+
+    @staticmethod
+    def add_tag(article_id: int, author_id: int, tag: str, max_tags: int):
+        """Append a tag unless the article already has it or already
+        has max_tags tags."""
+        return Article.update_tags(
+            article_id,
+            author_id,
+            func.array_append(Article.tags, tag, type_=Article.tags.type),
+            or_(Article.tags.is_(None), not_(Article.tags.contains([tag]))),
+            func.coalesce(func.cardinality(Article.tags), 0) < max_tags,
+        )
+
+    @staticmethod
+    def remove_tag(article_id: int, author_id: int, tag: str):
+        """Remove a tag if the article has it."""
+        return Article.update_tags(
+            article_id,
+            author_id,
+            func.array_remove(Article.tags, tag, type_=Article.tags.type),
+            Article.tags.contains([tag]),
+        )
+
+    @staticmethod
+    def count_engagements(model):
+        """Build a subquery counting an article's rows in the given model."""
+        return (
+            select(func.count(model.id))
+            .where(model.article_id == Article.id)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def stats(article_ids: list) -> dict:
+        """Count the views, likes, comments and bookmarks of articles.
+
+        All the counts for all the articles are obtained in a single
+        query, with one correlated count subquery per engagement table.
+
+        Parameters
+        ----------
+        article_ids: list
+            The ids of the articles.
+
+        Returns
+        -------
+        dict:
+            The stats keyed by the article id. Articles that do not
+            exist are left out.
+        """
+        rows = Article.stats_query(article_ids).all()
+        return {row.id: {name: row[name] for name in ENGAGEMENTS} for row in rows}
+
+    @staticmethod
+    def stats_query(article_ids: list):
+        """Build the query counting the engagements of articles."""
+        counts = [
+            Article.count_engagements(model).label(name)
+            for name, model in ENGAGEMENTS.items()
+        ]
+        return db.session.query(Article.id, *counts).filter(Article.id.in_(article_ids))
+
+    @staticmethod
+    def update_counter(article_id: int, counter: str, delta: int = 1):
+        """Add delta to one of the article's counters.
+
+        The increment is done by the database in the current
+        transaction, so concurrent updates are not lost.
+        """
+        column = getattr(Article, counter)
+        Article.query.filter_by(id=article_id).update(
+            {column: column + delta}, synchronize_session=False
+        )
+
+    @staticmethod
+    def recount_counters(first_id: int, last_id: int):
+        """Recompute the counters of the articles with first_id <= id < last_id."""
+        Article.query.filter(Article.id >= first_id, Article.id < last_id).update(
+            {
+                Article.views_count: Article.count_engagements(View),
+                Article.likes_count: Article.count_engagements(Like),
+                Article.comments_count: Article.count_engagements(Comment),
+                Article.bookmarks_count: Article.count_engagements(Bookmark),
+            },
+            synchronize_session=False,
+        )
 
     @staticmethod
     def delete_article(article_id: int):
         """Delete an article."""
-        article = Article.query.filter_by(id=article_id).first()
-        if article.image:
-            send_notification(os.path.basename(article.image), "delete")
+        article = load(Article, article_id)
+        article.delete_image()
         db.session.delete(article)
         db.session.commit()
+        evict(Article, article_id)
+        Article.invalidate(article_id)
         return article
 
 
@@ -91,7 +421,21 @@ class ArticleSchema(ma.Schema):
     class Meta:
         """The fields to display."""
 
-        fields = ("id", "title", "text", "image", "date_published", "tags")
+        fields = (
+            "id",
+            "title",
+            "text",
+            "image",
+            "srcset",
+            "date_published",
+            "date_edited",
+            "tags",
+            "views_count",
+            "likes_count",
+            "comments_count",
+            "bookmarks_count",
+            "version",
+        )
 
 
 article_schema = ArticleSchema()
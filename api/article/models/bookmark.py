@@ -2,6 +2,9 @@
 from dataclasses import dataclass
 from datetime import datetime
 
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
 from ...extensions import db, ma
 
 
@@ -10,6 +13,13 @@ class Bookmark(db.Model):
     """The Bookmark Model."""
 
     __tablename__ = "bookmarks"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "article_id", "author_id", name="uq_bookmarks_article_id_author_id"
+        ),
+        db.Index("ix_bookmarks_article_id_date_id", "article_id", "date", "id"),
+        db.Index("ix_bookmarks_author_id_date_id", "author_id", "date", "id"),
+    )
 
     id: int = db.Column(db.Integer, primary_key=True)
     author_id: int = db.Column(db.Integer, db.ForeignKey("authors.id"))
@@ -19,6 +29,54 @@ class Bookmark(db.Model):
     author = db.relationship("Author", backref="bookmarks")
     article = db.relationship("Article", backref="bookmarks")
 
+    @staticmethod
+    def for_article(article_id: int, author_id: int = None):
+        """Build the query for an article's bookmarks, optionally by author."""
+        query = Bookmark.query.filter_by(article_id=article_id)
+        if author_id:
+            query = query.filter_by(author_id=author_id)
+        return query
+
+    @staticmethod
+    def add(article_id: int, author_id: int):
+        """Add a bookmark unless the author has already bookmarkd the article.
+
+        The check and the insert are a single statement backed by the
+        unique constraint, so concurrent requests add at most one row.
+
+        Returns
+        -------
+        Row:
+            The added bookmark, or None if it already existed.
+        """
+        statement = (
+            insert(Bookmark)
+            .values(article_id=article_id, author_id=author_id)
+            .on_conflict_do_nothing(constraint="uq_bookmarks_article_id_author_id")
+            .returning(
+                Bookmark.id, Bookmark.article_id, Bookmark.author_id, Bookmark.date
+            )
+        )
+        return db.session.execute(statement).first()
+
+    @staticmethod
+    def remove(article_id: int, author_id: int):
+        """Remove an author's bookmark of an article in a single statement.
+
+        Returns
+        -------
+        Row:
+            The removed bookmark, or None if there was none.
+        """
+        statement = (
+            delete(Bookmark)
+            .where(Bookmark.article_id == article_id, Bookmark.author_id == author_id)
+            .returning(
+                Bookmark.id, Bookmark.article_id, Bookmark.author_id, Bookmark.date
+            )
+        )
+        return db.session.execute(statement).first()
+
 
 class BookmarkSchema(ma.Schema):
     """Show all the article information."""
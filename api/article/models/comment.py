@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from datetime import datetime
 
 from ...extensions import db, ma
+from ...helpers.identity_map import load
 
 
 @dataclass
@@ -10,6 +11,10 @@ class Comment(db.Model):
     """The Comment Model."""
 
     __tablename__ = "comments"
+    __table_args__ = (
+        db.Index("ix_comments_article_id_date_id", "article_id", "date", "id"),
+        db.Index("ix_comments_author_id_article_id", "author_id", "article_id"),
+    )
     id: int = db.Column(db.Integer, primary_key=True)
     author_id: int = db.Column(db.Integer, db.ForeignKey("authors.id"))
     article_id: int = db.Column(db.Integer, db.ForeignKey("articles.id"))
@@ -19,13 +24,26 @@ class Comment(db.Model):
     author = db.relationship("Author", backref="comments")
     article = db.relationship("Article", backref="comments")
 
+    @staticmethod
+    def for_article(article_id: int, author_id: int = None):
+        """Build the query for an article's comments, optionally by author."""
+        query = Comment.query.filter_by(article_id=article_id)
+        if author_id:
+            query = query.filter_by(author_id=author_id)
+        return query
+
     @staticmethod
     def comment_with_id_exists(comment_id):
         """Check if article with given id exists."""
-        if Comment.query.filter_by(id=comment_id).first():
+        if load(Comment, comment_id):
             return True
         return False
 
+    @staticmethod
+    def get_comment(comment_id: int):
+        """Get a comment."""
+        return load(Comment, comment_id)
+
 
 class CommentSchema(ma.Schema):
     """Show all the article information."""
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.orm import Session
+
+from ...config.logger import app_logger
+from ...extensions import db
+from ...helpers.storage import storage
+
+# The keys of the images stored under their digest, and of their copies.
+DIGEST_KEY = re.compile(r"^([0-9a-f]{64})\.")
+
+
+@dataclass
+class Image(db.Model):
+    """A stored image and the number of articles using it.
+
+    The images are stored under the SHA-256 digest of their content,
+    so an image uploaded again is not stored twice. An image is
+    stored before its row is written, so the row is not locked during
+    the upload, and the images whose row was rolled back are swept
+    by the collect_images command. An image is deleted from the
+    storage once the transaction dropping its last reference commits,
+    the count being checked again under a lock in case it was
+    uploaded again meanwhile.
+    """
+
+    __tablename__ = "images"
+
+    digest: str = db.Column(db.String(64), primary_key=True)
+    url: str = db.Column(db.String(255), nullable=False, unique=True)
+    content_type: str = db.Column(db.String(50), nullable=False)
+    size: int = db.Column(db.Integer, nullable=False)
+    references_count: int = db.Column(db.Integer, nullable=False, default=0)
+    # The resized copies, shared by the articles using the image.
+    variants = db.Column(JSONB(none_as_null=True), nullable=True)
+    date_created: datetime = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @staticmethod
+    def stored_url(digest: str) -> Optional[str]:
+        """Get the url of an image if it is already stored."""
+        return db.session.query(Image.url).filter_by(digest=digest).scalar()
+
+    @staticmethod
+    def acquire(digest: str, url: str, content_type: str, size: int):
+        """Take a reference to an image.
+
+        The row stays locked until the transaction ends, so the image
+        cannot be deleted until then.
+
+        Parameters
+        ----------
+        digest: str
+            The SHA-256 digest of the image.
+        url: str
+            The url the image is stored at if it is new.
+        content_type: str
+            The type of the image.
+        size: int
+            The number of bytes of the image.
+
+        Returns
+        -------
+        tuple:
+            The url of the image and whether its row was created.
+        """
+        statement = (
+            insert(Image)
+            .values(
+                digest=digest,
+                url=url,
+                content_type=content_type,
+                size=size,
+                references_count=1,
+            )
+            .on_conflict_do_update(
+                index_elements=[Image.digest],
+                set_={"references_count": Image.references_count + 1},
+            )
+            .returning(Image.url, Image.references_count)
+        )
+        stored_url, references = db.session.execute(statement).one()
+        return stored_url, references == 1
+
+    @staticmethod
+    def release(url: str) -> bool:
+        """Drop a reference to an image.
+
+        The image is collected once the transaction commits if this
+        was its last reference.
+
+        Returns
+        -------
+        bool:
+            False if the image is not content addressed, having been
+            stored before the images table, else True.
+        """
+        released = db.session.execute(
+            update(Image)
+            .where(Image.url == url, Image.references_count > 0)
+            .values(references_count=Image.references_count - 1)
+            .returning(Image.digest, Image.references_count)
+        ).one_or_none()
+        if released is None:
+            return db.session.query(Image.digest).filter_by(url=url).first() is not None
+        if released.references_count == 0:
+            db.session.info.setdefault("released images", set()).add(released.digest)
+        return True
+
+    @staticmethod
+    def shared_variants(url: str):
+        """Get the resized copies of an image, if they were made."""
+        return db.session.query(Image.variants).filter_by(url=url).scalar()
+
+    @staticmethod
+    def record_variants(url: str, variants: dict) -> None:
+        """Record the resized copies of an image."""
+        db.session.execute(
+            update(Image).where(Image.url == url).values(variants=variants)
+        )
+
+    @staticmethod
+    def unreferenced() -> set:
+        """Get the digests of the images without references."""
+        return {
+            digest
+            for digest, in db.session.query(Image.digest).filter_by(references_count=0)
+        }
+
+    @staticmethod
+    def collect(digests: set) -> None:
+        """Delete the images without references from the storage.
+
+        Each image is deleted in its own transaction, outside of the
+        session, holding the lock on its row. All the copies the image
+        can have are deleted, recorded or not, since a run making them
+        may have stored them without recording them.
+        """
+        # The copies are declared along with their generation, which
+        # imports the models.
+        from ...helpers.images import variant_urls
+
+        for digest in digests:
+            with db.engine.begin() as connection:
+                image = connection.execute(
+                    select(Image.url, Image.variants)
+                    .where(Image.digest == digest, Image.references_count == 0)
+                    .with_for_update()
+                ).one_or_none()
+                if image is None:
+                    continue
+                recorded = {
+                    variant["url"] for variant in (image.variants or {}).values()
+                }
+                for url in recorded.union(variant_urls(image.url)):
+                    storage.delete(url)
+                storage.delete(image.url)
+                connection.execute(delete(Image).where(Image.digest == digest))
+
+    @staticmethod
+    def sweep(grace_seconds: int, batch_size: int = 1000) -> int:
+        """Delete the images stored under a digest which has no row.
+
+        These are the images whose transaction was rolled back after
+        they were stored, along with their copies. The images changed
+        within grace_seconds are kept, their row may not be committed
+        yet.
+
+        Returns
+        -------
+        int:
+            The number of images deleted.
+        """
+        settled = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+        deleted = 0
+        candidates = {}
+        keys = storage.keys()
+        while True:
+            for key, modified in keys:
+                match = DIGEST_KEY.match(key)
+                if match and modified < settled:
+                    candidates.setdefault(match.group(1), []).append(key)
+                    if len(candidates) >= batch_size:
+                        break
+            if not candidates:
+                return deleted
+            known = {
+                digest
+                for digest, in db.session.query(Image.digest).filter(
+                    Image.digest.in_(list(candidates))
+                )
+            }
+            for digest in candidates.keys() - known:
+                for key in candidates[digest]:
+                    storage.delete(storage.url(key))
+                    deleted += 1
+            candidates = {}
+
+
+@event.listens_for(Session, "after_commit")
+def collect_released_images(session):
+    """Delete the images whose last reference was just dropped."""
+    digests = session.info.pop("released images", None)
+    if digests:
+        try:
+            Image.collect(digests)
+        except Exception:
+            # They are left to the collect_images command.
+            app_logger.exception("Failed to delete the released images")
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_released_images(session):
+    """Keep the images whose references were restored."""
+    session.info.pop("released images", None)
@@ -2,6 +2,9 @@
 from dataclasses import dataclass
 from datetime import datetime
 
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
 from ...extensions import db, ma
 
 
@@ -10,6 +13,13 @@ class Like(db.Model):
     """The Like Model."""
 
     __tablename__ = "likes"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "article_id", "author_id", name="uq_likes_article_id_author_id"
+        ),
+        db.Index("ix_likes_article_id_date_id", "article_id", "date", "id"),
+        db.Index("ix_likes_author_id_date_id", "author_id", "date", "id"),
+    )
     id: int = db.Column(db.Integer, primary_key=True)
     author_id: int = db.Column(db.Integer, db.ForeignKey("authors.id"))
     article_id: int = db.Column(db.Integer, db.ForeignKey("articles.id"))
@@ -18,6 +28,50 @@ class Like(db.Model):
     author = db.relationship("Author", backref="likes")
     article = db.relationship("Article", backref="likes")
 
+    @staticmethod
+    def for_article(article_id: int, author_id: int = None):
+        """Build the query for an article's likes, optionally by author."""
+        query = Like.query.filter_by(article_id=article_id)
+        if author_id:
+            query = query.filter_by(author_id=author_id)
+        return query
+
+    @staticmethod
+    def add(article_id: int, author_id: int):
+        """Add a like unless the author has already liked the article.
+
+        The check and the insert are a single statement backed by the
+        unique constraint, so concurrent requests add at most one row.
+
+        Returns
+        -------
+        Row:
+            The added like, or None if it already existed.
+        """
+        statement = (
+            insert(Like)
+            .values(article_id=article_id, author_id=author_id)
+            .on_conflict_do_nothing(constraint="uq_likes_article_id_author_id")
+            .returning(Like.id, Like.article_id, Like.author_id, Like.date)
+        )
+        return db.session.execute(statement).first()
+
+    @staticmethod
+    def remove(article_id: int, author_id: int):
+        """Remove an author's like of an article in a single statement.
+
+        Returns
+        -------
+        Row:
+            The removed like, or None if there was none.
+        """
+        statement = (
+            delete(Like)
+            .where(Like.article_id == article_id, Like.author_id == author_id)
+            .returning(Like.id, Like.article_id, Like.author_id, Like.date)
+        )
+        return db.session.execute(statement).first()
+
 
 class LikeSchema(ma.Schema):
     """Show all the article information."""
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import Date, cast, delete, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+from ...extensions import db
+from .article import ENGAGEMENTS, Article
+
+
+@dataclass
+class RollupWatermark(db.Model):
+    """The id of the last engagement row aggregated for a metric."""
+
+    __tablename__ = "rollup_watermarks"
+
+    metric: str = db.Column(db.String(20), primary_key=True)
+    last_id: int = db.Column(db.Integer, nullable=False, default=0)
+
+
+@dataclass
+class RollupGap(db.Model):
+    """An engagement id which was not visible when its batch was
+    aggregated, either rolled back or from a transaction in flight."""
+
+    __tablename__ = "rollup_gaps"
+
+    metric: str = db.Column(db.String(20), primary_key=True)
+    id: int = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    date_found: datetime = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow
+    )
+
+
+@dataclass
+class EngagementRollup(db.Model):
+    """The number of engagements an article received on a given day."""
+
+    __tablename__ = "engagement_rollups"
+    __table_args__ = (
+        db.Index("ix_engagement_rollups_author_id_day", "author_id", "day"),
+    )
+
+    article_id: int = db.Column(
+        db.Integer, db.ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True
+    )
+    author_id: int = db.Column(
+        db.Integer, db.ForeignKey("authors.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: date = db.Column(db.Date, primary_key=True)
+    metric: str = db.Column(db.String(20), primary_key=True)
+    count: int = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def fold(metric: str, condition) -> None:
+        """Add the engagement rows matching a condition to the rollups."""
+        model = ENGAGEMENTS[metric]
+        day = cast(model.date, Date)
+        rows = (
+            select(
+                model.article_id,
+                Article.author_id,
+                day,
+                literal(metric),
+                func.count(model.id),
+            )
+            .join(Article, Article.id == model.article_id)
+            .where(condition)
+            .group_by(model.article_id, Article.author_id, day)
+        )
+        statement = insert(EngagementRollup).from_select(
+            ["article_id", "author_id", "day", "metric", "count"], rows
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["article_id", "author_id", "day", "metric"],
+                set_={"count": EngagementRollup.count + statement.excluded.count},
+            )
+        )
+
+    @staticmethod
+    def aggregate(metric: str, batch_size: int) -> int:
+        """Fold the engagement rows past the watermark into the rollups.
+
+        The rows are aggregated in batches of ids. Each batch is
+        upserted into the rollups and the watermark advanced in the
+        same transaction, so the job can be stopped and resumed at
+        any point without counting a row twice. Rows newer than
+        ROLLUP_LAG_SECONDS are left for the next run.
+
+        The ids are drawn before the rows commit, so a row from a
+        long transaction can commit below the watermark. The ids
+        missing from a batch are kept as gaps, and the gaps whose row
+        has since committed are folded on the next runs. The gaps are
+        forgotten after ROLLUP_GAP_RETENTION_SECONDS, most of them
+        being rolled back inserts.
+
+        Parameters
+        ----------
+        metric: str
+            One of views, likes, comments or bookmarks.
+        batch_size: int
+            The number of engagement rows aggregated per transaction.
+
+        Returns
+        -------
+        int:
+            The new watermark.
+        """
+        model = ENGAGEMENTS[metric]
+        watermark = db.session.get(RollupWatermark, metric)
+        if not watermark:
+            watermark = RollupWatermark(metric=metric, last_id=0)
+            db.session.add(watermark)
+            db.session.commit()
+        EngagementRollup.fold_gaps(metric, batch_size)
+        now = datetime.utcnow()
+        settled = now - timedelta(seconds=current_app.config["ROLLUP_LAG_SECONDS"])
+        high = (
+            db.session.query(func.coalesce(func.max(model.id), 0))
+            .filter(model.date < settled)
+            .scalar()
+        )
+        while watermark.last_id < high:
+            low, upper = watermark.last_id, min(watermark.last_id + batch_size, high)
+            EngagementRollup.fold(metric, (model.id > low) & (model.id <= upper))
+            ids = (
+                func.generate_series(low + 1, upper).table_valued("id").render_derived()
+            )
+            missing = select(literal(metric), ids.c.id, literal(now)).where(
+                ~exists().where(model.id == ids.c.id)
+            )
+            db.session.execute(
+                insert(RollupGap)
+                .from_select(["metric", "id", "date_found"], missing)
+                .on_conflict_do_nothing()
+            )
+            watermark.last_id = upper
+            db.session.commit()
+        return watermark.last_id
+
+    @staticmethod
+    def fold_gaps(metric: str, batch_size: int) -> None:
+        """Fold the rows which committed into the gaps of a metric.
+
+        Each gap is deleted in the transaction folding its row, so a
+        row is not counted twice.
+        """
+        model = ENGAGEMENTS[metric]
+        while True:
+            gaps = (
+                select(RollupGap.id)
+                .join(model, model.id == RollupGap.id)
+                .where(RollupGap.metric == metric)
+                .limit(batch_size)
+            )
+            found = (
+                db.session.execute(
+                    delete(RollupGap)
+                    .where(RollupGap.metric == metric, RollupGap.id.in_(gaps))
+                    .returning(RollupGap.id)
+                    .execution_options(synchronize_session=False)
+                )
+                .scalars()
+                .all()
+            )
+            if not found:
+                break
+            EngagementRollup.fold(metric, model.id.in_(found))
+            db.session.commit()
+        expired = datetime.utcnow() - timedelta(
+            seconds=current_app.config["ROLLUP_GAP_RETENTION_SECONDS"]
+        )
+        db.session.execute(
+            delete(RollupGap)
+            .where(RollupGap.metric == metric, RollupGap.date_found < expired)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    @staticmethod
+    def validate_date_range(start: str, end: str):
+        """Validate the given date range.
+
+        Parameters
+        ----------
+        start: str, optional
+            The first day in ISO format, defaults to
+            TIMESERIES_DEFAULT_DAYS before the end.
+        end: str, optional
+            The last day in ISO format, defaults to today.
+
+        Raises
+        ------
+        ValueError:
+            When a date is not valid or the range is too long.
+
+        Returns
+        -------
+        Tuple[date, date]:
+            The first and last day.
+        """
+        default_days = timedelta(days=current_app.config["TIMESERIES_DEFAULT_DAYS"] - 1)
+        try:
+            end = date.fromisoformat(end) if end else datetime.utcnow().date()
+            start = date.fromisoformat(start) if start else end - default_days
+        except (TypeError, ValueError):
+            raise ValueError("The dates have to be in the format YYYY-MM-DD") from None
+        if start > end:
+            raise ValueError("The start date has to be before the end date")
+        if (end - start).days >= current_app.config["TIMESERIES_MAX_DAYS"]:
+            raise ValueError(
+                f'The range can be at most {current_app.config["TIMESERIES_MAX_DAYS"]} days'
+            )
+        return start, end
+
+    @staticmethod
+    def timeseries(start: date, end: date, article_id=None, author_id=None) -> list:
+        """Get the daily engagement counts of an article or an author.
+
+        Parameters
+        ----------
+        start: date
+            The first day.
+        end: date
+            The last day.
+        article_id: int, optional
+            The article whose engagements are counted.
+        author_id: int, optional
+            The author whose articles' engagements are counted.
+
+        Returns
+        -------
+        list:
+            One entry per day with the count of each metric.
+        """
+        query = db.session.query(
+            EngagementRollup.day,
+            EngagementRollup.metric,
+            func.sum(EngagementRollup.count),
+        ).filter(EngagementRollup.day >= start, EngagementRollup.day <= end)
+        if article_id:
+            query = query.filter(EngagementRollup.article_id == article_id)
+        if author_id:
+            query = query.filter(EngagementRollup.author_id == author_id)
+        counts = {
+            (day, metric): int(count)
+            for day, metric, count in query.group_by(
+                EngagementRollup.day, EngagementRollup.metric
+            )
+        }
+        series = []
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            point = {"day": day.isoformat()}
+            for metric in ENGAGEMENTS:
+                point[metric] = counts.get((day, metric), 0)
+            series.append(point)
+        return series
@@ -8,6 +8,10 @@ class Share(db.Model):
     """The Share Model."""
 
     __tablename__ = "shares"
+    __table_args__ = (
+        db.Index("ix_shares_article_id_author_id", "article_id", "author_id"),
+        db.Index("ix_shares_author_id", "author_id"),
+    )
 
     id: int = db.Column(db.Integer, primary_key=True)
     author_id: int = db.Column(db.Integer, db.ForeignKey("authors.id"))
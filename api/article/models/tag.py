@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+
+from ...extensions import db
+from .article import Article
+
+
+@dataclass
+class Tag(db.Model):
+    """A tag in use and the number of articles tagged with it.
+
+    The tags live in the articles' tags column. This table is a
+    periodically refreshed summary of them that the tag suggestions
+    are served from.
+    """
+
+    __tablename__ = "tags"
+    __table_args__ = (
+        db.Index(
+            "ix_tags_name_trgm",
+            db.text("lower(name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+    )
+
+    name: str = db.Column(db.String(100), primary_key=True)
+    articles_count: int = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def refresh() -> int:
+        """Recount the articles of every tag in use.
+
+        Returns
+        -------
+        int:
+            The number of tags in use.
+        """
+        tag = func.unnest(Article.tags).label("name")
+        counts = select(tag, func.count()).group_by(tag)
+        db.session.query(Tag).delete(synchronize_session=False)
+        db.session.execute(
+            db.insert(Tag).from_select(["name", "articles_count"], counts)
+        )
+        return db.session.query(func.count(Tag.name)).scalar()
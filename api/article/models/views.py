@@ -10,6 +10,10 @@ class View(db.Model):
     """This model describes an instance of an article being read."""
 
     __tablename__ = "views"
+    __table_args__ = (
+        db.Index("ix_views_article_id_date_id", "article_id", "date", "id"),
+        db.Index("ix_views_author_id_article_id", "author_id", "article_id"),
+    )
     id: int = db.Column(db.Integer, primary_key=True)
     author_id: int = db.Column(db.Integer, db.ForeignKey("authors.id"))
     article_id: int = db.Column(db.Integer, db.ForeignKey("articles.id"))
@@ -17,3 +21,11 @@ class View(db.Model):
 
     author = db.relationship("Author", backref="views")
     article = db.relationship("Article", backref="views")
+
+    @staticmethod
+    def for_article(article_id: int, author_id: int = None):
+        """Build the query for an article's views, optionally by author."""
+        query = View.query.filter_by(article_id=article_id)
+        if author_id:
+            query = query.filter_by(author_id=author_id)
+        return query
@@ -42,6 +42,16 @@ The various functions include:
     Comment on a given article.
 20. uncomment_article()
     Delete a comment.
+21. get_timeseries()
+    Get the daily stats for a given article.
+22. get_articles_by_tag()
+    List the articles with all or any of the given tags.
+23. replace_tags()
+    Replace all the tags of a given article.
+24. search_articles()
+    Search the article titles and texts.
+25. get_image_upload_url()
+    Sign the direct upload of an article image.
 """
 from flasgger import swag_from
 from flask import Blueprint, Response, jsonify, request
@@ -49,6 +59,7 @@ from flask_jwt_extended import jwt_required
 
 from .controller.article import (
     handle_article_stats,
+    handle_articles_by_tag,
     handle_bookmark,
     handle_bookmarks,
     handle_comment,
@@ -56,11 +67,15 @@ from .controller.article import (
     handle_create_article,
     handle_delete_article,
     handle_get_article,
+    handle_image_upload_url,
     handle_like,
     handle_likes,
     handle_list_articles,
+    handle_replace_tags,
+    handle_search_articles,
     handle_tag,
     handle_tags,
+    handle_timeseries,
     handle_unbookmark,
     handle_uncomment,
     handle_unlike,
@@ -82,6 +97,18 @@ def create_article() -> Response:
     return handle_create_article(request.args.get("id"), request.form, request.files)
 
 
+@article.route("/image/upload_url", methods=["GET"])
+@jwt_required()
+@swag_from(
+    "./docs/image_upload_url.yml",
+    endpoint="article.get_image_upload_url",
+    methods=["GET"],
+)
+def get_image_upload_url() -> Response:
+    """Sign the direct upload of an article image."""
+    return handle_image_upload_url(request.args.get("type"))
+
+
 @article.route("/", methods=["GET"])
 @jwt_required()
 @swag_from("./docs/get_article.yml", endpoint="article.get_article", methods=["GET"])
@@ -122,7 +149,38 @@ def delete_article() -> Response:
 )
 def get_all_articles() -> Response:
     """List all articles."""
-    return handle_list_articles(request.args.get("author id"))
+    return handle_list_articles(
+        request.args.get("author id"),
+        request.args.get("tag"),
+        request.args.get("limit"),
+        request.args.get("cursor"),
+        request.args.get("stream"),
+    )
+
+
+@article.route("/by_tag", methods=["GET"])
+@jwt_required()
+@swag_from("./docs/by_tag.yml", endpoint="article.get_articles_by_tag", methods=["GET"])
+def get_articles_by_tag() -> Response:
+    """List the articles with the given tags."""
+    return handle_articles_by_tag(
+        request.args.get("tag"),
+        request.args.get("match"),
+        request.args.get("limit"),
+        request.args.get("cursor"),
+    )
+
+
+@article.route("/search", methods=["GET"])
+@jwt_required()
+@swag_from("./docs/search.yml", endpoint="article.search_articles", methods=["GET"])
+def search_articles() -> Response:
+    """Search the articles."""
+    return handle_search_articles(
+        request.args.get("q"),
+        request.args.get("limit"),
+        request.args.get("cursor"),
+    )
 
 
 @article.route("/comments", methods=["GET"])
@@ -130,7 +188,13 @@ def get_all_articles() -> Response:
 @swag_from("./docs/comments.yml", endpoint="article.get_comments", methods=["GET"])
 def get_comments() -> Response:
     """List article comments."""
-    return handle_comments(request.args.get("id"), request.args.get("author id"))
+    return handle_comments(
+        request.args.get("id"),
+        request.args.get("author id"),
+        request.args.get("limit"),
+        request.args.get("cursor"),
+        request.args.get("total"),
+    )
 
 
 @article.route("/likes", methods=["GET"])
@@ -138,7 +202,13 @@ def get_comments() -> Response:
 @swag_from("./docs/likes.yml", endpoint="article.get_likes", methods=["GET"])
 def get_likes() -> Response:
     """List article likes."""
-    return handle_likes(request.args.get("id"))
+    return handle_likes(
+        request.args.get("id"),
+        request.args.get("author id"),
+        request.args.get("limit"),
+        request.args.get("cursor"),
+        request.args.get("total"),
+    )
 
 
 @article.route("/bookmarks", methods=["GET"])
@@ -146,7 +216,13 @@ def get_likes() -> Response:
 @swag_from("./docs/bookmarks.yml", endpoint="article.get_bookmarks", methods=["GET"])
 def get_bookmarks() -> Response:
     """List article bookmarks."""
-    return handle_bookmarks(request.args.get("id"))
+    return handle_bookmarks(
+        request.args.get("id"),
+        request.args.get("author id"),
+        request.args.get("limit"),
+        request.args.get("cursor"),
+        request.args.get("total"),
+    )
 
 
 @article.route("/tags", methods=["GET"])
@@ -157,12 +233,28 @@ def get_tags() -> Response:
     return handle_tags(request.args.get("id"))
 
 
+@article.route("/tags", methods=["PUT"])
+@jwt_required()
+@swag_from("./docs/replace_tags.yml", endpoint="article.replace_tags", methods=["PUT"])
+def replace_tags() -> Response:
+    """Replace an article's tags."""
+    return handle_replace_tags(
+        request.args.get("article id"), request.args.get("author id"), request.json
+    )
+
+
 @article.route("/articles_views", methods=["GET"])
 @jwt_required()
 @swag_from("./docs/views.yml", endpoint="article.get_articles_views", methods=["GET"])
 def get_articles_views() -> Response:
     """List article articles read."""
-    return handle_views(request.args.get("id"), request.args.get("author id"))
+    return handle_views(
+        request.args.get("id"),
+        request.args.get("author id"),
+        request.args.get("limit"),
+        request.args.get("cursor"),
+        request.args.get("total"),
+    )
 
 
 @article.route("/stats", methods=["GET"])
@@ -170,7 +262,17 @@ def get_articles_views() -> Response:
 @swag_from("./docs/stats.yml", endpoint="article.get_stats", methods=["GET"])
 def get_stats() -> Response:
     """List article articles read."""
-    return handle_article_stats(request.args.get("id"))
+    return handle_article_stats(request.args.get("id"), request.args.get("ids"))
+
+
+@article.route("/timeseries", methods=["GET"])
+@jwt_required()
+@swag_from("./docs/timeseries.yml", endpoint="article.get_timeseries", methods=["GET"])
+def get_timeseries() -> Response:
+    """List an article's daily stats."""
+    return handle_timeseries(
+        request.args.get("id"), request.args.get("from"), request.args.get("to")
+    )
 
 
 @article.route("/bookmark", methods=["GET"])
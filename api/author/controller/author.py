@@ -3,9 +3,12 @@ import json
 
 from flask import jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import func, select
 
 from ...article.models.article import Article
+from ...article.models.rollup import EngagementRollup
 from ...extensions import db
+from ...helpers.conditional import conditional, make_etag
 from ...helpers.exceptions import AuthorDoesNotExist, AuthorExists
 from ...helpers.http_status_codes import (
     HTTP_200_OK,
@@ -13,7 +16,8 @@ from ...helpers.http_status_codes import (
     HTTP_404_NOT_FOUND,
     HTTP_409_CONFLICT,
 )
-from ..models.author import Author, author_schema, authors_schema
+from ...helpers.streaming import json_rows, stream_response
+from ..models.author import Author, author_schema
 from .helper import validate_author_data
 
 
@@ -76,7 +80,7 @@ def log_in_author(author_id: str, author_data: dict):
             f'The authorwith email {author_data["email"]} and id {author_id} does not exist!'
         )
 
-    author = Author.query.filter_by(email_address=author_data["email"]).first()
+    author = Author.get_user(int(author_id))
     if author:
         access_token = create_access_token(identity=author.id)
         refresh_token = create_refresh_token(identity=author.id)
@@ -110,7 +114,8 @@ def get_author(author_id: str) -> dict:
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"The user with id {author_id} does not exist.")
 
-    return author_schema.dump(Author.get_user(int(author_id))), 200
+    author = author_schema.dump(Author.get_user(int(author_id)))
+    return conditional(author, make_etag(author))
 
 
 def handle_get_author(author_id: str):
@@ -192,8 +197,9 @@ def handle_update_author(author_id: str, author_data: dict):
 
 
 def handle_list_authors():
-    """List all authors."""
-    return authors_schema.dump(Author.query.all()), HTTP_200_OK
+    """List all authors, streamed as they are read from the database."""
+    chunks = json_rows(Author.query.order_by(Author.id), author_schema)
+    return stream_response(chunks), HTTP_200_OK
 
 
 def articles_published(author_id: str):
@@ -204,7 +210,7 @@ def articles_published(author_id: str):
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    return Author.query.filter_by(id=author_id).first().articles_published, 200
+    return Author.get_user(int(author_id)).articles_published, 200
 
 
 def handle_articles_published(author_id: str):
@@ -225,7 +231,7 @@ def articles_bookmarked(author_id: str):
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    return Author.query.filter_by(id=author_id).first().bookmarks, 200
+    return Author.get_user(int(author_id)).bookmarks, 200
 
 
 def handle_articles_bookmarked(author_id: str):
@@ -251,13 +257,13 @@ def articles_commented(author_id: str, article_id: str):
             raise TypeError("The article id has to be a string")
         if not Article.article_with_id_exists(int(article_id)):
             raise ValueError(f"Their is no article with id {article_id}")
-        comments = Author.query.filter_by(id=author_id).first().comments
+        comments = Author.get_user(int(author_id)).comments
         art_comments = []
         for comment in comments:
             if comment.article.id == int(article_id):
                 art_comments.append(comment)
         return art_comments
-    return Author.query.filter_by(id=author_id).first().comments, 200
+    return Author.get_user(int(author_id)).comments, 200
 
 
 def handle_articles_commented(author_id: str, article_id: str):
@@ -278,7 +284,7 @@ def articles_liked(author_id: str):
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    return Author.query.filter_by(id=author_id).first().likes, 200
+    return Author.get_user(int(author_id)).likes, 200
 
 
 def handle_articles_liked(author_id: str):
@@ -299,7 +305,7 @@ def articles_viewed(author_id: str):
         raise TypeError("The author id has to be a string")
     if not Author.user_with_id_exists(int(author_id)):
         raise ValueError(f"Their is no author with id {author_id}")
-    return Author.query.filter_by(id=author_id).first().views, 200
+    return Author.get_user(int(author_id)).views, 200
 
 
 def handle_articles_viewed(author_id: str):
@@ -313,23 +319,36 @@ def handle_articles_viewed(author_id: str):
 
 
 def author_stats(author_id: str):
-    """Delete an author."""
+    """Get the stats of an author.
+
+    The stats are read from the author's counters along with the
+    number of articles published, in a single row, which is also
+    the version the 304 is decided on.
+    """
     if not author_id:
         raise ValueError("The author id has to be provided")
     if not isinstance(author_id, str):
         raise TypeError("The author id has to be a string")
-    if not Author.user_with_id_exists(int(author_id)):
+    published = (
+        select(func.count(Article.id))
+        .where(Article.author_id == Author.id)
+        .scalar_subquery()
+    )
+    row = (
+        db.session.query(
+            Author.views_count.label("views"),
+            Author.likes_count.label("likes"),
+            Author.comments_count.label("comments"),
+            published.label("articles published"),
+            Author.bookmarks_count.label("bookmarks"),
+        )
+        .filter(Author.id == int(author_id))
+        .first()
+    )
+    if not row:
         raise ValueError(f"Their is no author with id {author_id}")
-    stats = {
-        "views": len(Author.query.filter_by(id=author_id).first().views),
-        "likes": len(Author.query.filter_by(id=author_id).first().likes),
-        "comments": len(Author.query.filter_by(id=author_id).first().comments),
-        "articles published": len(
-            Author.query.filter_by(id=author_id).first().articles_published
-        ),
-        "bookmarks": len(Author.query.filter_by(id=author_id).first().bookmarks),
-    }
-    return stats, 200
+    stats = dict(row._mapping)
+    return conditional(stats, make_etag(stats))
 
 
 def handle_author_stats(author_id: str):
@@ -342,6 +361,28 @@ def handle_author_stats(author_id: str):
         return stats
 
 
+def author_timeseries(author_id: str, start: str, end: str):
+    """Get the daily views, likes, comments and bookmarks of an author's articles."""
+    if not author_id:
+        raise ValueError("The author id has to be provided")
+    if not isinstance(author_id, str):
+        raise TypeError("The author id has to be a string")
+    if not Author.user_with_id_exists(int(author_id)):
+        raise ValueError(f"Their is no author with id {author_id}")
+    start, end = EngagementRollup.validate_date_range(start, end)
+    return EngagementRollup.timeseries(start, end, author_id=int(author_id)), 200
+
+
+def handle_author_timeseries(author_id: str, start: str, end: str):
+    """Handle the get request for an author's daily stats."""
+    try:
+        series = author_timeseries(author_id, start, end)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    else:
+        return series
+
+
 def handle_refresh_token(identity) -> dict:
     """Generate a new access token."""
     return jsonify(access_token=create_access_token(identity=identity)), 200
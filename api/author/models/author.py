@@ -2,8 +2,14 @@
 from dataclasses import dataclass
 
 from flask import current_app
+from sqlalchemy import func, select
 
+from ...article.models.bookmark import Bookmark
+from ...article.models.comment import Comment
+from ...article.models.like import Like
+from ...article.models.views import View
 from ...extensions import db, ma
+from ...helpers.identity_map import evict, load
 from ..controller.helper import is_email_address_format_valid
 
 
@@ -12,15 +18,34 @@ class Author(db.Model):
     """The author class"""
 
     __tablename__ = "authors"
+    __table_args__ = (
+        db.Index(
+            "ix_authors_name_trgm",
+            db.text("lower(name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+    )
 
     id: int = db.Column(db.Integer, primary_key=True)
     name: str = db.Column(db.String(100), nullable=False)
     email_address: str = db.Column(db.Text, nullable=False, unique=True)
+    views_count: int = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    likes_count: int = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    comments_count: int = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    bookmarks_count: int = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
 
     @staticmethod
     def user_with_id_exists(user_id):
         """Check if user with given id exists."""
-        if Author.query.filter_by(id=user_id).first():
+        if load(Author, user_id):
             return True
         return False
 
@@ -72,7 +97,7 @@ class Author(db.Model):
         if not isinstance(email, str):
             raise ValueError("The user_email has to be an string")
 
-        user = Author.query.filter_by(id=id).first()
+        user = load(Author, id)
 
         if user.email_address == email:
             return True
@@ -85,17 +110,52 @@ class Author(db.Model):
     @staticmethod
     def delete_user(user_id: int):
         """Delete a user."""
-        user = Author.query.filter_by(id=user_id).first()
+        user = load(Author, user_id)
         db.session.delete(user)
         db.session.commit()
+        evict(Author, user_id)
         return user
 
     @staticmethod
     def get_user(user_id: int):
         """Get a user."""
-        user = Author.query.filter_by(id=user_id).first()
+        user = load(Author, user_id)
         return user
 
+    @staticmethod
+    def count_engagements(model):
+        """Build a subquery counting a user's rows in the given model."""
+        return (
+            select(func.count(model.id))
+            .where(model.author_id == Author.id)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def update_counter(user_id: int, counter: str, delta: int = 1):
+        """Add delta to one of the user's counters.
+
+        The increment is done by the database in the current
+        transaction, so concurrent updates are not lost.
+        """
+        column = getattr(Author, counter)
+        Author.query.filter_by(id=user_id).update(
+            {column: column + delta}, synchronize_session=False
+        )
+
+    @staticmethod
+    def recount_counters(first_id: int, last_id: int):
+        """Recompute the counters of the users with first_id <= id < last_id."""
+        Author.query.filter(Author.id >= first_id, Author.id < last_id).update(
+            {
+                Author.views_count: Author.count_engagements(View),
+                Author.likes_count: Author.count_engagements(Like),
+                Author.comments_count: Author.count_engagements(Comment),
+                Author.bookmarks_count: Author.count_engagements(Bookmark),
+            },
+            synchronize_session=False,
+        )
+
 
 class AuthorSchema(ma.Schema):
     """Show all the user information."""
@@ -107,6 +167,10 @@ class AuthorSchema(ma.Schema):
             "id",
             "name",
             "email_address",
+            "views_count",
+            "likes_count",
+            "comments_count",
+            "bookmarks_count",
         )
 
 
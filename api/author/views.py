@@ -11,6 +11,7 @@ from .controller.author import (
     handle_articles_published,
     handle_articles_viewed,
     handle_author_stats,
+    handle_author_timeseries,
     handle_create_author,
     handle_delete_author,
     handle_get_author,
@@ -136,3 +137,13 @@ def get_articles_read():
 def get_stats():
     """List author articles read."""
     return handle_author_stats(request.args.get("id"))
+
+
+@author.route("/timeseries", methods=["GET"])
+@jwt_required()
+@swag_from("./docs/timeseries.yml", endpoint="author.get_timeseries", methods=["GET"])
+def get_timeseries():
+    """List the daily stats of an author's articles."""
+    return handle_author_timeseries(
+        request.args.get("id"), request.args.get("from"), request.args.get("to")
+    )
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
+import tempfile
 from datetime import timedelta
 
 from dotenv import load_dotenv
@@ -33,6 +34,63 @@ class BaseConfig:
     TITLE_MAX_LENGTH = int(os.getenv("TITLE_MAX_LENGTH", "100"))
     TITLE_MIN_LENGTH = int(os.getenv("TITLE_MIN_LENGTH", "2"))
 
+    PAGE_SIZE = int(os.getenv("PAGE_SIZE", "20"))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+    MAX_STATS_BATCH = int(os.getenv("MAX_STATS_BATCH", "500"))
+
+    TIMESERIES_DEFAULT_DAYS = int(os.getenv("TIMESERIES_DEFAULT_DAYS", "90"))
+    TIMESERIES_MAX_DAYS = int(os.getenv("TIMESERIES_MAX_DAYS", "366"))
+    ROLLUP_LAG_SECONDS = int(os.getenv("ROLLUP_LAG_SECONDS", "60"))
+    ROLLUP_GAP_RETENTION_SECONDS = int(
+        os.getenv("ROLLUP_GAP_RETENTION_SECONDS", "86400")
+    )
+
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+
+    VIEW_FLUSH_SIZE = int(os.getenv("VIEW_FLUSH_SIZE", "500"))
+    VIEW_FLUSH_INTERVAL_SECONDS = float(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", "1"))
+    VIEW_BUFFER_MAX_SIZE = int(os.getenv("VIEW_BUFFER_MAX_SIZE", "50000"))
+
+    VARIANT_QUEUE_ENABLED = os.getenv("VARIANT_QUEUE_ENABLED", "true").lower() == "true"
+    VARIANT_QUEUE_MAX_SIZE = int(os.getenv("VARIANT_QUEUE_MAX_SIZE", "1000"))
+
+    MAX_TAG_FILTERS = int(os.getenv("MAX_TAG_FILTERS", "10"))
+    MAX_TAGS_PER_ARTICLE = int(os.getenv("MAX_TAGS_PER_ARTICLE", "20"))
+
+    SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+
+    AUTOCOMPLETE_MIN_PREFIX = int(os.getenv("AUTOCOMPLETE_MIN_PREFIX", "2"))
+    AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", "10"))
+    AUTOCOMPLETE_CACHE_SIZE = int(os.getenv("AUTOCOMPLETE_CACHE_SIZE", "1000"))
+    AUTOCOMPLETE_CACHE_TTL_SECONDS = float(
+        os.getenv("AUTOCOMPLETE_CACHE_TTL_SECONDS", "60")
+    )
+
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    # The number of gunicorn workers, which need CACHE_BACKEND=redis
+    # when there are more than one.
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_STALE_SECONDS = float(os.getenv("CACHE_STALE_SECONDS", "60"))
+    CACHE_LOCK_TIMEOUT_SECONDS = float(os.getenv("CACHE_LOCK_TIMEOUT_SECONDS", "5"))
+    CACHE_STATS_TTL_SECONDS = float(os.getenv("CACHE_STATS_TTL_SECONDS", "10"))
+
+    COMPRESSION_ALGORITHMS = os.getenv("COMPRESSION_ALGORITHMS", "br,zstd,gzip").split(
+        ","
+    )
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+    LOG_RESPONSE_BODIES = os.getenv("LOG_RESPONSE_BODIES", "false").lower() == "true"
+    LOG_FIELD_MAX_LENGTH = int(os.getenv("LOG_FIELD_MAX_LENGTH", "256"))
+    LOG_FIELD_MAX_ITEMS = int(os.getenv("LOG_FIELD_MAX_ITEMS", "20"))
+    LOG_BODY_MAX_BYTES = int(os.getenv("LOG_BODY_MAX_BYTES", "16384"))
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "").split(",")
+
     S3_BUCKET = os.environ["S3_BUCKET"]
     AWS_ACCESS_KEY = os.environ["AWS_ACCESS_KEY"]
     AWS_ACCESS_SECRET = os.environ["AWS_ACCESS_SECRET"]
@@ -44,6 +102,24 @@ class BaseConfig:
     UPLOAD_FOLDER = BASE_DIR
     ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
 
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+    STORAGE_PART_SIZE = int(os.getenv("STORAGE_PART_SIZE", str(8 * 1024 * 1024)))
+    STORAGE_LOCAL_FOLDER = os.getenv(
+        "STORAGE_LOCAL_FOLDER", os.path.join(tempfile.gettempdir(), "blog-images")
+    )
+    STORAGE_LOCAL_URL = os.getenv("STORAGE_LOCAL_URL", "/images/")
+    STORAGE_UPLOAD_MAX_SIZE = int(
+        os.getenv("STORAGE_UPLOAD_MAX_SIZE", str(10 * 1024 * 1024))
+    )
+    STORAGE_UPLOAD_EXPIRES_SECONDS = int(
+        os.getenv("STORAGE_UPLOAD_EXPIRES_SECONDS", "900")
+    )
+    # The age under which an image without a row is not swept, its row
+    # may not be committed yet.
+    STORAGE_ORPHAN_GRACE_SECONDS = int(
+        os.getenv("STORAGE_ORPHAN_GRACE_SECONDS", "3600")
+    )
+
     JWT_SECRET_KEY = "super-secret-key"
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(
         hours=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "24"))
@@ -76,6 +152,63 @@ class DevelopmentConfig(BaseConfig):
     TITLE_MAX_LENGTH = int(os.getenv("TITLE_MAX_LENGTH", "100"))
     TITLE_MIN_LENGTH = int(os.getenv("TITLE_MIN_LENGTH", "2"))
 
+    PAGE_SIZE = int(os.getenv("PAGE_SIZE", "20"))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+    MAX_STATS_BATCH = int(os.getenv("MAX_STATS_BATCH", "500"))
+
+    TIMESERIES_DEFAULT_DAYS = int(os.getenv("TIMESERIES_DEFAULT_DAYS", "90"))
+    TIMESERIES_MAX_DAYS = int(os.getenv("TIMESERIES_MAX_DAYS", "366"))
+    ROLLUP_LAG_SECONDS = int(os.getenv("ROLLUP_LAG_SECONDS", "60"))
+    ROLLUP_GAP_RETENTION_SECONDS = int(
+        os.getenv("ROLLUP_GAP_RETENTION_SECONDS", "86400")
+    )
+
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+
+    VIEW_FLUSH_SIZE = int(os.getenv("VIEW_FLUSH_SIZE", "500"))
+    VIEW_FLUSH_INTERVAL_SECONDS = float(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", "1"))
+    VIEW_BUFFER_MAX_SIZE = int(os.getenv("VIEW_BUFFER_MAX_SIZE", "50000"))
+
+    VARIANT_QUEUE_ENABLED = os.getenv("VARIANT_QUEUE_ENABLED", "true").lower() == "true"
+    VARIANT_QUEUE_MAX_SIZE = int(os.getenv("VARIANT_QUEUE_MAX_SIZE", "1000"))
+
+    MAX_TAG_FILTERS = int(os.getenv("MAX_TAG_FILTERS", "10"))
+    MAX_TAGS_PER_ARTICLE = int(os.getenv("MAX_TAGS_PER_ARTICLE", "20"))
+
+    SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+
+    AUTOCOMPLETE_MIN_PREFIX = int(os.getenv("AUTOCOMPLETE_MIN_PREFIX", "2"))
+    AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", "10"))
+    AUTOCOMPLETE_CACHE_SIZE = int(os.getenv("AUTOCOMPLETE_CACHE_SIZE", "1000"))
+    AUTOCOMPLETE_CACHE_TTL_SECONDS = float(
+        os.getenv("AUTOCOMPLETE_CACHE_TTL_SECONDS", "60")
+    )
+
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    # The number of gunicorn workers, which need CACHE_BACKEND=redis
+    # when there are more than one.
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_STALE_SECONDS = float(os.getenv("CACHE_STALE_SECONDS", "60"))
+    CACHE_LOCK_TIMEOUT_SECONDS = float(os.getenv("CACHE_LOCK_TIMEOUT_SECONDS", "5"))
+    CACHE_STATS_TTL_SECONDS = float(os.getenv("CACHE_STATS_TTL_SECONDS", "10"))
+
+    COMPRESSION_ALGORITHMS = os.getenv("COMPRESSION_ALGORITHMS", "br,zstd,gzip").split(
+        ","
+    )
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+    LOG_RESPONSE_BODIES = os.getenv("LOG_RESPONSE_BODIES", "false").lower() == "true"
+    LOG_FIELD_MAX_LENGTH = int(os.getenv("LOG_FIELD_MAX_LENGTH", "256"))
+    LOG_FIELD_MAX_ITEMS = int(os.getenv("LOG_FIELD_MAX_ITEMS", "20"))
+    LOG_BODY_MAX_BYTES = int(os.getenv("LOG_BODY_MAX_BYTES", "16384"))
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "").split(",")
+
     S3_BUCKET = os.environ["S3_BUCKET"]
     AWS_ACCESS_KEY = os.environ["AWS_ACCESS_KEY"]
     AWS_ACCESS_SECRET = os.environ["AWS_ACCESS_SECRET"]
@@ -87,6 +220,24 @@ class DevelopmentConfig(BaseConfig):
     UPLOAD_FOLDER = BASE_DIR
     ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
 
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+    STORAGE_PART_SIZE = int(os.getenv("STORAGE_PART_SIZE", str(8 * 1024 * 1024)))
+    STORAGE_LOCAL_FOLDER = os.getenv(
+        "STORAGE_LOCAL_FOLDER", os.path.join(tempfile.gettempdir(), "blog-images")
+    )
+    STORAGE_LOCAL_URL = os.getenv("STORAGE_LOCAL_URL", "/images/")
+    STORAGE_UPLOAD_MAX_SIZE = int(
+        os.getenv("STORAGE_UPLOAD_MAX_SIZE", str(10 * 1024 * 1024))
+    )
+    STORAGE_UPLOAD_EXPIRES_SECONDS = int(
+        os.getenv("STORAGE_UPLOAD_EXPIRES_SECONDS", "900")
+    )
+    # The age under which an image without a row is not swept, its row
+    # may not be committed yet.
+    STORAGE_ORPHAN_GRACE_SECONDS = int(
+        os.getenv("STORAGE_ORPHAN_GRACE_SECONDS", "3600")
+    )
+
     JWT_SECRET_KEY = "super-secret-key"
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(
         hours=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "24"))
@@ -120,6 +271,66 @@ class TestingConfig(BaseConfig):
     TITLE_MAX_LENGTH = int(os.getenv("TITLE_MAX_LENGTH", "100"))
     TITLE_MIN_LENGTH = int(os.getenv("TITLE_MIN_LENGTH", "2"))
 
+    PAGE_SIZE = int(os.getenv("PAGE_SIZE", "20"))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+    MAX_STATS_BATCH = int(os.getenv("MAX_STATS_BATCH", "500"))
+
+    TIMESERIES_DEFAULT_DAYS = int(os.getenv("TIMESERIES_DEFAULT_DAYS", "90"))
+    TIMESERIES_MAX_DAYS = int(os.getenv("TIMESERIES_MAX_DAYS", "366"))
+    ROLLUP_LAG_SECONDS = int(os.getenv("ROLLUP_LAG_SECONDS", "60"))
+    ROLLUP_GAP_RETENTION_SECONDS = int(
+        os.getenv("ROLLUP_GAP_RETENTION_SECONDS", "86400")
+    )
+
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+
+    VIEW_FLUSH_SIZE = int(os.getenv("VIEW_FLUSH_SIZE", "500"))
+    VIEW_FLUSH_INTERVAL_SECONDS = float(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", "1"))
+    VIEW_BUFFER_MAX_SIZE = int(os.getenv("VIEW_BUFFER_MAX_SIZE", "50000"))
+
+    # The tests make the copies themselves, without a thread.
+    VARIANT_QUEUE_ENABLED = (
+        os.getenv("VARIANT_QUEUE_ENABLED", "false").lower() == "true"
+    )
+    VARIANT_QUEUE_MAX_SIZE = int(os.getenv("VARIANT_QUEUE_MAX_SIZE", "1000"))
+
+    MAX_TAG_FILTERS = int(os.getenv("MAX_TAG_FILTERS", "10"))
+    MAX_TAGS_PER_ARTICLE = int(os.getenv("MAX_TAGS_PER_ARTICLE", "20"))
+
+    SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+
+    AUTOCOMPLETE_MIN_PREFIX = int(os.getenv("AUTOCOMPLETE_MIN_PREFIX", "2"))
+    AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", "10"))
+    AUTOCOMPLETE_CACHE_SIZE = int(os.getenv("AUTOCOMPLETE_CACHE_SIZE", "1000"))
+    AUTOCOMPLETE_CACHE_TTL_SECONDS = float(
+        os.getenv("AUTOCOMPLETE_CACHE_TTL_SECONDS", "60")
+    )
+
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    # The number of gunicorn workers, which need CACHE_BACKEND=redis
+    # when there are more than one.
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_STALE_SECONDS = float(os.getenv("CACHE_STALE_SECONDS", "60"))
+    CACHE_LOCK_TIMEOUT_SECONDS = float(os.getenv("CACHE_LOCK_TIMEOUT_SECONDS", "5"))
+    CACHE_STATS_TTL_SECONDS = float(os.getenv("CACHE_STATS_TTL_SECONDS", "10"))
+
+    COMPRESSION_ALGORITHMS = os.getenv("COMPRESSION_ALGORITHMS", "br,zstd,gzip").split(
+        ","
+    )
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+    LOG_RESPONSE_BODIES = os.getenv("LOG_RESPONSE_BODIES", "false").lower() == "true"
+    LOG_FIELD_MAX_LENGTH = int(os.getenv("LOG_FIELD_MAX_LENGTH", "256"))
+    LOG_FIELD_MAX_ITEMS = int(os.getenv("LOG_FIELD_MAX_ITEMS", "20"))
+    LOG_BODY_MAX_BYTES = int(os.getenv("LOG_BODY_MAX_BYTES", "16384"))
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "").split(",")
+
     S3_BUCKET = os.environ["S3_BUCKET"]
     AWS_ACCESS_KEY = os.environ["AWS_ACCESS_KEY"]
     AWS_ACCESS_SECRET = os.environ["AWS_ACCESS_SECRET"]
@@ -131,6 +342,24 @@ class TestingConfig(BaseConfig):
     UPLOAD_FOLDER = BASE_DIR
     ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
 
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+    STORAGE_PART_SIZE = int(os.getenv("STORAGE_PART_SIZE", str(8 * 1024 * 1024)))
+    STORAGE_LOCAL_FOLDER = os.getenv(
+        "STORAGE_LOCAL_FOLDER", os.path.join(tempfile.gettempdir(), "blog-images")
+    )
+    STORAGE_LOCAL_URL = os.getenv("STORAGE_LOCAL_URL", "/images/")
+    STORAGE_UPLOAD_MAX_SIZE = int(
+        os.getenv("STORAGE_UPLOAD_MAX_SIZE", str(10 * 1024 * 1024))
+    )
+    STORAGE_UPLOAD_EXPIRES_SECONDS = int(
+        os.getenv("STORAGE_UPLOAD_EXPIRES_SECONDS", "900")
+    )
+    # The age under which an image without a row is not swept, its row
+    # may not be committed yet.
+    STORAGE_ORPHAN_GRACE_SECONDS = int(
+        os.getenv("STORAGE_ORPHAN_GRACE_SECONDS", "3600")
+    )
+
     JWT_SECRET_KEY = "super-secret-key"
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(
         hours=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "24"))
@@ -164,6 +393,63 @@ class ProductionConfig(BaseConfig):
     TITLE_MAX_LENGTH = int(os.getenv("TITLE_MAX_LENGTH", "100"))
     TITLE_MIN_LENGTH = int(os.getenv("TITLE_MIN_LENGTH", "2"))
 
+    PAGE_SIZE = int(os.getenv("PAGE_SIZE", "20"))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+    MAX_STATS_BATCH = int(os.getenv("MAX_STATS_BATCH", "500"))
+
+    TIMESERIES_DEFAULT_DAYS = int(os.getenv("TIMESERIES_DEFAULT_DAYS", "90"))
+    TIMESERIES_MAX_DAYS = int(os.getenv("TIMESERIES_MAX_DAYS", "366"))
+    ROLLUP_LAG_SECONDS = int(os.getenv("ROLLUP_LAG_SECONDS", "60"))
+    ROLLUP_GAP_RETENTION_SECONDS = int(
+        os.getenv("ROLLUP_GAP_RETENTION_SECONDS", "86400")
+    )
+
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+
+    VIEW_FLUSH_SIZE = int(os.getenv("VIEW_FLUSH_SIZE", "500"))
+    VIEW_FLUSH_INTERVAL_SECONDS = float(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", "1"))
+    VIEW_BUFFER_MAX_SIZE = int(os.getenv("VIEW_BUFFER_MAX_SIZE", "50000"))
+
+    VARIANT_QUEUE_ENABLED = os.getenv("VARIANT_QUEUE_ENABLED", "true").lower() == "true"
+    VARIANT_QUEUE_MAX_SIZE = int(os.getenv("VARIANT_QUEUE_MAX_SIZE", "1000"))
+
+    MAX_TAG_FILTERS = int(os.getenv("MAX_TAG_FILTERS", "10"))
+    MAX_TAGS_PER_ARTICLE = int(os.getenv("MAX_TAGS_PER_ARTICLE", "20"))
+
+    SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+
+    AUTOCOMPLETE_MIN_PREFIX = int(os.getenv("AUTOCOMPLETE_MIN_PREFIX", "2"))
+    AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", "10"))
+    AUTOCOMPLETE_CACHE_SIZE = int(os.getenv("AUTOCOMPLETE_CACHE_SIZE", "1000"))
+    AUTOCOMPLETE_CACHE_TTL_SECONDS = float(
+        os.getenv("AUTOCOMPLETE_CACHE_TTL_SECONDS", "60")
+    )
+
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    # The number of gunicorn workers, which need CACHE_BACKEND=redis
+    # when there are more than one.
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_STALE_SECONDS = float(os.getenv("CACHE_STALE_SECONDS", "60"))
+    CACHE_LOCK_TIMEOUT_SECONDS = float(os.getenv("CACHE_LOCK_TIMEOUT_SECONDS", "5"))
+    CACHE_STATS_TTL_SECONDS = float(os.getenv("CACHE_STATS_TTL_SECONDS", "10"))
+
+    COMPRESSION_ALGORITHMS = os.getenv("COMPRESSION_ALGORITHMS", "br,zstd,gzip").split(
+        ","
+    )
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+    LOG_RESPONSE_BODIES = os.getenv("LOG_RESPONSE_BODIES", "false").lower() == "true"
+    LOG_FIELD_MAX_LENGTH = int(os.getenv("LOG_FIELD_MAX_LENGTH", "256"))
+    LOG_FIELD_MAX_ITEMS = int(os.getenv("LOG_FIELD_MAX_ITEMS", "20"))
+    LOG_BODY_MAX_BYTES = int(os.getenv("LOG_BODY_MAX_BYTES", "16384"))
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "").split(",")
+
     S3_BUCKET = os.environ["S3_BUCKET"]
     AWS_ACCESS_KEY = os.environ["AWS_ACCESS_KEY"]
     AWS_ACCESS_SECRET = os.environ["AWS_ACCESS_SECRET"]
@@ -175,6 +461,24 @@ class ProductionConfig(BaseConfig):
     UPLOAD_FOLDER = BASE_DIR
     ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
 
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+    STORAGE_PART_SIZE = int(os.getenv("STORAGE_PART_SIZE", str(8 * 1024 * 1024)))
+    STORAGE_LOCAL_FOLDER = os.getenv(
+        "STORAGE_LOCAL_FOLDER", os.path.join(tempfile.gettempdir(), "blog-images")
+    )
+    STORAGE_LOCAL_URL = os.getenv("STORAGE_LOCAL_URL", "/images/")
+    STORAGE_UPLOAD_MAX_SIZE = int(
+        os.getenv("STORAGE_UPLOAD_MAX_SIZE", str(10 * 1024 * 1024))
+    )
+    STORAGE_UPLOAD_EXPIRES_SECONDS = int(
+        os.getenv("STORAGE_UPLOAD_EXPIRES_SECONDS", "900")
+    )
+    # The age under which an image without a row is not swept, its row
+    # may not be committed yet.
+    STORAGE_ORPHAN_GRACE_SECONDS = int(
+        os.getenv("STORAGE_ORPHAN_GRACE_SECONDS", "3600")
+    )
+
     JWT_SECRET_KEY = "super-secret-key"
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(
         hours=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "24"))
@@ -1,10 +1,136 @@
 # -*- coding: utf-8 -*-
+"""This module configures the application logger.
+
+The records are formatted as json by the handlers configured below,
+which run in a listener thread: the request threads only put the
+records in a queue of LOG_QUEUE_SIZE records. When the queue is
+full, LOG_DROP_POLICY tells whether the new record or the oldest
+queued one is dropped, though errors always make room by dropping
+the oldest one.
+"""
+import atexit
 import logging.config
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_DROP_POLICY = os.getenv("LOG_DROP_POLICY", "newest")
+
+
+class BlockingQueueListener(QueueListener):
+    """A queue listener which waits for room to stop."""
+
+    def enqueue_sentinel(self):
+        """Wait for room in the bounded queue to ask the thread to stop."""
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Hand the records to the handlers through a bounded queue.
+
+    The listener thread is started by the first record of each
+    process, so the workers forked by the server have their own.
+
+    Parameters
+    ----------
+    handlers: list
+        The handlers emitting the records in the listener thread.
+    maxsize: int
+        The number of records the queue holds.
+    drop_policy: str
+        Either 'newest', to drop the records logged while the queue
+        is full, or 'oldest', to drop the oldest queued records.
+
+    Attributes
+    ----------
+    dropped: int
+        The number of records dropped because the queue was full.
+    """
+
+    def __init__(self, handlers: list, maxsize: int, drop_policy: str = "newest"):
+        if drop_policy not in {"newest", "oldest"}:
+            raise ValueError("The drop policy has to be either newest or oldest")
+        super().__init__(queue.Queue(maxsize))
+        self.targets = handlers
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self.listener = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the listener thread of this process."""
+        with self.start_lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.maxsize)
+            self.listener = BlockingQueueListener(
+                self.queue, *self.targets, respect_handler_level=True
+            )
+            self.listener.start()
+            if self.pid is None:
+                atexit.register(self.stop)
+            self.pid = os.getpid()
+
+    def stop(self) -> None:
+        """Emit the queued records and stop the listener thread."""
+        if self.listener and self.pid == os.getpid():
+            self.listener.stop()
+            self.pid = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Render the message now, as its arguments may change later.
+
+        The exception info is kept for the handlers to format, since
+        the records do not leave the process.
+        """
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record, dropping one if the queue is full."""
+        if self.pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if self.drop_policy == "newest" and record.levelno < logging.ERROR:
+            self.dropped += 1
+            return
+        try:
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.queue.put_nowait(record)
+        except (queue.Empty, queue.Full):
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        """Get the depth of the queue and the number of dropped records."""
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.maxsize,
+            "drop policy": self.drop_policy,
+            "dropped": self.dropped,
+        }
+
+
+def queue_root_handlers() -> BoundedQueueHandler:
+    """Move the root logger's handlers behind a bounded queue."""
+    root = logging.getLogger()
+    handler = BoundedQueueHandler(root.handlers, LOG_QUEUE_SIZE, LOG_DROP_POLICY)
+    root.handlers = [handler]
+    return handler
+
 
 def create_dev_logger():
     """Create the application logger."""
@@ -78,3 +204,4 @@ def create_logger(env="development"):
 
 
 app_logger = create_logger()
+log_queue = queue_root_handlers()
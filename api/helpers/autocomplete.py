@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""This module declares the as-you-type suggestions.
+
+Article titles, tags and author names are matched on a case
+insensitive prefix. The LIKE queries are served by pg_trgm GIN
+indexes on the lowercased columns, and the suggestions are ordered
+by popularity. The suggestions for the most requested prefixes are
+kept in memory for AUTOCOMPLETE_CACHE_TTL_SECONDS.
+
+Has the following classes:
+1. PrefixCache:
+    Keeps the suggestions of the most requested prefixes.
+
+Has the following functions:
+1. like_prefix():
+    Builds a LIKE pattern matching the strings with a prefix.
+2. suggest():
+    Gets the suggestions for a prefix from the database.
+3. autocomplete():
+    Validates the request and gets the suggestions, from the
+    cache when possible.
+4. handle_autocomplete():
+    Handles the GET request for suggestions.
+"""
+import threading
+import time
+from collections import Counter
+from typing import Tuple
+
+from flask import current_app, jsonify
+
+from ..article.models.article import Article
+from ..article.models.tag import Tag
+from ..author.models.author import Author
+from ..extensions import db
+from .http_status_codes import HTTP_200_OK, HTTP_400_BAD_REQUEST
+
+KINDS = ("title", "tag", "author")
+
+
+class PrefixCache:
+    """Keep the suggestions of the most requested prefixes.
+
+    Every lookup is counted, and the suggestions of a prefix are
+    only kept if it is among the most requested ones. Once the
+    cache is full, a prefix replaces the least requested cached
+    one when it has been requested more often. The counts are
+    halved periodically so that prefixes that are no longer
+    popular age out.
+
+    Attributes
+    ----------
+    hits: int
+        The number of lookups served from the cache.
+    misses: int
+        The number of lookups that had to query the database.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple):
+        """Count a lookup and get the cached suggestions of a prefix.
+
+        Returns
+        -------
+        list:
+            The suggestions, or None if they are not cached or
+            have expired.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.counts[key] += 1
+            if len(self.counts) > 10 * current_app.config["AUTOCOMPLETE_CACHE_SIZE"]:
+                self.decay()
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, suggestions: list) -> None:
+        """Cache the suggestions of a prefix if it is popular enough."""
+        expires = (
+            time.monotonic() + current_app.config["AUTOCOMPLETE_CACHE_TTL_SECONDS"]
+        )
+        with self.lock:
+            if len(self.entries) >= current_app.config["AUTOCOMPLETE_CACHE_SIZE"]:
+                coldest = min(self.entries, key=self.counts.__getitem__)
+                if self.counts[coldest] >= self.counts[key]:
+                    return
+                del self.entries[coldest]
+            self.entries[key] = (expires, suggestions)
+
+    def decay(self) -> None:
+        """Halve the counts and forget the prefixes left at zero."""
+        for key, count in list(self.counts.items()):
+            if count // 2 or key in self.entries:
+                self.counts[key] = max(count // 2, 1)
+            else:
+                del self.counts[key]
+
+    def clear(self) -> None:
+        """Drop all the cached suggestions and counts."""
+        with self.lock:
+            self.counts.clear()
+            self.entries.clear()
+
+
+prefix_cache = PrefixCache()
+
+
+def like_prefix(prefix: str) -> str:
+    """Build a LIKE pattern matching the strings starting with prefix.
+
+    The LIKE wildcards in the prefix are escaped.
+    """
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped.lower()}%"
+
+
+def suggest(kind: str, prefix: str, limit: int) -> list:
+    """Get the suggestions for a prefix from the database.
+
+    Parameters
+    ----------
+    kind: str
+        One of title, tag or author.
+    prefix: str
+        The text typed so far.
+    limit: int
+        The maximum number of suggestions.
+
+    Returns
+    -------
+    list:
+        The suggestions, most popular first.
+    """
+    pattern = like_prefix(prefix)
+    if kind == "title":
+        query = db.session.query(Article.id, Article.title.label("text")).order_by(
+            Article.views_count.desc(), Article.id.desc()
+        )
+        column = Article.title
+    elif kind == "tag":
+        query = db.session.query(Tag.name.label("text")).order_by(
+            Tag.articles_count.desc(), Tag.name
+        )
+        column = Tag.name
+    else:
+        query = db.session.query(Author.id, Author.name.label("text")).order_by(
+            Author.views_count.desc(), Author.id.desc()
+        )
+        column = Author.name
+    rows = query.filter(db.func.lower(column).like(pattern)).limit(limit)
+    return [row._asdict() for row in rows]
+
+
+def autocomplete(prefix: str, kind: str) -> list:
+    """Get the suggestions for a prefix.
+
+    Parameters
+    ----------
+    prefix: str
+        The text typed so far.
+    kind: str
+        One of title, tag or author.
+
+    Raises
+    ------
+    ValueError:
+        When the prefix is too short or the kind is not valid.
+    TypeError:
+        When the prefix or kind is not a string.
+
+    Returns
+    -------
+    list:
+        The suggestions, most popular first.
+    """
+    if not isinstance(prefix, str) or not isinstance(kind, str):
+        raise TypeError("The prefix and kind have to be strings")
+    if kind not in KINDS:
+        raise ValueError(f"The kind has to be one of {', '.join(KINDS)}")
+    prefix = prefix.strip()
+    if len(prefix) < current_app.config["AUTOCOMPLETE_MIN_PREFIX"]:
+        raise ValueError(
+            f'The prefix has to be at least {current_app.config["AUTOCOMPLETE_MIN_PREFIX"]} characters'
+        )
+    key = (kind, prefix.lower())
+    suggestions = prefix_cache.get(key)
+    if suggestions is None:
+        suggestions = suggest(kind, prefix, current_app.config["AUTOCOMPLETE_LIMIT"])
+        prefix_cache.put(key, suggestions)
+    return suggestions
+
+
+def handle_autocomplete(prefix: str, kind: str) -> Tuple[str, int]:
+    """Handle the GET request for suggestions.
+
+    Parameters
+    ----------
+    prefix: str
+        The text typed so far.
+    kind: str
+        One of title, tag or author.
+
+    Returns
+    -------
+    Tuple[str, int]:
+        The json string representing the request
+        response as well as the response code.
+    """
+    try:
+        suggestions = autocomplete(prefix, kind)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
+    else:
+        return jsonify({"suggestions": suggestions}), HTTP_200_OK
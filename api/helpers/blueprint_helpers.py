@@ -5,35 +5,44 @@ Has the following functions:
 1. allowed_file():
     Checks if the given file can be uploaded to the server
     based on the file's extension.
-2. send_notification():
-    Sends the filename and whether is is to be created or
-    deleted to an sns queue.
-3. upload_image():
-    Saves the uploaded image to the server and sends a notification
-    to the sns queue.
-4. save_image():
-    Saves an image locally.
-5. handle_upload_image():
+2. upload_image():
+    Stores the uploaded image under the digest of its content,
+    unless it is already stored.
+3. handle_upload_image():
     Handles the GET request to fetch an image stored locally.
-6. validate_article_data():
+4. validate_article_data():
     Checks the article data to ensure that all the required
     fields are present.
-7. delete_image():
+5. delete_image():
     Deletes an image stored locally.
-8. handle_delete_image()
+6. handle_delete_image()
     Handles the DELETE request to delete an image stored
     locally.
+7. handle_receive_image()
+    Handles the POST request uploading an image to the local
+    storage with a signed form.
+8. adopt_image()
+    Moves an image uploaded by a client under the digest of its
+    content, unless it is already stored.
+9. reference_image()
+    Takes a reference to an image, storing it first unless it is
+    already stored.
 """
-import json
+import mimetypes
 import os
-from typing import Tuple
+from typing import Callable, Tuple
 
 from flask import current_app, jsonify
 from werkzeug.datastructures import FileStorage
-from werkzeug.utils import secure_filename
 
-from ..extensions.extensions import sqs_client
-from ..helpers.http_status_codes import HTTP_200_OK
+from ..article.models.image import Image
+from ..helpers.http_status_codes import (
+    HTTP_200_OK,
+    HTTP_204_NO_CONTENT,
+    HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+)
+from .storage import CONTENT_TYPES, content_digest, storage
 
 
 def allowed_file(filename: str) -> bool:
@@ -66,40 +75,13 @@ def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in allowed_extensions
 
 
-def save_image(file: FileStorage) -> bool:
-    """Save a file in the server.
-
-    Parameters
-    ----------
-    file: werkzeug.FileStorage
-        The uploaded file and its metadata.
-
-    Raises
-    ------
-    Exception:
-        When the image cannot be saved
-
-    return
-    ------
-    bool:
-        Whether or not file was successfully stored.
-    """
-    try:
-        filename = secure_filename(file.filename)
-        file.save(os.path.join(current_app.config["UPLOAD_FOLDER"], filename))
-    except Exception as e:
-        raise e
-    else:
-        return True
-
-
 def upload_image(file: FileStorage) -> str:
-    """Trigger the upload of image to s3.
+    """Store an uploaded image.
 
     Parameters
     ----------
     file: FileStorage
-        The file to be uploaded to s3
+        The file to be stored
 
     Raises
     ------
@@ -111,7 +93,8 @@ def upload_image(file: FileStorage) -> str:
     Returns
     -------
     str:
-        The link to the uploaded image
+        The link to the uploaded image, which may have been stored
+        by an earlier upload
     """
     if not file:
         raise ValueError("The file has to be provided!")
@@ -119,14 +102,57 @@ def upload_image(file: FileStorage) -> str:
         raise ValueError("The file has to be provided!")
     if not allowed_file(file.filename):
         raise TypeError("That file type is not allowed!")
-    try:
-        save_image(file)
-    except (ValueError, TypeError) as e:
-        raise e
-    if send_notification(file.filename, "create"):
-        profile_pic = f"{current_app.config['S3_LOCATION']}{file.filename}"
-        return profile_pic
-    return ""
+    # Hashed while the form was parsed, see DigestRequest.
+    digest, size = content_digest(file.stream)
+    key = f'{digest}.{file.filename.rsplit(".", 1)[1].lower()}'
+    content_type = mimetypes.guess_type(key)[0] or file.mimetype
+    return reference_image(
+        digest, key, content_type, size, lambda: storage.save(file, key, content_type)
+    )
+
+
+def reference_image(
+    digest: str, key: str, content_type: str, size: int, store: Callable[[], str]
+) -> str:
+    """Take a reference to an image, storing it first unless it is
+    already stored.
+
+    The image is stored before its row is locked, under a key which
+    only depends on its content, so the concurrent uploads of an image
+    do not wait for each other. An image whose row was collected in
+    between is stored again.
+
+    Parameters
+    ----------
+    digest: str
+        The SHA-256 digest of the image.
+    key: str
+        The key the image is stored under.
+    content_type: str
+        The type of the image.
+    size: int
+        The number of bytes of the image.
+    store: Callable
+        Stores the image, returning its url or an empty string when
+        it fails.
+
+    Raises
+    ------
+    ValueError:
+        When the image cannot be stored.
+
+    Returns
+    -------
+    str:
+        The link to the image.
+    """
+    stored = Image.stored_url(digest) is not None
+    if not stored and not store():
+        raise ValueError("The image could not be stored.")
+    url, new = Image.acquire(digest, storage.url(key), content_type, size)
+    if new and stored and not store():
+        raise ValueError("The image could not be stored.")
+    return url
 
 
 def handle_upload_image(file: FileStorage) -> str:
@@ -185,6 +211,7 @@ def validate_article_data(article_data: dict) -> None:
     valid_keys = [
         "Title",
         "Text",
+        "Image key",
     ]
     for key in article_data.keys():
         if key not in valid_keys:
@@ -241,27 +268,67 @@ def handle_delete_image(filename: str) -> Tuple[str, int]:
         return delete
 
 
-def send_notification(filename: str, action: str) -> bool:
-    """Send notification to sqs.
+def handle_receive_image(key: str, fields: dict, file: FileStorage) -> Tuple[str, int]:
+    """Handle the POST request uploading an image to the local storage.
 
     Parameters
     ----------
-    filename: str
-        The name of the file
-    action: str
-        What action to take i.e create or delete
-        create results in lambda function uploading the file
-        wheres delete results in deletion of file from s3.
+    key: str
+        The key the upload url was signed for.
+    fields: dict
+        The signed fields returned along with the upload url.
+    file: FileStorage
+        The uploaded image.
+
     Returns
     -------
-    bool:
-        True if notification was sent else False.
+    tuple: Flask.Response
+        An empty response, as S3 answers the presigned posts, or the
+        error.
+    """
+    try:
+        storage.backend.receive(key, fields, file)
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), HTTP_403_FORBIDDEN
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
+    else:
+        return "", HTTP_204_NO_CONTENT
+
+
+def adopt_image(key: str) -> str:
+    """Move an image uploaded by a client under the digest of its content.
+
+    The image is checked, and its digest read from the checksum it was
+    posted with. It is copied under its digest within the storage
+    unless it is already stored, and the uploaded copy is deleted
+    either way, so its bytes never go through the app.
+
+    Parameters
+    ----------
+    key: str
+        The key the upload url was signed for.
+
+    Raises
+    ------
+    ValueError:
+        When the image was not uploaded, is too large or its content
+        does not match its type.
+
+    Returns
+    -------
+    str:
+        The link to the image, which may have been stored by an
+        earlier upload
     """
-    queue_url = os.environ["QUEUE_URL"]
-    message = {action: filename}
-    response = sqs_client.send_message(
-        QueueUrl=queue_url, MessageBody=json.dumps(message)
+    uploaded, digest, size = storage.verify(key)
+    extension = key.rsplit(".", 1)[1]
+    url = reference_image(
+        digest,
+        f"{digest}.{extension}",
+        CONTENT_TYPES[extension],
+        size,
+        lambda: storage.copy(uploaded, f"{digest}.{extension}"),
     )
-    if response["ResponseMetadata"]["HTTPStatusCode"] == 200:
-        return True
-    return False
+    storage.delete(uploaded)
+    return url
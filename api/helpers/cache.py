@@ -0,0 +1,499 @@
+# -*- coding: utf-8 -*-
+"""This module declares the read-through cache of article reads.
+
+The cache stores json serializable values under string keys. The
+backend is chosen with CACHE_BACKEND:
+- memory: an LRU held by each worker, the default. A change is
+  only seen by the worker which made it, so it is refused when
+  WEB_CONCURRENCY runs more than one worker.
+- redis: a server speaking the Redis protocol at CACHE_REDIS_URL,
+  shared by all the workers.
+Entries are fresh for CACHE_TTL_SECONDS. Each key is stored under a
+version, which the handlers changing what it holds replace, so the
+entries stored before, including those written by loads that started
+before the change, are never read again. An expired entry is still
+served for CACHE_STALE_SECONDS while it is reloaded in the
+background. A missing entry is loaded by a single request at a
+time: the other requests for the same key wait for it, within the
+worker through an event and across the workers through a lock held
+in the backend.
+
+Has the following classes:
+1. MemoryBackend:
+    An in-process LRU with a TTL.
+2. RedisBackend:
+    Stores the entries in a Redis protocol server.
+3. ReadThroughCache:
+    Loads the values missing from the backend and counts the
+    hits and misses.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from ..config.logger import app_logger
+
+
+class MemoryBackend:
+    """An in-process LRU with a TTL.
+
+    The workers do not share the entries, so the loads are only
+    coalesced within a worker and the lock is always granted.
+
+    Attributes
+    ----------
+    evictions: int
+        The number of entries dropped to make room for new ones.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        """Get an entry, or None if it is missing or has expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, ttl: float) -> None:
+        """Store an entry for ttl seconds, evicting the least recently
+        used if full."""
+        with self.lock:
+            self.store(key, value, ttl)
+
+    def store(self, key: str, value, ttl: float) -> None:
+        """Store an entry while holding the lock."""
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def add(self, key: str, value, ttl: float) -> bool:
+        """Store an entry for ttl seconds unless there is one."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return False
+            self.store(key, value, ttl)
+        return True
+
+    def delete(self, key: str) -> None:
+        """Delete an entry."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Delete all the entries."""
+        with self.lock:
+            self.entries.clear()
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        """Take the lock on a key, always granted within a worker."""
+        return key
+
+    def release(self, key: str, token: str) -> None:
+        """Release the lock on a key."""
+
+
+class RedisBackend:
+    """Store the entries in a Redis protocol server.
+
+    The entries are serialized to json and expire on the server.
+    Evictions are made by the server under memory pressure, so its
+    evicted_keys statistic is reported. The locks are keys set only
+    if they do not exist, which expire in case their holder dies.
+
+    Parameters
+    ----------
+    client:
+        A redis.Redis client, or any object with the same get, set,
+        delete, eval, info and scan_iter methods.
+    namespace: str
+        Prepended to the keys so the cache can share a server.
+    """
+
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, client, namespace: str = "blog:"):
+        self.client = client
+        self.namespace = namespace
+
+    @classmethod
+    def from_url(cls, url: str):
+        """Connect to the server at url."""
+        import redis
+
+        return cls(redis.Redis.from_url(url, socket_timeout=0.5))
+
+    @property
+    def evictions(self) -> int:
+        """The number of keys the server evicted."""
+        return int(self.client.info("stats").get("evicted_keys", 0))
+
+    def get(self, key: str):
+        """Get an entry, or None if it is missing or has expired."""
+        value = self.client.get(self.namespace + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value, ttl: float) -> None:
+        """Store an entry for ttl seconds."""
+        self.client.set(
+            self.namespace + key,
+            json.dumps(value, default=str),
+            px=int(ttl * 1000),
+        )
+
+    def add(self, key: str, value, ttl: float) -> bool:
+        """Store an entry for ttl seconds unless there is one."""
+        return bool(
+            self.client.set(
+                self.namespace + key,
+                json.dumps(value, default=str),
+                px=int(ttl * 1000),
+                nx=True,
+            )
+        )
+
+    def delete(self, key: str) -> None:
+        """Delete an entry."""
+        self.client.delete(self.namespace + key)
+
+    def clear(self) -> None:
+        """Delete all the entries in the namespace."""
+        for key in self.client.scan_iter(f"{self.namespace}*"):
+            self.client.delete(key)
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        """Take the lock on a key for at most ttl seconds.
+
+        Returns
+        -------
+        str:
+            The token to release the lock with, or None if another
+            worker holds it.
+        """
+        token = uuid.uuid4().hex
+        if self.client.set(
+            f"{self.namespace}lock:{key}", token, nx=True, px=int(ttl * 1000)
+        ):
+            return token
+        return None
+
+    def release(self, key: str, token: str) -> None:
+        """Release the lock on a key if it is still held with token."""
+        self.client.eval(self.RELEASE_SCRIPT, 1, f"{self.namespace}lock:{key}", token)
+
+
+class ReadThroughCache:
+    """Load the values missing from the backend and count the lookups.
+
+    The cache is never allowed to fail a request: when the backend
+    is unreachable the value is loaded from the database instead.
+    The values are stored with the time until which they are fresh,
+    and kept by the backend CACHE_STALE_SECONDS longer.
+
+    The values are stored under the current version of their key. A
+    lost version is replaced with a new one, which only costs a miss.
+
+    Attributes
+    ----------
+    hits: int
+        The number of lookups served a fresh value by the backend.
+    stale_hits: int
+        The number of lookups served an expired value while it was
+        reloaded.
+    misses: int
+        The number of lookups that found no value.
+    coalesced: int
+        The number of misses served the value loaded by another
+        request instead of loading it.
+    refreshes: int
+        The number of expired values reloaded in the background.
+    errors: int
+        The number of backend operations that failed.
+    """
+
+    # How long the versions are kept, much longer than the entries.
+    VERSION_TTL_SECONDS = 86400
+
+    def __init__(self):
+        self.app = None
+        self.backend = None
+        self.flights = {}
+        self.flights_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        """Create the backend configured for the app."""
+        if app.config["CACHE_BACKEND"] == "redis":
+            self.backend = RedisBackend.from_url(app.config["CACHE_REDIS_URL"])
+        elif app.config["CACHE_BACKEND"] == "memory":
+            if app.config["WEB_CONCURRENCY"] > 1:
+                raise ValueError(
+                    "The memory cache is not shared by the workers, "
+                    "set CACHE_BACKEND=redis to run more than one."
+                )
+            self.backend = MemoryBackend(app.config["CACHE_MAX_ENTRIES"])
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND {app.config["CACHE_BACKEND"]}')
+        self.app = app
+        self.ttl = app.config["CACHE_TTL_SECONDS"]
+        self.stale = app.config["CACHE_STALE_SECONDS"]
+        self.lock_timeout = app.config["CACHE_LOCK_TIMEOUT_SECONDS"]
+        app.extensions["cache"] = self
+
+    def get(
+        self,
+        key: str,
+        loader: Callable[[], Optional[object]],
+        ttl: Optional[float] = None,
+    ):
+        """Get a value, loading and storing it when it is not cached.
+
+        Parameters
+        ----------
+        key: str
+            The key of the value e.g 'article:1'
+        loader: Callable
+            Loads the value from the database. Returning None means
+            that the value does not exist, which is not cached.
+        ttl: float
+            The number of seconds the value is fresh, by default
+            CACHE_TTL_SECONDS.
+
+        Returns
+        -------
+        object:
+            The value, or None if it does not exist.
+        """
+        ttl = ttl or self.ttl
+        key = self.versioned(key)
+        entry = self.read(key)
+        if entry is not None:
+            if entry["fresh_until"] > time.time():
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self.refresh(key, loader, ttl)
+            return entry["value"]
+        self.misses += 1
+        return self.load(key, loader, ttl)
+
+    def load(self, key: str, loader: Callable, ttl: float):
+        """Load a missing value once for all the concurrent requests.
+
+        The first request for the key loads it while the others wait
+        for at most CACHE_LOCK_TIMEOUT_SECONDS, then read it from the
+        backend. A waiting request loads the value itself when there
+        is still none, e.g. because it does not exist.
+        """
+        with self.flights_lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = threading.Event()
+        if not leader:
+            flight.wait(self.lock_timeout)
+            entry = self.read(key)
+            if entry is not None:
+                self.coalesced += 1
+                return entry["value"]
+            return loader()
+        try:
+            return self.fill(key, loader, ttl)
+        finally:
+            with self.flights_lock:
+                del self.flights[key]
+            flight.set()
+
+    def fill(self, key: str, loader: Callable, ttl: float):
+        """Load and store a value while holding the backend lock.
+
+        When another worker holds the lock, the backend is polled
+        for the value it stores until the lock expires, and the
+        value is loaded regardless after that.
+        """
+        token = self.acquire(key)
+        if token is None:
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.02)
+                entry = self.read(key)
+                if entry is not None and entry["fresh_until"] > time.time():
+                    self.coalesced += 1
+                    return entry["value"]
+        try:
+            value = loader()
+            if value is not None:
+                self.write(key, value, ttl)
+            return value
+        finally:
+            if token is not None:
+                self.release(key, token)
+
+    def refresh(self, key: str, loader: Callable, ttl: float) -> None:
+        """Reload an expired value in a background thread.
+
+        Nothing is done when the key is already being loaded by this
+        worker. The loader runs in a new app context.
+        """
+        with self.flights_lock:
+            if key in self.flights:
+                return
+            flight = self.flights[key] = threading.Event()
+
+        def run():
+            try:
+                with self.app.app_context():
+                    token = self.acquire(key)
+                    if token is None:
+                        return
+                    try:
+                        value = loader()
+                        if value is None:
+                            self.delete(key)
+                        else:
+                            self.write(key, value, ttl)
+                        self.refreshes += 1
+                    finally:
+                        self.release(key, token)
+            except Exception:
+                app_logger.exception("Failed to refresh %s in the cache", key)
+            finally:
+                with self.flights_lock:
+                    del self.flights[key]
+                flight.set()
+
+        threading.Thread(target=run, name=f"cache-refresh-{key}", daemon=True).start()
+
+    def versioned(self, key: str) -> str:
+        """Get the key of the current version of a value.
+
+        A version is created when there is none. The key itself is
+        returned when the backend fails, which is read from then.
+        """
+        try:
+            version = self.backend.get(f"version:{key}")
+            if version is None:
+                version = uuid.uuid4().hex
+                if not self.backend.add(
+                    f"version:{key}", version, self.VERSION_TTL_SECONDS
+                ):
+                    version = self.backend.get(f"version:{key}") or version
+        except Exception:
+            self.errors += 1
+            app_logger.exception("Failed to read the version of %s", key)
+            return key
+        return f"{key}@{version}"
+
+    def invalidate(self, key: str) -> None:
+        """Replace the version of a value once it has changed.
+
+        The loads in flight store the value they read under the old
+        version, which is not read anymore.
+        """
+        try:
+            self.backend.set(
+                f"version:{key}", uuid.uuid4().hex, self.VERSION_TTL_SECONDS
+            )
+        except Exception:
+            self.errors += 1
+            app_logger.exception("Failed to invalidate %s in the cache", key)
+
+    def read(self, key: str) -> Optional[dict]:
+        """Read an entry from the backend, None if it fails.
+
+        Values stored without their freshness, by an earlier
+        version, are ignored.
+        """
+        try:
+            entry = self.backend.get(key)
+        except Exception:
+            self.errors += 1
+            app_logger.exception("Failed to read from the cache")
+            return None
+        if not isinstance(entry, dict) or "fresh_until" not in entry:
+            return None
+        return entry
+
+    def write(self, key: str, value, ttl: float) -> None:
+        """Store a value fresh for ttl seconds in the backend."""
+        entry = {"value": value, "fresh_until": time.time() + ttl}
+        try:
+            self.backend.set(key, entry, ttl + self.stale)
+        except Exception:
+            self.errors += 1
+            app_logger.exception("Failed to write to the cache")
+
+    def acquire(self, key: str) -> Optional[str]:
+        """Take the backend lock on a key.
+
+        A failing backend grants the lock, so the value is loaded.
+        """
+        try:
+            return self.backend.acquire(key, self.lock_timeout)
+        except Exception:
+            self.errors += 1
+            app_logger.exception("Failed to lock %s in the cache", key)
+            return ""
+
+    def release(self, key: str, token: str) -> None:
+        """Release the backend lock on a key."""
+        if not token:
+            return
+        try:
+            self.backend.release(key, token)
+        except Exception:
+            self.errors += 1
+            app_logger.exception("Failed to unlock %s in the cache", key)
+
+    def delete(self, key: str) -> None:
+        """Delete a value."""
+        try:
+            self.backend.delete(key)
+        except Exception:
+            self.errors += 1
+            app_logger.exception("Failed to delete %s from the cache", key)
+
+    def stats(self) -> dict:
+        """Get the hit, miss, coalescing, eviction and error counters."""
+        try:
+            evictions = self.backend.evictions
+        except Exception:
+            evictions = None
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "stale hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "evictions": evictions,
+            "errors": self.errors,
+        }
+
+
+cache = ReadThroughCache()
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""This module declares the compression of the responses.
+
+The json and text responses are compressed with the first of the
+COMPRESSION_ALGORITHMS the client accepts in its Accept-Encoding
+header. gzip is always available, br needs the brotli package and
+zstd the zstandard package, and they are skipped when missing. The
+responses smaller than COMPRESSION_MIN_SIZE are sent as they are,
+since the compression would cost more than it saves. The streamed
+responses, whose size is not known upfront, are compressed chunk by
+chunk as they are produced, and each chunk is flushed so the client
+receives it without waiting for the next.
+
+The compression wraps the WSGI app so it runs after every request
+hook, which keep seeing the responses uncompressed. Each app gets its
+own middleware, so the apps created in a process stay apart.
+
+Has the following classes:
+1. BrotliEncoder:
+    Adapts the brotli compressor to the interface of the others.
+2. CompressionMiddleware:
+    Compresses the responses of an app the client accepts
+    compressed.
+3. Compression:
+    Wraps the apps with the compression middleware.
+"""
+import zlib
+from typing import Iterable, Optional
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+from werkzeug.wsgi import ClosingIterator
+
+from ..config.logger import app_logger
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+
+
+class BrotliEncoder:
+    """Adapt the brotli compressor to the zlib compressobj interface."""
+
+    # The mode of flush() keeping the stream open, brotli having one.
+    SYNC_FLUSH = 1
+
+    def __init__(self, level: int):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk, returning the output ready so far."""
+        return self.compressor.process(data)
+
+    def flush(self, mode=None) -> bytes:
+        """Finish the stream, returning the rest of the output, or with
+        a mode, return the output of the chunks so far."""
+        if mode is None:
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+ENCODERS = {"gzip": lambda level: zlib.compressobj(level, zlib.DEFLATED, 31)}
+# The flush modes emitting the output of the chunks so far while
+# keeping the stream open.
+SYNC_FLUSH = {"gzip": zlib.Z_SYNC_FLUSH}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+    SYNC_FLUSH["br"] = BrotliEncoder.SYNC_FLUSH
+if zstandard is not None:
+    ENCODERS["zstd"] = lambda level: zstandard.ZstdCompressor(level=level).compressobj()
+    SYNC_FLUSH["zstd"] = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+
+class CompressionMiddleware:
+    """Compress the responses of an app the client accepts compressed.
+
+    Parameters
+    ----------
+    wsgi_app:
+        The WSGI callable of the app.
+    algorithms: list
+        The available encodings, in order of preference.
+    min_size: int
+        The size in bytes under which a response is not compressed.
+    """
+
+    def __init__(self, wsgi_app, algorithms: list, min_size: int):
+        self.wsgi_app = wsgi_app
+        self.algorithms = algorithms
+        self.min_size = min_size
+
+    def __call__(self, environ: dict, start_response):
+        """Run the app, then compress its response if possible."""
+        started = []
+
+        def capture(status, headers, exc_info=None):
+            started[:] = [status, Headers(headers), exc_info]
+            return self.write
+
+        body = self.wsgi_app(environ, capture)
+        status, headers, exc_info = started
+        encoding = self.negotiate(environ, int(status[:3]), headers)
+        if encoding is None:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+
+        headers["Content-Encoding"] = encoding
+        etag = headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            # The compressed bytes differ, the content is the same.
+            headers["ETag"] = f"W/{etag}"
+        if "Content-Length" in headers:
+            try:
+                data = b"".join(body)
+            finally:
+                if hasattr(body, "close"):
+                    body.close()
+            encoder = ENCODERS[encoding](LEVELS[encoding])
+            data = encoder.compress(data) + encoder.flush()
+            headers["Content-Length"] = str(len(data))
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return [data]
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return ClosingIterator(
+            self.stream(encoding, body), getattr(body, "close", None)
+        )
+
+    @staticmethod
+    def write(data: bytes):
+        """Reject the legacy WSGI write callable, which Flask never uses."""
+        raise RuntimeError("The compressed responses cannot be written to")
+
+    def negotiate(self, environ: dict, status: int, headers: Headers) -> Optional[str]:
+        """Pick the encoding of a response.
+
+        The compressible responses are marked as varying with the
+        Accept-Encoding header whether or not they are compressed.
+
+        Parameters
+        ----------
+        environ: dict
+            The WSGI environment of the request.
+        status: int
+            The response code.
+        headers: Headers
+            The response headers.
+
+        Returns
+        -------
+        str:
+            The encoding, or None to send the response as it is.
+        """
+        if status < 200 or status in {204, 304}:
+            return None
+        if not headers.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES):
+            return None
+        if "Content-Encoding" in headers:
+            return None
+        if "no-transform" in headers.get("Cache-Control", ""):
+            return None
+        vary = headers.get("Vary")
+        if not vary:
+            headers["Vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding"
+        if environ["REQUEST_METHOD"] == "HEAD":
+            return None
+        length = headers.get("Content-Length")
+        if length is not None and int(length) < self.min_size:
+            return None
+        accepted = parse_accept_header(environ.get("HTTP_ACCEPT_ENCODING"))
+        return accepted.best_match(self.algorithms)
+
+    @staticmethod
+    def stream(encoding: str, body: Iterable[bytes]):
+        """Compress a streamed response chunk by chunk, flushing each."""
+        encoder = ENCODERS[encoding](LEVELS[encoding])
+        for chunk in body:
+            if not chunk:
+                continue
+            yield encoder.compress(chunk) + encoder.flush(SYNC_FLUSH[encoding])
+        yield encoder.flush()
+
+
+class Compression:
+    """Wrap the apps with the compression middleware."""
+
+    def init_app(self, app):
+        """Wrap the app's WSGI callable with a middleware of its own."""
+        configured = [
+            name.strip()
+            for name in app.config["COMPRESSION_ALGORITHMS"]
+            if name.strip()
+        ]
+        for name in configured:
+            if name not in ENCODERS:
+                app_logger.warning(f"The {name} compression is not available")
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app,
+            [name for name in configured if name in ENCODERS],
+            app.config["COMPRESSION_MIN_SIZE"],
+        )
+        app.extensions["compression"] = app.wsgi_app
+
+
+compression = Compression()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""This module declares the helpers of the conditional GET requests.
+
+The reads emit an ETag, and a Last-Modified date when the resource
+has one, and the clients send them back in If-None-Match and
+If-Modified-Since to be answered 304 Not Modified with no body when
+nothing changed. The handlers compute the validators from a version
+of the resource, e.g. the article's id and date_edited, so the 304
+is decided before the body is serialized.
+
+Has the following functions:
+1. make_etag():
+    Hashes the parts of a version into an entity tag.
+2. not_modified():
+    Checks the request's conditional headers against the validators.
+3. validators():
+    Builds the headers carrying the validators.
+4. conditional():
+    Answers 304 when the request's validators still match.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from flask import request
+from werkzeug.http import http_date, quote_etag
+
+from .http_status_codes import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+
+
+def make_etag(*parts) -> str:
+    """Hash the parts of a version into an entity tag.
+
+    Parameters
+    ----------
+    parts:
+        Json serializable values identifying the version, e.g the
+        article's id and date_edited.
+
+    Returns
+    -------
+    str:
+        The unquoted entity tag.
+    """
+    version = json.dumps(parts, default=str, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(version.encode()).hexdigest()
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Check the request's conditional headers against the validators.
+
+    If-None-Match takes precedence over If-Modified-Since, and the
+    entity tags are compared weakly as is done for GET requests.
+
+    Parameters
+    ----------
+    etag: str
+        The unquoted entity tag of the current version.
+    last_modified: datetime, optional
+        The naive UTC date the resource last changed.
+
+    Returns
+    -------
+    bool:
+        Whether the client's copy is still current.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        changed = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+        return changed <= request.if_modified_since
+    return False
+
+
+def validators(
+    etag: str, last_modified: Optional[datetime] = None, weak: bool = False
+) -> dict:
+    """Build the headers carrying the validators.
+
+    The responses are private as they require a token, and have to
+    be revalidated before being reused.
+
+    Parameters
+    ----------
+    etag: str
+        The unquoted entity tag.
+    last_modified: datetime, optional
+        The naive UTC date the resource last changed.
+    weak: bool
+        Whether the entity tag is weak, i.e. equal tags only mean
+        equivalent bodies, such as articles whose counters differ.
+
+    Returns
+    -------
+    dict:
+        The ETag, Last-Modified and Cache-Control headers.
+    """
+    headers = {
+        "ETag": quote_etag(etag, weak),
+        "Cache-Control": "private, no-cache",
+    }
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified.replace(tzinfo=timezone.utc))
+    return headers
+
+
+def conditional(
+    body,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    weak: bool = False,
+) -> Tuple[object, int, dict]:
+    """Answer 304 when the request's validators still match.
+
+    Parameters
+    ----------
+    body:
+        The body of the response, or a callable building it which
+        is only called when the body is sent.
+    etag: str
+        The unquoted entity tag of the current version.
+    last_modified: datetime, optional
+        The naive UTC date the resource last changed.
+    weak: bool
+        Whether the entity tag is weak.
+
+    Returns
+    -------
+    Tuple[object, int, dict]:
+        The body, the response code and the validator headers.
+    """
+    headers = validators(etag, last_modified, weak)
+    if not_modified(etag, last_modified):
+        return "", HTTP_304_NOT_MODIFIED, headers
+    return (body() if callable(body) else body), HTTP_200_OK, headers
@@ -7,6 +7,11 @@ from sqlalchemy_utils import database_exists
 from ..article.views import article
 from ..author import author
 from ..extensions import cors, db, jwt, ma, migrate, swagger
+from .cache import cache
+from .compression import compression
+from .storage import storage
+from .variant_queue import variant_queue
+from .view_recorder import view_recorder
 
 
 def register_extensions(app):
@@ -18,6 +23,11 @@ def register_extensions(app):
     cors.init_app(app)
     swagger.init_app(app)
     jwt.init_app(app)
+    view_recorder.init_app(app)
+    cache.init_app(app)
+    compression.init_app(app)
+    storage.init_app(app)
+    variant_queue.init_app(app)
 
 
 def register_blueprints(app):
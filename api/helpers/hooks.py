@@ -1,66 +1,218 @@
 # -*- coding: utf-8 -*-
-import json
+"""This module declares the request hooks logging the traffic.
 
-from flask import request
+The requests and responses are logged as json fields rather than
+as a formatted message. The authorization and cookie headers are
+left out, and the response bodies are only logged when
+LOG_RESPONSE_BODIES is set.
+
+The logged fields are capped: the strings are cut at
+LOG_FIELD_MAX_LENGTH characters, the lists and objects at
+LOG_FIELD_MAX_ITEMS items, and the json bodies larger than
+LOG_BODY_MAX_BYTES are only logged by size. The uploaded files are
+described by their name, type and size, the size being taken from
+the end of the spooled file, so they are never read into memory.
+
+A request is logged, along with its response, with the rate given
+for its route in LOG_SAMPLE_RATES, e.g. 'article.get_article=0.1',
+or else with LOG_SAMPLE_RATE. The server errors are always logged.
+
+Has the following functions:
+1. sample_request():
+    Decides whether the request is logged.
+2. truncate():
+    Caps the size of a logged value.
+3. request_fields():
+    Collects the fields logged for every request.
+4. file_fields():
+    Describes an uploaded file without reading it.
+5. log_post_request():
+    Logs a POST or PUT request along with its data.
+6. log_get_request():
+    Logs a GET or DELETE request.
+7. get_response():
+    Logs a response.
+8. get_exception():
+    Logs the exception raised while handling a request.
+"""
+import os
+import random
+import time
+from functools import lru_cache
+
+from flask import current_app, g, request
+from werkzeug.datastructures import FileStorage
 
 from ..config.logger import app_logger
 
+REDACTED_HEADERS = {"Authorization", "Cookie"}
 
-def log_post_request():
-    request_data = {
+
+@lru_cache(maxsize=8)
+def sample_rates(rates: tuple) -> dict:
+    """Parse the 'route=rate' pairs of LOG_SAMPLE_RATES."""
+    parsed = {}
+    for pair in rates:
+        if pair.strip():
+            route, _, rate = pair.partition("=")
+            parsed[route.strip()] = float(rate)
+    return parsed
+
+
+def sample_request() -> bool:
+    """Decide whether the request is logged and start timing it.
+
+    The decision is kept for the response.
+
+    Returns
+    -------
+    bool:
+        True if the request is logged else False.
+    """
+    g.request_started = time.perf_counter()
+    rates = sample_rates(tuple(current_app.config["LOG_SAMPLE_RATES"]))
+    rate = rates.get(request.endpoint, current_app.config["LOG_SAMPLE_RATE"])
+    g.request_sampled = rate >= 1 or random.random() < rate
+    return g.request_sampled
+
+
+def truncate(value, max_length: int, max_items: int):
+    """Cap the size of a logged value.
+
+    Parameters
+    ----------
+    value:
+        The json compatible value.
+    max_length: int
+        The number of characters kept of each string.
+    max_items: int
+        The number of items kept of each list or object.
+
+    Returns
+    -------
+    The value with the longer strings cut and the extra items dropped,
+    each cut marked with the original size.
+    """
+    if isinstance(value, str):
+        if len(value) <= max_length:
+            return value
+        return f"{value[:max_length]}... ({len(value)} characters)"
+    if isinstance(value, dict):
+        capped = {
+            key: truncate(item, max_length, max_items)
+            for key, item in list(value.items())[:max_items]
+        }
+        if len(value) > max_items:
+            capped["truncated items"] = len(value) - max_items
+        return capped
+    if isinstance(value, (list, tuple)):
+        capped = [truncate(item, max_length, max_items) for item in value[:max_items]]
+        if len(value) > max_items:
+            capped.append(f"... ({len(value)} items)")
+        return capped
+    return value
+
+
+def request_fields() -> dict:
+    """Collect the fields logged for every request."""
+    fields = {
         "method": request.method,
-        "url root": request.url_root,
-        "user agent": request.user_agent,
+        "url": request.url,
+        "route": request.endpoint,
         "scheme": request.scheme,
         "remote address": request.remote_addr,
-        "headers": request.headers,
+        "user agent": request.user_agent.string,
+        "headers": {
+            key: value
+            for key, value in request.headers.items()
+            if key not in REDACTED_HEADERS
+        },
     }
     if request.args:
-        request_data["args"] = request.args
-    if request.form:
-        request_data["data"] = request.form
-    else:
-        request_data["data"] = request.json
+        fields["query"] = request.args.to_dict(flat=False)
     if request.cookies:
-        request_data["cookies"] = request.cookies
-    if request.files:
-        request_data["image"] = {
-            "filename": request.files["Image"].filename,
-            "content type": request.files["Image"].content_type,
-            "size": len(request.files["Image"].read()) // 1000,
+        fields["cookies"] = list(request.cookies)
+    return fields
+
+
+def file_fields(file: FileStorage) -> dict:
+    """Describe an uploaded file without reading it.
+
+    The size is the offset of the end of the spooled file, and the
+    file is left at the offset it was found at.
+    """
+    fields = {"filename": file.filename, "content type": file.content_type}
+    try:
+        position = file.stream.tell()
+        fields["size"] = file.stream.seek(0, os.SEEK_END)
+        file.stream.seek(position)
+    except (AttributeError, OSError):
+        fields["size"] = file.content_length or None
+    return fields
+
+
+def log_post_request():
+    config = current_app.config
+    fields = request_fields()
+    fields["content length"] = request.content_length
+    if request.mimetype in {"multipart/form-data", "application/x-www-form-urlencoded"}:
+        # The form is parsed for the view anyway, with the files
+        # spooled to disk past a small size.
+        fields["data"] = request.form.to_dict(flat=False)
+        fields["files"] = {
+            name: file_fields(file) for name, file in request.files.items()
         }
-    app_logger.info(str(request_data))
+    elif request.is_json and request.content_length is not None:
+        # The larger bodies, or those of unknown size, are not read.
+        if request.content_length <= config["LOG_BODY_MAX_BYTES"]:
+            fields["data"] = request.get_json(silent=True)
+    app_logger.info(
+        "Request",
+        extra=truncate(
+            fields, config["LOG_FIELD_MAX_LENGTH"], config["LOG_FIELD_MAX_ITEMS"]
+        ),
+    )
 
 
 def log_get_request():
-    request_data = {
-        "method": request.method,
-        "url root": request.url_root,
-        "user agent": request.user_agent,
-        "scheme": request.scheme,
-        "remote address": request.remote_addr,
-        "headers": request.headers,
-        "route": request.endpoint,
-        "base url": request.base_url,
-        "url": request.url,
-    }
-    if request.args:
-        request_data["args"] = request.args
-    if request.cookies:
-        request_data["cookies"] = request.cookies
-    app_logger.info(str(request_data))
+    config = current_app.config
+    app_logger.info(
+        "Request",
+        extra=truncate(
+            request_fields(),
+            config["LOG_FIELD_MAX_LENGTH"],
+            config["LOG_FIELD_MAX_ITEMS"],
+        ),
+    )
 
 
 def get_response(response):
-    response_data = {
-        "status": response.status,
+    if not g.get("request_sampled", True) and response.status_code < 500:
+        return
+    fields = {
+        "method": request.method,
+        "route": request.endpoint,
         "status code": response.status_code,
-        "response": json.loads(response.data),
+        "content length": response.content_length,
     }
-    app_logger.info(str(response_data))
+    if "request_started" in g:
+        fields["duration ms"] = round(
+            (time.perf_counter() - g.request_started) * 1000, 2
+        )
+    # Reading a streamed body would buffer all of it.
+    if current_app.config["LOG_RESPONSE_BODIES"] and not response.is_streamed:
+        if response.is_json:
+            fields["response"] = truncate(
+                response.get_json(silent=True),
+                current_app.config["LOG_FIELD_MAX_LENGTH"],
+                current_app.config["LOG_FIELD_MAX_ITEMS"],
+            )
+    app_logger.info("Response", extra=fields)
 
 
 def get_exception(exc):
     """Log exceptions"""
-    if exc:
+    # A streamed response's context is torn down with the
+    # GeneratorExit closing its generator, which is not a failure.
+    if exc and not isinstance(exc, GeneratorExit):
         app_logger.warning(f"{exc.__class__.__name__ }: {str(exc)}")
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""This module declares a request scoped identity map.
+
+A request typically checks that an author or article exists and
+then fetches it again, sometimes several times. The entities
+loaded here are kept on flask.g for the rest of the request, so
+each one is fetched from the database at most once.
+
+Has the following functions:
+1. load():
+    Gets an entity by its primary key, fetching it only the
+    first time it is requested.
+2. evict():
+    Drops an entity from the identity map e.g once it has been
+    deleted.
+"""
+from flask import g
+
+from ..extensions import db
+
+
+def load(model, ident: int):
+    """Get an entity by its primary key.
+
+    Parameters
+    ----------
+    model: db.Model
+        The model of the entity e.g Author
+    ident: int
+        The primary key of the entity.
+
+    Returns
+    -------
+    db.Model:
+        The entity, or None if it does not exist.
+    """
+    identity_map = g.setdefault("identity_map", {})
+    key = (model, ident)
+    if key not in identity_map:
+        identity_map[key] = db.session.get(model, ident)
+    return identity_map[key]
+
+
+def evict(model, ident: int) -> None:
+    """Drop an entity from the identity map.
+
+    Parameters
+    ----------
+    model: db.Model
+        The model of the entity e.g Author
+    ident: int
+        The primary key of the entity.
+    """
+    g.setdefault("identity_map", {}).pop((model, ident), None)
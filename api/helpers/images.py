@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+"""This module declares the generation of the resized copies of the
+article images.
+
+Each image gets the copies listed in VARIANTS: a thumbnail and a
+medium JPEG and a WebP, none of them larger than the image. The
+copies are stored next to the image and recorded on the article
+along with the url of the image they were made from. The articles
+whose image changed since are processed again and the others are
+skipped, so the generation can be stopped and rerun at any point.
+An image that cannot be decoded is recorded with its error, so it is
+not retried on every run. The copies of the content addressed images
+are also recorded on the image, so the other articles using it get
+them without resizing it again.
+
+The decoding and encoding, which take the CPU, run in a pool of
+processes while the main process reads and stores the images and
+updates the articles. The images just uploaded get their copies one
+at a time from the VariantQueue of the worker instead.
+
+Has the following classes:
+1. VariantStats:
+    Counts the images processed and the bytes read and written.
+
+Has the following functions:
+1. variant_key():
+    Gets the key of a copy of an image.
+2. render_variants():
+    Makes the copies of an image.
+3. pending_conditions():
+    Gets the conditions of the articles whose image has no copies.
+4. pending_articles():
+    Gets the next articles whose image has no copies.
+5. store_variants():
+    Stores the copies of an image.
+6. record_variants():
+    Records the copies of an image on its article and on the
+    image.
+7. variant_urls():
+    Gets the urls of all the copies an image can have.
+8. discard_variants():
+    Deletes the copies of an image no longer used, unless they may
+    be shared.
+9. share_variants():
+    Records the copies another article made of the same image.
+10. reject_image():
+    Records the error of an image which cannot be decoded.
+11. save_variants():
+    Stores and records the copies of an image.
+12. generate_article_variants():
+    Makes the copies of the image of an article.
+13. generate_variants():
+    Makes the copies of the images which have none.
+"""
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy import or_
+
+from ..article.models.article import Article
+from ..article.models.image import Image as StoredImage
+from ..config.logger import app_logger
+from ..extensions import db
+from .storage import storage
+
+# The suffix goes in the key of the copy, before the extension of its
+# format. The WebP copy is the medium one in another format, naming it
+# after the variant would repeat the extension e.g 'cover.webp.webp'.
+VARIANTS = (
+    {
+        "name": "thumbnail",
+        "suffix": "thumbnail",
+        "width": 320,
+        "format": "JPEG",
+        "type": "image/jpeg",
+    },
+    {
+        "name": "medium",
+        "suffix": "medium",
+        "width": 960,
+        "format": "JPEG",
+        "type": "image/jpeg",
+    },
+    {
+        "name": "webp",
+        "suffix": "medium",
+        "width": 960,
+        "format": "WEBP",
+        "type": "image/webp",
+    },
+)
+
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+QUALITY = 80
+
+# The errors of an image which cannot be decoded, as opposed to one
+# which cannot be read or stored.
+DECODE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, OSError)
+
+
+@dataclass
+class VariantStats:
+    """Count the images processed and the bytes read and written."""
+
+    processed: int = 0
+    shared: int = 0
+    skipped: int = 0
+    failed: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def total(self) -> int:
+        """The number of articles gone through."""
+        return self.processed + self.shared + self.skipped + self.failed
+
+    def report(self) -> dict:
+        """Get the counts along with the throughput."""
+        seconds = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            "processed": self.processed,
+            "shared": self.shared,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "seconds": round(seconds, 2),
+            "images per second": round(self.processed / seconds, 2),
+            "megabytes read per second": round(self.bytes_read / seconds / 2**20, 2),
+            "megabytes written": round(self.bytes_written / 2**20, 2),
+        }
+
+
+def variant_key(key: str, variant: dict) -> str:
+    """Get the key of a copy of an image e.g 'cover.thumbnail.jpg'."""
+    stem = key.rsplit(".", 1)[0]
+    return f"{stem}.{variant['suffix']}.{EXTENSIONS[variant['format']]}"
+
+
+def render_variants(data: bytes) -> list:
+    """Make the copies of an image.
+
+    This runs in the pool, so it only takes and returns bytes.
+
+    Parameters
+    ----------
+    data: bytes
+        The image.
+
+    Raises
+    ------
+    UnidentifiedImageError:
+        When the image cannot be decoded.
+
+    Returns
+    -------
+    list:
+        The name, format, type, width, height and bytes of each
+        copy.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    rendered = []
+    for variant in VARIANTS:
+        copy = image.copy()
+        copy.thumbnail((variant["width"], copy.height), Image.Resampling.LANCZOS)
+        if variant["format"] == "JPEG" and copy.mode != "RGB":
+            # JPEG has no transparency, which is flattened on white.
+            rgba = copy.convert("RGBA")
+            copy = Image.new("RGB", rgba.size, "white")
+            copy.paste(rgba, mask=rgba.getchannel("A"))
+        elif copy.mode not in {"RGB", "RGBA"}:
+            copy = copy.convert("RGBA")
+        buffer = io.BytesIO()
+        if variant["format"] == "JPEG":
+            copy.save(buffer, "JPEG", quality=QUALITY, optimize=True, progressive=True)
+        else:
+            copy.save(buffer, variant["format"], quality=QUALITY, method=4)
+        rendered.append(
+            {
+                "name": variant["name"],
+                "suffix": variant["suffix"],
+                "format": variant["format"],
+                "type": variant["type"],
+                "width": copy.width,
+                "height": copy.height,
+                "data": buffer.getvalue(),
+            }
+        )
+    return rendered
+
+
+def pending_conditions() -> tuple:
+    """Get the conditions of the articles whose image has no copies."""
+    return (
+        Article.image.isnot(None),
+        Article.image != "",
+        or_(
+            Article.image_variants.is_(None),
+            Article.image_variants["source"].astext != Article.image,
+        ),
+    )
+
+
+def pending_articles(after_id: int, limit: int) -> list:
+    """Get the next articles whose image has no copies.
+
+    Parameters
+    ----------
+    after_id: int
+        The id the articles come after.
+    limit: int
+        The number of articles.
+
+    Returns
+    -------
+    list:
+        The id and image url of the articles, by id.
+    """
+    return (
+        db.session.query(Article.id, Article.image)
+        .filter(Article.id > after_id, *pending_conditions())
+        .order_by(Article.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def store_variants(url: str, rendered: list) -> dict:
+    """Store the copies of an image.
+
+    Returns
+    -------
+    dict:
+        The url, type, width and height of each copy by name.
+    """
+    key = os.path.basename(url)
+    variants = {}
+    for copy in rendered:
+        variants[copy["name"]] = {
+            "url": storage.put(copy["data"], variant_key(key, copy), copy["type"]),
+            "type": copy["type"],
+            "width": copy["width"],
+            "height": copy["height"],
+        }
+    return variants
+
+
+def record_variants(article_id: int, url: str, variants: dict) -> bool:
+    """Record the copies of an image on its article and on the image.
+
+    Nothing is recorded when the image changed while its copies were
+    made.
+
+    Parameters
+    ----------
+    article_id: int
+        The article id.
+    url: str
+        The url of the image the copies were made from.
+    variants: dict
+        The copies, or the error of an image which cannot be decoded.
+
+    Returns
+    -------
+    bool:
+        True if the copies were recorded else False.
+    """
+    updated = Article.query.filter(
+        Article.id == article_id, Article.image == url
+    ).update(
+        {
+            "image_variants": {"source": url, **variants},
+            "version": Article.version + 1,
+        },
+        synchronize_session=False,
+    )
+    if updated and "variants" in variants:
+        StoredImage.record_variants(url, variants["variants"])
+    db.session.commit()
+    if updated:
+        Article.invalidate(article_id)
+    return bool(updated)
+
+
+def variant_urls(url: str) -> list:
+    """Get the urls of all the copies an image can have.
+
+    The copies stored before they had a suffix were named after their
+    variant, so those keys are included too.
+    """
+    key = os.path.basename(url)
+    keys = {variant_key(key, variant) for variant in VARIANTS}
+    keys.update(
+        variant_key(key, {**variant, "suffix": variant["name"]}) for variant in VARIANTS
+    )
+    return [storage.url(key) for key in sorted(keys)]
+
+
+def discard_variants(url: str, variants: dict) -> None:
+    """Delete the copies of an image whose article changed its image
+    while they were made.
+
+    The copies of a content addressed image are shared by the articles
+    using it and may have been recorded by a concurrent run, so they
+    are left to the collect_images command, which deletes them with
+    the image. The others are kept while an article still uses the
+    image, its next run storing them again.
+    """
+    if db.session.query(StoredImage.digest).filter_by(url=url).first():
+        return
+    if db.session.query(Article.id).filter(Article.image == url).first():
+        return
+    for variant in variants.values():
+        storage.delete(variant["url"])
+
+
+def share_variants(article_id: int, url: str, stats: VariantStats) -> bool:
+    """Record the copies another article made of the same image.
+
+    Returns
+    -------
+    bool:
+        True if the image had copies else False.
+    """
+    shared = StoredImage.shared_variants(url)
+    if not shared:
+        return False
+    if record_variants(article_id, url, {"variants": shared}):
+        stats.shared += 1
+    else:
+        stats.skipped += 1
+    return True
+
+
+def reject_image(article_id: int, url: str, error: Exception, stats: VariantStats):
+    """Record the error of an image which cannot be decoded."""
+    app_logger.warning(f"Cannot decode the image of {article_id}: {error}")
+    record_variants(article_id, url, {"error": str(error)})
+    stats.failed += 1
+
+
+def save_variants(article_id: int, url: str, rendered: list, stats: VariantStats):
+    """Store and record the copies of an image.
+
+    The copies are deleted again when the article changed its image
+    while they were made.
+    """
+    try:
+        variants = store_variants(url, rendered)
+    except Exception:
+        app_logger.exception(f"Failed to store the copies of {article_id}")
+        stats.failed += 1
+        return
+    stats.bytes_written += sum(len(copy["data"]) for copy in rendered)
+    if record_variants(article_id, url, {"variants": variants}):
+        stats.processed += 1
+    else:
+        discard_variants(url, variants)
+        stats.skipped += 1
+
+
+def generate_article_variants(article_id: int) -> VariantStats:
+    """Make the copies of the image of an article.
+
+    The copies are made in the current process. This is how the images
+    just uploaded get theirs, without waiting for generate_variants.
+    Nothing is done when the image already has copies.
+
+    Parameters
+    ----------
+    article_id: int
+        The article id.
+
+    Returns
+    -------
+    VariantStats:
+        The counts and the throughput.
+    """
+    stats = VariantStats()
+    article = (
+        db.session.query(Article.image)
+        .filter(Article.id == article_id, *pending_conditions())
+        .first()
+    )
+    if article is None:
+        return stats
+    url = article.image
+    if share_variants(article_id, url, stats):
+        return stats
+    try:
+        data = storage.read(url)
+    except Exception:
+        app_logger.exception(f"Failed to read the image of {article_id}")
+        stats.failed += 1
+        return stats
+    stats.bytes_read += len(data)
+    try:
+        rendered = render_variants(data)
+    except DECODE_ERRORS as e:
+        reject_image(article_id, url, e, stats)
+        return stats
+    save_variants(article_id, url, rendered, stats)
+    return stats
+
+
+def generate_variants(
+    batch_size: int,
+    workers: int,
+    limit: Optional[int] = None,
+    progress: Optional[Callable[[VariantStats], None]] = None,
+) -> VariantStats:
+    """Make the copies of the images which have none.
+
+    The articles are gone through by id, batch_size at a time. The
+    images of a batch are read and handed to the pool, and the copies
+    of each are stored and recorded as soon as they are made. The
+    images which cannot be read, made or stored are left for the next
+    run. A worker dying e.g of memory breaks the pool, which fails the
+    images it still held and is replaced before the next batch.
+
+    Parameters
+    ----------
+    batch_size: int
+        The number of images read at a time.
+    workers: int
+        The number of processes making the copies.
+    limit: int, optional
+        The number of articles gone through before stopping.
+    progress: Callable, optional
+        Called with the counts after each batch.
+
+    Returns
+    -------
+    VariantStats:
+        The counts and the throughput.
+    """
+    stats = VariantStats()
+    after_id = 0
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while limit is None or stats.total < limit:
+            size = batch_size if limit is None else min(batch_size, limit - stats.total)
+            batch = pending_articles(after_id, size)
+            if not batch:
+                break
+            after_id = batch[-1].id
+            futures = {}
+            for article_id, url in batch:
+                if share_variants(article_id, url, stats):
+                    continue
+                try:
+                    data = storage.read(url)
+                except Exception:
+                    app_logger.exception(f"Failed to read the image of {article_id}")
+                    stats.failed += 1
+                    continue
+                stats.bytes_read += len(data)
+                futures[pool.submit(render_variants, data)] = (article_id, url)
+            broken = False
+            for future in as_completed(futures):
+                article_id, url = futures[future]
+                try:
+                    rendered = future.result()
+                except DECODE_ERRORS as e:
+                    reject_image(article_id, url, e, stats)
+                    continue
+                except BrokenProcessPool:
+                    app_logger.error(
+                        f"The pool broke making the copies of {article_id}"
+                    )
+                    stats.failed += 1
+                    broken = True
+                    continue
+                except Exception:
+                    app_logger.exception(f"Failed to make the copies of {article_id}")
+                    stats.failed += 1
+                    continue
+                save_variants(article_id, url, rendered, stats)
+            if broken:
+                pool.shutdown(wait=False)
+                pool = ProcessPoolExecutor(max_workers=workers)
+            if progress:
+                progress(stats)
+    finally:
+        pool.shutdown()
+    return stats
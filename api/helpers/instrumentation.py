@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""This module declares the per request SQL instrumentation.
+
+Every statement executed while handling a request is counted and
+timed. The totals are sent back in the Server-Timing and
+X-Query-Count response headers, and statements slower than
+SLOW_QUERY_THRESHOLD_MS are logged along with the endpoint and a
+fingerprint of the SQL.
+
+Has the following functions:
+1. fingerprint():
+    Normalizes a SQL statement so that statements differing only
+    in their values are grouped together.
+2. before_cursor_execute():
+    Records the start time of a statement.
+3. after_cursor_execute():
+    Adds the statement to the request totals and logs it if it
+    was slow.
+4. add_timing_headers():
+    Adds the request totals to the response headers.
+5. register_sql_instrumentation():
+    Attaches the instrumentation to the app's database engine.
+"""
+import re
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from ..config.logger import app_logger
+from ..extensions import db
+
+NORMALIZERS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement.
+
+    Literals and bound parameters are replaced with '?', lists of
+    values are collapsed into a single '(?)' and whitespace is
+    squeezed.
+
+    Parameters
+    ----------
+    statement: str
+        The SQL statement.
+
+    Returns
+    -------
+    str:
+        The statement's fingerprint.
+    """
+    for pattern, replacement in NORMALIZERS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record the start time of a statement."""
+    context.query_start_time = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Add the statement to the request totals."""
+    duration = (time.perf_counter() - context.query_start_time) * 1000
+    if not has_request_context():
+        return
+    g.query_count = g.get("query_count", 0) + 1
+    g.query_time = g.get("query_time", 0.0) + duration
+    if duration >= current_app.config["SLOW_QUERY_THRESHOLD_MS"]:
+        app_logger.warning(
+            "Slow query",
+            extra={
+                "endpoint": request.endpoint,
+                "duration ms": round(duration, 2),
+                "fingerprint": fingerprint(statement),
+            },
+        )
+
+
+def add_timing_headers(response):
+    """Add the request's query count and database time to the response."""
+    query_count = g.get("query_count", 0)
+    query_time = g.get("query_time", 0.0)
+    response.headers["X-Query-Count"] = str(query_count)
+    response.headers.add(
+        "Server-Timing", f'db;dur={query_time:.2f};desc="{query_count} queries"'
+    )
+    return response
+
+
+def register_sql_instrumentation(app):
+    """Attach the SQL instrumentation to the app's database engine."""
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(db.engine, "after_cursor_execute", after_cursor_execute)
+    app.after_request(add_timing_headers)
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""This module declares the helpers used for keyset pagination.
+
+Results are ordered newest first on a (date, id) pair and a page
+is fetched by seeking past the last row of the previous page, so
+the cost of a page does not grow with the size of the table.
+
+Has the following functions:
+1. encode_cursor():
+    Encodes the (date, id) of the last row on a page into an
+    opaque cursor string.
+2. decode_cursor():
+    Decodes a cursor string back into a (date, id) pair.
+3. validate_limit():
+    Validates the requested page size.
+4. validate_total():
+    Checks whether the total number of results was requested.
+5. seek_query():
+    Applies the keyset ordering and seek condition to a query.
+6. page_query():
+    Applies the keyset ordering, seek condition and limit to a
+    query.
+7. paginate():
+    Fetches a page of a query along with the next cursor.
+8. count_rows():
+    Counts the rows matched by a query in the database.
+9. encode_rank_cursor():
+    Encodes the (rank, id) of the last row on a ranked page.
+10. decode_rank_cursor():
+    Decodes a ranked cursor back into a (rank, id) pair.
+11. paginate_ranked():
+    Fetches a page of a query ordered by a rank, best first.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(date: datetime, row_id: int) -> str:
+    """Encode the position of a row into a cursor.
+
+    Parameters
+    ----------
+    date: datetime
+        The date of the last row on the page.
+    row_id: int
+        The id of the last row on the page.
+
+    Returns
+    -------
+    str:
+        An opaque, url safe cursor.
+    """
+    data = json.dumps([date.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor into the position of a row.
+
+    Parameters
+    ----------
+    cursor: str
+        The cursor returned with the previous page.
+
+    Raises
+    ------
+    ValueError:
+        When the cursor is malformed.
+    TypeError:
+        When the cursor is not a string.
+
+    Returns
+    -------
+    Tuple[datetime, int]:
+        The date and id of the last row on the previous page.
+    """
+    if not isinstance(cursor, str):
+        raise TypeError("The cursor has to be a string.")
+    try:
+        date, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(date), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("The cursor is not valid.") from None
+
+
+def validate_limit(limit: Optional[str]) -> int:
+    """Validate the requested page size.
+
+    Parameters
+    ----------
+    limit: str, optional
+        The number of items requested.
+
+    Raises
+    ------
+    ValueError:
+        When the limit is not a positive integer or exceeds
+        the configured maximum.
+
+    Returns
+    -------
+    int:
+        The page size to use.
+    """
+    if not limit:
+        return current_app.config["PAGE_SIZE"]
+    if not isinstance(limit, str) or not limit.isdigit() or int(limit) < 1:
+        raise ValueError("The limit has to be a positive integer.")
+    if int(limit) > current_app.config["MAX_PAGE_SIZE"]:
+        raise ValueError(
+            f'The limit has to be at most {current_app.config["MAX_PAGE_SIZE"]}'
+        )
+    return int(limit)
+
+
+def validate_total(total: Optional[str]) -> bool:
+    """Check whether the total number of results was requested.
+
+    Parameters
+    ----------
+    total: str, optional
+        Either 'true' or 'false'.
+
+    Raises
+    ------
+    ValueError:
+        When the value is neither 'true' nor 'false'.
+
+    Returns
+    -------
+    bool:
+        True if the total was requested else False.
+    """
+    if not total:
+        return False
+    if not isinstance(total, str) or total.lower() not in {"true", "false"}:
+        raise ValueError("The total has to be either true or false.")
+    return total.lower() == "true"
+
+
+def seek_query(
+    query: Query, date_column, id_column, cursor: Optional[str] = None
+) -> Query:
+    """Build the query for all the rows after a cursor, newest first.
+
+    Parameters
+    ----------
+    query: Query
+        The filtered query.
+    date_column:
+        The date column to order by.
+    id_column:
+        The primary key column used to break ties.
+    cursor: str, optional
+        The cursor of the last row already fetched.
+
+    Returns
+    -------
+    Query:
+        The ordered query.
+    """
+    if cursor:
+        query = query.filter(
+            tuple_(date_column, id_column) < tuple_(*decode_cursor(cursor))
+        )
+    return query.order_by(date_column.desc(), id_column.desc())
+
+
+def page_query(
+    query: Query, date_column, id_column, limit: int, cursor: Optional[str] = None
+) -> Query:
+    """Build the query fetching a page and one more row.
+
+    The extra row tells whether there is a next page.
+
+    Parameters
+    ----------
+    query: Query
+        The filtered query to paginate.
+    date_column:
+        The date column to order by.
+    id_column:
+        The primary key column used to break ties.
+    limit: int
+        The page size.
+    cursor: str, optional
+        The cursor returned with the previous page.
+
+    Returns
+    -------
+    Query:
+        The query for the page.
+    """
+    return seek_query(query, date_column, id_column, cursor).limit(limit + 1)
+
+
+def paginate(
+    query: Query, date_column, id_column, limit: int, cursor: Optional[str] = None
+) -> Tuple[list, Optional[str]]:
+    """Fetch a single page of a query.
+
+    Parameters
+    ----------
+    query: Query
+        The filtered query to paginate.
+    date_column:
+        The date column to order by.
+    id_column:
+        The primary key column used to break ties.
+    limit: int
+        The page size.
+    cursor: str, optional
+        The cursor returned with the previous page.
+
+    Returns
+    -------
+    Tuple[list, str]:
+        The rows on the page and the cursor for the next page,
+        which is None on the last page.
+    """
+    rows = page_query(query, date_column, id_column, limit, cursor).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(
+        getattr(last, date_column.key), getattr(last, id_column.key)
+    )
+
+
+def count_rows(query: Query) -> int:
+    """Count the rows matched by a query.
+
+    Parameters
+    ----------
+    query: Query
+        The filtered query to count.
+
+    Returns
+    -------
+    int:
+        The number of matching rows.
+    """
+    return query.order_by(None).with_entities(func.count()).scalar()
+
+
+def encode_rank_cursor(rank: float, row_id: int) -> str:
+    """Encode the position of a row in ranked results into a cursor.
+
+    Parameters
+    ----------
+    rank: float
+        The rank of the last row on the page.
+    row_id: int
+        The id of the last row on the page.
+
+    Returns
+    -------
+    str:
+        An opaque, url safe cursor.
+    """
+    data = json.dumps([rank, row_id]).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor into the position of a row in ranked results.
+
+    Parameters
+    ----------
+    cursor: str
+        The cursor returned with the previous page.
+
+    Raises
+    ------
+    ValueError:
+        When the cursor is malformed.
+    TypeError:
+        When the cursor is not a string.
+
+    Returns
+    -------
+    Tuple[float, int]:
+        The rank and id of the last row on the previous page.
+    """
+    if not isinstance(cursor, str):
+        raise TypeError("The cursor has to be a string.")
+    try:
+        rank, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("The cursor is not valid.") from None
+
+
+def paginate_ranked(
+    query: Query, rank, id_column, limit: int, cursor: Optional[str] = None
+) -> Tuple[list, Optional[str]]:
+    """Fetch a single page of a query ordered by a rank, best first.
+
+    Parameters
+    ----------
+    query: Query
+        The filtered query to paginate. Its rows have to start
+        with the entity and include the rank labelled 'rank'.
+    rank:
+        The rank expression to order by.
+    id_column:
+        The primary key column used to break ties.
+    limit: int
+        The page size.
+    cursor: str, optional
+        The cursor returned with the previous page.
+
+    Returns
+    -------
+    Tuple[list, str]:
+        The rows on the page and the cursor for the next page,
+        which is None on the last page.
+    """
+    if cursor:
+        query = query.filter(
+            tuple_(rank, id_column) < tuple_(*decode_rank_cursor(cursor))
+        )
+    rows = query.order_by(rank.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_rank_cursor(last.rank, getattr(last[0], id_column.key))
@@ -0,0 +1,736 @@
+# -*- coding: utf-8 -*-
+"""This module declares the storage of the uploaded images.
+
+The backend is chosen with STORAGE_BACKEND:
+- s3: the images are streamed to S3_BUCKET with a multipart upload,
+  STORAGE_PART_SIZE bytes at a time, so the memory used does not grow
+  with the size of the image. The url is returned once the upload
+  completes, within the request.
+- local: the images are written to STORAGE_LOCAL_FOLDER and served
+  from STORAGE_LOCAL_URL, for the tests and the development.
+- queue: the images are saved to UPLOAD_FOLDER and a message sent to
+  the queue at QUEUE_URL has the lambda fetch them from /image,
+  upload them to s3 and remove them through /delete.
+
+The s3 and local backends also take uploads straight from the
+clients, so the workers are not held by slow uploads. The client
+asks for an upload url, posts the image to it along with the signed
+fields, then attaches the key of the image to an article. The image
+is then checked from its metadata and its first bytes: its size has
+to be within STORAGE_UPLOAD_MAX_SIZE and its content has to match
+its type. The images failing the checks are deleted.
+
+The images are stored under the SHA-256 digest of their content, see
+api.article.models.image. The images posted to the app are hashed
+while their form is parsed, by the DigestRequest the app uses, so
+they are not read again. The clients uploading straight to the
+storage post the checksum of their image in the
+x-amz-checksum-sha256 field. S3 rejects the image if the checksum
+does not match and keeps it otherwise, so it is read back with the
+metadata and the image itself never goes through the app.
+
+Has the following classes:
+1. S3Backend:
+    Streams the images to an S3 bucket.
+2. LocalBackend:
+    Writes the images to a local folder.
+3. QueueBackend:
+    Has the lambda upload the images saved to the server.
+4. Storage:
+    Stores the uploaded images with the configured backend.
+5. DigestStream:
+    Hashes an uploaded file while it is written.
+6. DigestRequest:
+    Hashes the uploaded files while the form is parsed.
+
+Has the following functions:
+1. content_digest():
+    Hashes an image, reading it a buffer at a time unless it was
+    hashed while uploaded.
+2. checksum_digest():
+    Gets the digest of an image from its base64 checksum.
+"""
+import base64
+import binascii
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import shutil
+import uuid
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from botocore.exceptions import ClientError
+from flask import Request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from werkzeug.datastructures import FileStorage
+
+from ..config.logger import app_logger
+from ..extensions.extensions import s3, sqs_client
+
+# The smallest part S3 accepts, but for the last one.
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+CONTENT_TYPES = {"png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg"}
+
+# The first bytes of the files of each type.
+SIGNATURES = {"image/png": b"\x89PNG\r\n\x1a\n", "image/jpeg": b"\xff\xd8\xff"}
+
+# The keys of the images uploaded by the clients.
+UPLOAD_KEY = re.compile(r"^[0-9a-f]{32}\.[a-z]+$")
+
+# The field of the upload forms holding the base64 SHA-256 of the image.
+CHECKSUM_FIELD = "x-amz-checksum-sha256"
+
+
+def content_digest(stream: BinaryIO) -> Tuple[str, int]:
+    """Hash an image, reading it a buffer at a time.
+
+    The images hashed while they were uploaded are not read. The
+    stream is rewound before and after, when it can be.
+
+    Returns
+    -------
+    tuple:
+        The SHA-256 hex digest and the number of bytes of the image.
+    """
+    if isinstance(stream, DigestStream):
+        return stream.digest()
+    if stream.seekable():
+        stream.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(COPY_BUFFER_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    if stream.seekable():
+        stream.seek(0)
+    return digest.hexdigest(), size
+
+
+def checksum_digest(checksum: Optional[str]) -> Optional[str]:
+    """Get the hex digest of an image from its base64 SHA-256 checksum.
+
+    Returns
+    -------
+    str:
+        The digest, or None if the checksum is missing or invalid.
+    """
+    if not checksum:
+        return None
+    try:
+        digest = base64.b64decode(checksum, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if len(digest) != hashlib.sha256().digest_size:
+        return None
+    return digest.hex()
+
+
+class S3Backend:
+    """Stream the images to an S3 bucket.
+
+    The images smaller than a part are sent with a single request,
+    the others with a multipart upload, which is aborted if a part
+    fails so the bucket is not billed for the parts already sent.
+
+    Parameters
+    ----------
+    client:
+        A boto3 S3 client.
+    bucket: str
+        The name of the bucket.
+    location: str
+        The url the keys are appended to.
+    part_size: int
+        The number of bytes read and sent at a time.
+    """
+
+    ACL = "public-read"
+
+    def __init__(self, client, bucket: str, location: str, part_size: int):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"The part size has to be at least {MIN_PART_SIZE} bytes.")
+        self.client = client
+        self.bucket = bucket
+        self.location = location
+        self.part_size = part_size
+
+    def save(self, stream: BinaryIO, key: str, content_type: str) -> str:
+        """Upload an image, returning its url."""
+        part = stream.read(self.part_size)
+        if len(part) < self.part_size:
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=part,
+                ContentType=content_type,
+                ACL=self.ACL,
+            )
+            return self.url(key)
+        upload_id = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, ContentType=content_type, ACL=self.ACL
+        )["UploadId"]
+        parts = []
+        try:
+            while part:
+                number = len(parts) + 1
+                response = self.client.upload_part(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    Body=part,
+                )
+                parts.append({"ETag": response["ETag"], "PartNumber": number})
+                part = stream.read(self.part_size)
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except Exception:
+            app_logger.exception(f"Failed to upload {key}")
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id
+            )
+            raise
+        return self.url(key)
+
+    def read(self, key: str) -> bytes:
+        """Download an image."""
+        return self.open(key).read()
+
+    def open(self, key: str) -> BinaryIO:
+        """Open the download of an image."""
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def keys(self) -> Iterator[Tuple[str, datetime]]:
+        """List the keys in the bucket along with their last change."""
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket):
+            for item in page.get("Contents", []):
+                yield item["Key"], item["LastModified"]
+
+    def copy(self, source: str, key: str) -> str:
+        """Copy an image within the bucket, returning the url of the copy."""
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": source},
+            ACL=self.ACL,
+        )
+        return self.url(key)
+
+    def delete(self, key: str) -> None:
+        """Delete an image."""
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def presign(self, key: str, content_type: str, max_size: int, expires: int) -> dict:
+        """Sign the form a client posts an image with.
+
+        The bucket itself rejects the images of another type, larger
+        than max_size or posted without their checksum, or with
+        another one.
+        """
+        fields = {"acl": self.ACL, "Content-Type": content_type}
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields=fields,
+            Conditions=[
+                {"acl": self.ACL},
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size],
+                ["starts-with", f"${CHECKSUM_FIELD}", ""],
+            ],
+            ExpiresIn=expires,
+        )
+
+    def head(self, key: str, length: int) -> Optional[dict]:
+        """Get the size, type, digest and first bytes of an image.
+
+        The digest comes from the checksum S3 verified the image
+        against when it was posted.
+
+        Returns
+        -------
+        dict:
+            The metadata, or None if there is no such image.
+        """
+        try:
+            metadata = self.client.head_object(
+                Bucket=self.bucket, Key=key, ChecksumMode="ENABLED"
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in {"404", "NoSuchKey"}:
+                return None
+            raise
+        prefix = self.client.get_object(
+            Bucket=self.bucket, Key=key, Range=f"bytes=0-{length - 1}"
+        )["Body"].read()
+        return {
+            "size": metadata["ContentLength"],
+            "content type": metadata.get("ContentType"),
+            "digest": checksum_digest(metadata.get("ChecksumSHA256")),
+            "prefix": prefix,
+        }
+
+    def url(self, key: str) -> str:
+        """Get the url of an image."""
+        return self.location + key
+
+
+class LocalBackend:
+    """Write the images to a local folder.
+
+    An image is written to a temporary file which is then renamed, so
+    a failed upload never leaves a partial image behind. The clients
+    upload to the app itself, with a signed token standing for the
+    policy of an S3 presigned post.
+
+    Parameters
+    ----------
+    folder: str
+        The folder the images are written to.
+    location: str
+        The url the keys are appended to.
+    secret_key: str
+        The key the upload tokens are signed with.
+    """
+
+    def __init__(self, folder: str, location: str, secret_key: str):
+        self.folder = folder
+        self.location = location
+        self.serializer = URLSafeTimedSerializer(secret_key, salt="image upload")
+        os.makedirs(folder, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        """Get the path of an image."""
+        return os.path.join(self.folder, key)
+
+    def save(self, stream: BinaryIO, key: str, content_type: str) -> str:
+        """Write an image, returning its url."""
+        partial = self.path(f".{key}.part")
+        try:
+            with open(partial, "wb") as file:
+                shutil.copyfileobj(stream, file, COPY_BUFFER_SIZE)
+            os.replace(partial, self.path(key))
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return self.url(key)
+
+    def read(self, key: str) -> bytes:
+        """Read an image."""
+        with open(self.path(key), "rb") as file:
+            return file.read()
+
+    def open(self, key: str) -> BinaryIO:
+        """Open an image."""
+        return open(self.path(key), "rb")
+
+    def keys(self) -> Iterator[Tuple[str, datetime]]:
+        """List the keys in the folder along with their last change."""
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    modified = entry.stat().st_mtime
+                    yield entry.name, datetime.fromtimestamp(modified, timezone.utc)
+
+    def copy(self, source: str, key: str) -> str:
+        """Copy an image, returning the url of the copy."""
+        with open(self.path(source), "rb") as file:
+            return self.save(file, key, mimetypes.guess_type(key)[0])
+
+    def delete(self, key: str) -> None:
+        """Delete an image, if it exists."""
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def presign(self, key: str, content_type: str, max_size: int, expires: int) -> dict:
+        """Sign the form a client posts an image with."""
+        token = self.serializer.dumps(
+            {
+                "key": key,
+                "content type": content_type,
+                "max size": max_size,
+                "expires": expires,
+            }
+        )
+        return {
+            "url": self.url(key),
+            "fields": {"Content-Type": content_type, "token": token},
+        }
+
+    def receive(self, key: str, fields: dict, file: FileStorage) -> None:
+        """Write an image posted by a client.
+
+        Raises
+        ------
+        PermissionError:
+            When the token is invalid, expired or for another image.
+        ValueError:
+            When the image is missing, of another type, too large or
+            does not match its checksum.
+        """
+        try:
+            policy, signed = self.serializer.loads(
+                fields.get("token", ""), return_timestamp=True
+            )
+        except BadSignature as e:
+            raise PermissionError("The upload token is invalid.") from e
+        if (datetime.now(timezone.utc) - signed).total_seconds() > policy["expires"]:
+            raise PermissionError("The upload token has expired.")
+        if policy["key"] != key:
+            raise PermissionError("The upload token is for another image.")
+        if fields.get("Content-Type") != policy["content type"]:
+            raise ValueError(f"The image has to be of type {policy['content type']}.")
+        if not file:
+            raise ValueError("The file has to be provided!")
+        size = file.stream.seek(0, os.SEEK_END)
+        file.stream.seek(0)
+        if not 0 < size <= policy["max size"]:
+            raise ValueError(f"The image has to be at most {policy['max size']} bytes.")
+        digest, _ = content_digest(file.stream)
+        if checksum_digest(fields.get(CHECKSUM_FIELD)) != digest:
+            raise ValueError(f"The {CHECKSUM_FIELD} field has to be that of the image.")
+        self.save(file.stream, key, policy["content type"])
+
+    def head(self, key: str, length: int) -> Optional[dict]:
+        """Get the size, type, digest and first bytes of an image.
+
+        The images are only received with their checksum verified, and
+        hashed again here from the folder, which holds no metadata.
+
+        Returns
+        -------
+        dict:
+            The metadata, or None if there is no such image.
+        """
+        try:
+            with open(self.path(key), "rb") as file:
+                prefix = file.read(length)
+                digest, size = content_digest(file)
+        except FileNotFoundError:
+            return None
+        return {
+            "size": size,
+            "content type": mimetypes.guess_type(key)[0],
+            "digest": digest,
+            "prefix": prefix,
+        }
+
+    def url(self, key: str) -> str:
+        """Get the url of an image."""
+        return self.location + key
+
+
+class QueueBackend:
+    """Have the lambda upload the images saved to the server.
+
+    The url is returned before the image is uploaded, and is empty
+    when the queue does not accept the message.
+
+    Parameters
+    ----------
+    client:
+        A boto3 SQS client.
+    queue_url: str
+        The url of the queue the lambda reads.
+    folder: str
+        The folder the images are saved to until they are uploaded.
+    location: str
+        The url of the bucket the lambda uploads the images to.
+    """
+
+    def __init__(self, client, queue_url: str, folder: str, location: str):
+        self.client = client
+        self.queue_url = queue_url
+        self.folder = folder
+        self.location = location
+
+    def notify(self, key: str, action: str) -> bool:
+        """Send the action to take on an image to the queue.
+
+        Returns
+        -------
+        bool:
+            True if the message was sent else False.
+        """
+        response = self.client.send_message(
+            QueueUrl=self.queue_url, MessageBody=json.dumps({action: key})
+        )
+        return response["ResponseMetadata"]["HTTPStatusCode"] == 200
+
+    def save(self, stream: BinaryIO, key: str, content_type: str) -> str:
+        """Save an image and have it uploaded, returning its url."""
+        with open(os.path.join(self.folder, key), "wb") as file:
+            shutil.copyfileobj(stream, file, COPY_BUFFER_SIZE)
+        if self.notify(key, "create"):
+            return self.url(key)
+        return ""
+
+    def read(self, key: str) -> bytes:
+        """Reject the reads, the images being on the lambda's bucket."""
+        raise ValueError("The images cannot be read back from the queue storage.")
+
+    def open(self, key: str) -> BinaryIO:
+        """Reject the reads, the images being on the lambda's bucket."""
+        raise ValueError("The images cannot be read back from the queue storage.")
+
+    def keys(self) -> Iterator[Tuple[str, datetime]]:
+        """Reject the listing, the images being on the lambda's bucket."""
+        raise ValueError("The images cannot be listed in the queue storage.")
+
+    def copy(self, source: str, key: str) -> str:
+        """Reject the copies, the images being on the lambda's bucket."""
+        raise ValueError("The images cannot be copied in the queue storage.")
+
+    def delete(self, key: str) -> None:
+        """Have an image deleted from the bucket."""
+        self.notify(key, "delete")
+
+    def presign(self, key: str, content_type: str, max_size: int, expires: int) -> dict:
+        """Reject the uploads from the clients, which the lambda cannot
+        see."""
+        raise ValueError("The direct uploads need the s3 or local storage.")
+
+    def head(self, key: str, length: int) -> Optional[dict]:
+        """Reject the uploads from the clients."""
+        raise ValueError("The direct uploads need the s3 or local storage.")
+
+    def url(self, key: str) -> str:
+        """Get the url of an image."""
+        return self.location + key
+
+
+class Storage:
+    """Store the uploaded images with the configured backend."""
+
+    def __init__(self):
+        self.backend = None
+        self.max_size = 0
+        self.expires = 0
+        self.extensions = set()
+
+    def init_app(self, app):
+        """Create the backend configured for the app."""
+        config = app.config
+        if config["STORAGE_BACKEND"] == "s3":
+            self.backend = S3Backend(
+                s3,
+                config["S3_BUCKET"],
+                config["S3_LOCATION"],
+                config["STORAGE_PART_SIZE"],
+            )
+        elif config["STORAGE_BACKEND"] == "local":
+            self.backend = LocalBackend(
+                config["STORAGE_LOCAL_FOLDER"],
+                config["STORAGE_LOCAL_URL"],
+                config["SECRET_KEY"],
+            )
+        elif config["STORAGE_BACKEND"] == "queue":
+            self.backend = QueueBackend(
+                sqs_client,
+                os.environ["QUEUE_URL"],
+                config["UPLOAD_FOLDER"],
+                config["S3_LOCATION"],
+            )
+        else:
+            raise ValueError(f'Unknown STORAGE_BACKEND {config["STORAGE_BACKEND"]}')
+        self.max_size = config["STORAGE_UPLOAD_MAX_SIZE"]
+        self.expires = config["STORAGE_UPLOAD_EXPIRES_SECONDS"]
+        self.extensions = {
+            extension
+            for extension in config["ALLOWED_EXTENSIONS"]
+            if extension in CONTENT_TYPES
+        }
+        app.request_class = DigestRequest
+        app.extensions["storage"] = self
+
+    def save(self, file: FileStorage, key: str, content_type: str) -> str:
+        """Store an uploaded image.
+
+        Parameters
+        ----------
+        file: FileStorage
+            The uploaded image, read from its start.
+        key: str
+            The key the image is stored under.
+        content_type: str
+            The type of the image e.g 'image/png'
+
+        Returns
+        -------
+        str:
+            The url of the image.
+        """
+        if file.stream.seekable():
+            file.stream.seek(0)
+        return self.backend.save(file.stream, key, content_type)
+
+    def url(self, key: str) -> str:
+        """Get the url an image is stored at."""
+        return self.backend.url(key)
+
+    def read(self, url: str) -> bytes:
+        """Read a stored image given its url."""
+        return self.backend.read(os.path.basename(url))
+
+    def open(self, url: str) -> BinaryIO:
+        """Open a stored image given its url."""
+        return self.backend.open(os.path.basename(url))
+
+    def copy(self, url: str, key: str) -> str:
+        """Copy a stored image given its url, returning the url of the
+        copy."""
+        return self.backend.copy(os.path.basename(url), key)
+
+    def keys(self) -> Iterator[Tuple[str, datetime]]:
+        """List the stored keys along with their last change."""
+        return self.backend.keys()
+
+    def put(self, data: bytes, key: str, content_type: str) -> str:
+        """Store an image generated by the app, returning its url."""
+        return self.backend.save(io.BytesIO(data), key, content_type)
+
+    def delete(self, url: str) -> None:
+        """Delete a stored image given its url."""
+        self.backend.delete(os.path.basename(url))
+
+    def upload_url(self, content_type: str) -> dict:
+        """Sign the upload of an image by a client.
+
+        Parameters
+        ----------
+        content_type: str
+            The type of the image e.g 'image/png'
+
+        Raises
+        ------
+        ValueError:
+            When the type is not allowed.
+
+        Returns
+        -------
+        dict:
+            The key of the image, the url it is posted to, the fields
+            posted along with it and the number of seconds they are
+            valid for. The client adds the base64 SHA-256 of the image
+            to the fields, as x-amz-checksum-sha256.
+        """
+        extensions = [
+            extension
+            for extension in sorted(self.extensions)
+            if CONTENT_TYPES[extension] == content_type
+        ]
+        if not extensions:
+            allowed = sorted(
+                {CONTENT_TYPES[extension] for extension in self.extensions}
+            )
+            raise ValueError(f"The type has to be one of {allowed}")
+        key = f"{uuid.uuid4().hex}.{extensions[0]}"
+        form = self.backend.presign(key, content_type, self.max_size, self.expires)
+        return {
+            "key": key,
+            "url": form["url"],
+            "fields": form["fields"],
+            "expires in": self.expires,
+        }
+
+    def verify(self, key: str) -> Tuple[str, str, int]:
+        """Check an image uploaded by a client.
+
+        Parameters
+        ----------
+        key: str
+            The key the upload url was signed for.
+
+        Raises
+        ------
+        ValueError:
+            When the image was not uploaded, is too large, has no
+            checksum or its content does not match its type.
+
+        Returns
+        -------
+        tuple:
+            The url, the SHA-256 hex digest and the number of bytes of
+            the image.
+        """
+        if not isinstance(key, str) or not UPLOAD_KEY.match(key):
+            raise ValueError("The image key is invalid.")
+        extension = key.rsplit(".", 1)[1]
+        if extension not in self.extensions:
+            raise ValueError("The image key is invalid.")
+        content_type = CONTENT_TYPES[extension]
+        signature = SIGNATURES[content_type]
+        metadata = self.backend.head(key, len(signature))
+        if metadata is None:
+            raise ValueError(f"The image {key} has not been uploaded.")
+        if metadata["size"] > self.max_size:
+            self.backend.delete(key)
+            raise ValueError(f"The image has to be at most {self.max_size} bytes.")
+        prefix = metadata["prefix"]
+        if metadata["content type"] != content_type or not prefix.startswith(signature):
+            self.backend.delete(key)
+            raise ValueError(f"The image has to be of type {content_type}.")
+        if metadata["digest"] is None:
+            self.backend.delete(key)
+            raise ValueError(f"The image has to be posted with its {CHECKSUM_FIELD}.")
+        return self.backend.url(key), metadata["digest"], metadata["size"]
+
+
+class DigestStream:
+    """Hash an uploaded file while it is written.
+
+    The writes go to the wrapped stream, which is read from as is.
+
+    Parameters
+    ----------
+    stream: BinaryIO
+        The stream the form parser writes the file to.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        """Hash and write a part of the file."""
+        self.hash.update(data)
+        self.size += len(data)
+        return self.stream.write(data)
+
+    def digest(self) -> Tuple[str, int]:
+        """Get the SHA-256 hex digest and the number of bytes written."""
+        return self.hash.hexdigest(), self.size
+
+    def __iter__(self):
+        return iter(self.stream)
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+
+class DigestRequest(Request):
+    """Hash the uploaded files while the form is parsed."""
+
+    def _get_file_stream(self, *args, **kwargs) -> BinaryIO:
+        return DigestStream(super()._get_file_stream(*args, **kwargs))
+
+
+storage = Storage()
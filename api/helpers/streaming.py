@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""This module declares the helpers used to stream large json lists.
+
+The rows are fetched through a server side cursor, STREAM_BATCH_SIZE
+at a time, and each batch is serialized and sent before the next one
+is fetched. The memory used does not grow with the number of rows,
+and the client receives the first rows while the query is still
+running. The response code and headers are sent before the rows, so
+a failure midway can only cut the body short.
+
+Has the following functions:
+1. validate_stream():
+    Checks whether a streamed response was requested.
+2. json_rows():
+    Serializes the rows of a query into json chunks.
+3. stream_response():
+    Builds the response sending the chunks as they are produced.
+"""
+from typing import Iterator, Optional
+
+from flask import Response, current_app, stream_with_context
+from sqlalchemy.orm import Query
+
+from ..config.logger import app_logger
+
+
+def validate_stream(stream: Optional[str]) -> bool:
+    """Check whether a streamed response was requested.
+
+    Parameters
+    ----------
+    stream: str, optional
+        Either 'true' or 'false'.
+
+    Raises
+    ------
+    ValueError:
+        When the value is neither 'true' nor 'false'.
+
+    Returns
+    -------
+    bool:
+        True if the response has to be streamed else False.
+    """
+    if not stream:
+        return False
+    if not isinstance(stream, str) or stream.lower() not in {"true", "false"}:
+        raise ValueError("The stream has to be either true or false.")
+    return stream.lower() == "true"
+
+
+def json_rows(
+    query: Query, schema, prefix: str = "[", suffix: str = "]"
+) -> Iterator[str]:
+    """Serialize the rows of a query into json chunks.
+
+    Parameters
+    ----------
+    query: Query
+        The ordered query.
+    schema:
+        The schema dumping a single row.
+    prefix: str
+        The json preceding the rows, which opens the array.
+    suffix: str
+        The json following the rows, which closes the array.
+
+    Returns
+    -------
+    Iterator[str]:
+        The prefix, then a chunk per batch of rows, then the suffix.
+    """
+    batch_size = current_app.config["STREAM_BATCH_SIZE"]
+    rows = query.execution_options(stream_results=True).yield_per(batch_size)
+    yield prefix
+    separator, batch = "", []
+    try:
+        for row in rows:
+            batch.append(current_app.json.dumps(schema.dump(row)))
+            if len(batch) == batch_size:
+                yield separator + ",".join(batch)
+                separator, batch = ",", []
+        if batch:
+            yield separator + ",".join(batch)
+    except Exception:
+        app_logger.exception("Failed to stream the rows")
+        raise
+    yield suffix
+
+
+def stream_response(chunks: Iterator[str]) -> Response:
+    """Build the response sending the chunks as they are produced.
+
+    The request context, along with the database session, is kept
+    until the last chunk is sent.
+    """
+    return Response(stream_with_context(chunks), mimetype="application/json")
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""This module declares the queue of the article images waiting for
+their resized copies.
+
+The images used to get their copies from the next run of the
+generate_image_variants command only, so a new article had no srcset
+until then. The articles whose image is set are now queued once the
+request commits, and a background thread of the worker makes their
+copies one at a time.
+
+An article queued but not yet processed when the worker exits is
+left to the next run of generate_image_variants, and at most
+VARIANT_QUEUE_MAX_SIZE articles are held; the articles queued past
+that are dropped and counted, and also left to the command.
+
+Has the following classes:
+1. VariantQueue:
+    Queues the articles and makes the copies of their images.
+"""
+import os
+import queue
+import threading
+
+from ..config.logger import app_logger
+from ..extensions import db
+from .images import generate_article_variants
+
+
+class VariantQueue:
+    """Queue articles and make the copies of their images.
+
+    Attributes
+    ----------
+    pending: queue.Queue
+        The ids of the articles waiting for their copies.
+    dropped: int
+        The number of articles dropped because the queue was full.
+    processed: int
+        The number of articles gone through.
+    failed: int
+        The number of articles whose copies could not be made.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.pending = queue.Queue()
+        self.dropped = 0
+        self.processed = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+        self.worker = None
+        self.pid = None
+
+    def init_app(self, app):
+        """Attach the queue to the app."""
+        self.app = app
+        self.pending = queue.Queue(app.config["VARIANT_QUEUE_MAX_SIZE"])
+        app.extensions["variant_queue"] = self
+
+    def enqueue(self, article_id: int) -> None:
+        """Queue an article whose image was set.
+
+        Parameters
+        ----------
+        article_id: int
+            The article id.
+        """
+        if not self.app.config["VARIANT_QUEUE_ENABLED"]:
+            return
+        self.start()
+        try:
+            self.pending.put_nowait(article_id)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        """Start the thread of the current process.
+
+        Threads do not survive a fork, so each worker starts its own
+        on the first article it queues.
+        """
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pending = queue.Queue(self.app.config["VARIANT_QUEUE_MAX_SIZE"])
+            self.worker = threading.Thread(
+                target=self.run, name="variant-queue", daemon=True
+            )
+            self.worker.start()
+            self.pid = os.getpid()
+
+    def run(self) -> None:
+        """Make the copies of the queued articles, forever."""
+        while True:
+            self.process(self.pending.get())
+
+    def process(self, article_id: int) -> None:
+        """Make the copies of the image of a queued article.
+
+        Parameters
+        ----------
+        article_id: int
+            The article id.
+        """
+        with self.app.app_context():
+            try:
+                stats = generate_article_variants(article_id)
+            except Exception:
+                db.session.rollback()
+                app_logger.exception(f"Failed to make the copies of {article_id}")
+                self.failed += 1
+            else:
+                self.failed += stats.failed
+            finally:
+                db.session.remove()
+        self.processed += 1
+
+    def drain(self) -> int:
+        """Make the copies of the articles queued so far, in the
+        calling thread.
+
+        Returns
+        -------
+        int:
+            The number of articles gone through.
+        """
+        drained = 0
+        while True:
+            try:
+                article_id = self.pending.get_nowait()
+            except queue.Empty:
+                return drained
+            self.process(article_id)
+            drained += 1
+
+    def stats(self) -> dict:
+        """Get the state of the queue.
+
+        Returns
+        -------
+        dict:
+            The queue depth and the number of articles processed,
+            failed and dropped.
+        """
+        return {
+            "queue_depth": self.pending.qsize(),
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+variant_queue = VariantQueue()
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""This module declares the write-behind recorder of article views.
+
+Reading an article used to insert a view and commit on the request
+path. The views are now appended to an in-process buffer and a
+background thread writes them to the database in batches, either
+once VIEW_FLUSH_SIZE views are buffered or every
+VIEW_FLUSH_INTERVAL_SECONDS, whichever comes first. The buffer is
+flushed one last time when the worker exits.
+
+A view that is buffered but not yet written is lost if the worker
+is killed, and at most VIEW_BUFFER_MAX_SIZE views are held when
+the database is unavailable; views recorded past that are dropped
+and counted.
+
+Has the following classes:
+1. ViewRecorder:
+    Buffers the views and writes them in batches.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, insert, update
+
+from ..article.models.article import Article
+from ..article.models.views import View
+from ..author.models.author import Author
+from ..config.logger import app_logger
+from ..extensions import db
+
+
+class ViewRecorder:
+    """Buffer article views and write them in batches.
+
+    Attributes
+    ----------
+    buffer: list
+        The views waiting to be written.
+    dropped: int
+        The number of views dropped because the buffer was full.
+    flushes: int
+        The number of batches written.
+    last_flush_ms: float
+        How long the last batch took to write.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.buffer = []
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.worker = None
+        self.pid = None
+        self.exit_registered = False
+
+    def init_app(self, app):
+        """Attach the recorder to the app."""
+        self.app = app
+        app.extensions["view_recorder"] = self
+
+    def record(self, article_id: int, author_id: int) -> None:
+        """Buffer a view of an article by an author.
+
+        Parameters
+        ----------
+        article_id: int
+            The id of the article that was read.
+        author_id: int
+            The id of the author who read it.
+        """
+        self.start()
+        view = {
+            "article_id": article_id,
+            "author_id": author_id,
+            "date": datetime.utcnow(),
+        }
+        with self.lock:
+            if len(self.buffer) >= current_app.config["VIEW_BUFFER_MAX_SIZE"]:
+                self.dropped += 1
+                return
+            self.buffer.append(view)
+            depth = len(self.buffer)
+        if depth >= current_app.config["VIEW_FLUSH_SIZE"]:
+            self.wakeup.set()
+
+    def start(self) -> None:
+        """Start the flushing thread of the current process.
+
+        Threads do not survive a fork, so each worker starts its own
+        on the first view it records. The exit handler is registered
+        once, the forked workers inherit it and close only stops the
+        thread of the process it runs in.
+        """
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.buffer = []
+            self.worker = threading.Thread(
+                target=self.run, name="view-recorder", daemon=True
+            )
+            self.worker.start()
+            self.pid = os.getpid()
+            if not self.exit_registered:
+                atexit.register(self.close)
+                self.exit_registered = True
+
+    def run(self) -> None:
+        """Flush the buffer until the recorder is closed."""
+        interval = self.app.config["VIEW_FLUSH_INTERVAL_SECONDS"]
+        while not self.stopped.is_set():
+            self.wakeup.wait(interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the buffered views and update the view counters.
+
+        The views are inserted with a single multi-row INSERT and
+        each counter is updated once per batch, in id order so that
+        concurrent workers lock the rows in the same order. The views
+        of articles or authors deleted since they were recorded are
+        dropped. When the write fails the views are put back in the
+        buffer.
+
+        Returns
+        -------
+        int:
+            The number of views written.
+        """
+        with self.lock:
+            views, self.buffer = self.buffer, []
+        if not views:
+            return 0
+        start = time.perf_counter()
+        with self.app.app_context():
+            try:
+                views = self.existing(views)
+                if views:
+                    self.write(views)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                app_logger.exception("Failed to write the buffered views")
+                with self.lock:
+                    room = self.app.config["VIEW_BUFFER_MAX_SIZE"] - len(self.buffer)
+                    self.dropped += max(len(views) - room, 0)
+                    self.buffer[:0] = views[:room]
+                return 0
+            finally:
+                db.session.remove()
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        return len(views)
+
+    @staticmethod
+    def write(views: list) -> None:
+        """Insert the views and add them to the view counters."""
+        db.session.execute(insert(View.__table__), views)
+        for model, column in ((Article, "article_id"), (Author, "author_id")):
+            deltas = Counter(view[column] for view in views)
+            table = model.__table__
+            db.session.execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values(views_count=table.c.views_count + bindparam("delta")),
+                [
+                    {"row_id": row_id, "delta": delta}
+                    for row_id, delta in sorted(deltas.items())
+                ],
+            )
+
+    @staticmethod
+    def existing(views: list) -> list:
+        """Leave out the views of articles or authors deleted since."""
+        article_ids = {view["article_id"] for view in views}
+        author_ids = {view["author_id"] for view in views}
+        article_ids = {
+            row_id
+            for (row_id,) in db.session.query(Article.id).filter(
+                Article.id.in_(article_ids)
+            )
+        }
+        author_ids = {
+            row_id
+            for (row_id,) in db.session.query(Author.id).filter(
+                Author.id.in_(author_ids)
+            )
+        }
+        return [
+            view
+            for view in views
+            if view["article_id"] in article_ids and view["author_id"] in author_ids
+        ]
+
+    def close(self) -> None:
+        """Stop the flushing thread and write the remaining views."""
+        if self.pid != os.getpid():
+            return
+        self.stopped.set()
+        self.wakeup.set()
+        self.worker.join()
+        self.flush()
+
+    def stats(self) -> dict:
+        """Get the state of the buffer.
+
+        Returns
+        -------
+        dict:
+            The buffer depth, the number of dropped views, the
+            number of batches written and the duration of the last.
+        """
+        return {
+            "buffer_depth": len(self.buffer),
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+view_recorder = ViewRecorder()
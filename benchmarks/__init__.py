@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""This package declares scripts that measure the api's database
+queries against seeded data.
+
+The scripts reset the database they run against, so they refuse
+to run outside the testing configuration unless forced.
+"""
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""This module measures the latency of the autocomplete suggestions.
+
+The database is seeded with articles, authors and tags, then a
+stream of prefixes is requested where a few prefixes are far more
+popular than the rest, as they are when people type. The latency
+percentiles are reported with the prefix cache disabled and enabled.
+The trigram indexes need the pg_trgm extension.
+
+Usage:
+    FLASK_ENV=testing python -m benchmarks.autocomplete --articles 1000000
+
+Has the following functions:
+1. parse_args():
+    Parses the command line arguments.
+2. seed():
+    Resets the database and fills it with generated rows.
+3. workload():
+    Draws the stream of requested prefixes.
+4. run():
+    Requests the suggestions and times each request.
+5. main():
+    Runs the benchmark and reports the results.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+from api import create_app, db
+from api.article.models import Tag
+from api.helpers.autocomplete import autocomplete, prefix_cache
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO authors (id, name, email_address, views_count)
+    SELECT i, initcap(substr(md5(i::text), 1, 7)) || ' ' || substr(md5(i::text), 8, 9),
+        'author' || i || '@example.com', (random() * 10000)::int
+    FROM generate_series(1, :authors) AS i
+    """,
+    """
+    INSERT INTO articles (id, author_id, title, text, tags, views_count)
+    SELECT i, 1 + i % :authors,
+        substr(md5(i::text), 1, 8) || ' ' || substr(md5(i::text), 9, 8),
+        'text ' || i,
+        ARRAY['tag' || substr(md5((i % :tags)::text), 1, 6)],
+        (random() * 10000)::int
+    FROM generate_series(1, :articles) AS i
+    """,
+    "SELECT setval('authors_id_seq', :authors)",
+    "SELECT setval('articles_id_seq', :articles)",
+    "ANALYZE",
+)
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--authors", type=int, default=100000)
+    parser.add_argument("--articles", type=int, default=1000000)
+    parser.add_argument("--tags", type=int, default=20000)
+    parser.add_argument(
+        "--requests", type=int, default=5000, help="The number of prefixes requested."
+    )
+    parser.add_argument("--output", default="autocomplete.json")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run even when the app is not using the testing configuration.",
+    )
+    return parser.parse_args(argv)
+
+
+def seed(sizes: dict) -> None:
+    """Reset the database and fill it with generated rows.
+
+    Parameters
+    ----------
+    sizes: dict
+        The number of authors, articles and distinct tags.
+    """
+    db.drop_all()
+    db.create_all()
+    for statement in SEED_STATEMENTS:
+        db.session.execute(text(statement), sizes)
+    Tag.refresh()
+    db.session.commit()
+
+
+def workload(requests: int) -> list:
+    """Draw the stream of requested prefixes.
+
+    The prefixes are 2 to 4 characters long, like the first few
+    keystrokes, and their popularity follows a power law.
+
+    Parameters
+    ----------
+    requests: int
+        The number of prefixes to draw.
+
+    Returns
+    -------
+    list:
+        The (kind, prefix) pairs in request order.
+    """
+    rng = random.Random(42)
+    alphabet = "0123456789abcdef"
+    prefixes = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(2, 4)))
+        for _ in range(2000)
+    ]
+    stream = []
+    for _ in range(requests):
+        rank = min(int(rng.paretovariate(1.2)) - 1, len(prefixes) - 1)
+        kind = rng.choice(("title", "author", "tag"))
+        prefix = prefixes[rank]
+        stream.append((kind, f"tag{prefix}" if kind == "tag" else prefix))
+    return stream
+
+
+def run(stream: list, cache: bool) -> dict:
+    """Request the suggestions and time each request.
+
+    Parameters
+    ----------
+    stream: list
+        The (kind, prefix) pairs to request.
+    cache: bool
+        Whether the prefix cache is used.
+
+    Returns
+    -------
+    dict:
+        The latency percentiles in milliseconds and the cache hit rate.
+    """
+    prefix_cache.clear()
+    prefix_cache.hits = prefix_cache.misses = 0
+    timings = []
+    for kind, prefix in stream:
+        if not cache:
+            prefix_cache.clear()
+        start = time.perf_counter()
+        autocomplete(prefix, kind)
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.rollback()
+    cuts = statistics.quantiles(timings, n=100)
+    return {
+        "p50 ms": round(cuts[49], 3),
+        "p95 ms": round(cuts[94], 3),
+        "p99 ms": round(cuts[98], 3),
+        "hit rate": round(prefix_cache.hits / len(stream), 3),
+    }
+
+
+def main(argv: list) -> None:
+    """Run the benchmark and report the results."""
+    args = parse_args(argv)
+    app = create_app()
+    if not app.config["TESTING"] and not args.force:
+        sys.exit("This resets the database. Use FLASK_ENV=testing or --force.")
+    sizes = {"authors": args.authors, "articles": args.articles, "tags": args.tags}
+    stream = workload(args.requests)
+    with app.app_context():
+        seed(sizes)
+        results = {
+            "no cache": run(stream, cache=False),
+            "cache": run(stream, cache=True),
+        }
+
+    print(f"{'':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'hit rate':>10}")
+    for name, result in results.items():
+        print(f"{name:<10}" + "".join(f"{value:>10}" for value in result.values()))
+    with open(args.output, "w") as report:
+        json.dump({"sizes": sizes, "results": results}, report, indent=2)
+    print(f"Wrote the results to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
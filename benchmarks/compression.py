@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""This module measures the bytes on the wire and the CPU cost of
+compressing the list responses.
+
+The database is seeded with authors, articles with prose-like texts
+and the engagements of one article, then each list endpoint is
+requested through the app once per available encoding. For each
+endpoint and encoding, the size of the body, the compression ratio,
+the median CPU time of the request and the median CPU time of
+compressing the body alone are reported.
+
+Usage:
+    FLASK_ENV=testing python -m benchmarks.compression --articles 20000
+
+Has the following functions:
+1. parse_args():
+    Parses the command line arguments.
+2. seed():
+    Resets the database and fills it with generated rows.
+3. encode_time():
+    Times the compression of a body.
+4. measure():
+    Requests an endpoint with each encoding and times it.
+5. main():
+    Runs the benchmark and reports the results.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+
+from api import create_app, db
+from api.helpers.compression import ENCODERS, LEVELS
+
+WORDS = (
+    "the article of a blog post about python flask postgres index query "
+    "cache latency throughput request response json author comment like"
+).split()
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO authors (id, name, email_address)
+    SELECT i, 'author ' || i, 'author' || i || '@example.com'
+    FROM generate_series(1, :authors) AS i
+    """,
+    """
+    INSERT INTO articles (id, author_id, title, text, date_published, tags)
+    SELECT i, 1 + i % :authors, 'title ' || i,
+        array_to_string(ARRAY(
+            SELECT (:words)[1 + (random() * (cardinality(:words) - 1))::int]
+            FROM generate_series(1, 60 + i % 2)
+        ), ' '),
+        now() - (i || ' minutes')::interval, ARRAY['tag' || i % 50]
+    FROM generate_series(1, :articles) AS i
+    """,
+    """
+    INSERT INTO comments (author_id, article_id, comment, date)
+    SELECT 1 + i % :authors, 1, 'comment ' || i,
+        now() - (i || ' seconds')::interval
+    FROM generate_series(1, :engagements) AS i
+    """,
+    """
+    INSERT INTO likes (author_id, article_id, date)
+    SELECT i, 1, now() - (i || ' seconds')::interval
+    FROM generate_series(1, least(:engagements, :authors)) AS i
+    """,
+    """
+    INSERT INTO bookmarks (author_id, article_id, date)
+    SELECT i, 1, now() - (i || ' seconds')::interval
+    FROM generate_series(1, least(:engagements, :authors)) AS i
+    """,
+    """
+    INSERT INTO views (author_id, article_id, date)
+    SELECT 1 + i % :authors, 1, now() - (i || ' seconds')::interval
+    FROM generate_series(1, :engagements) AS i
+    """,
+    "SELECT setval('authors_id_seq', :authors)",
+    "SELECT setval('articles_id_seq', :articles)",
+    "ANALYZE",
+)
+
+ENDPOINTS = (
+    "/article/articles?limit=100",
+    "/author/authors",
+    "/article/comments?id=1&limit=100",
+    "/article/likes?id=1&limit=100",
+    "/article/bookmarks?id=1&limit=100",
+    "/article/articles_views?id=1&limit=100",
+)
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--authors", type=int, default=2000)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument(
+        "--engagements",
+        type=int,
+        default=1000,
+        help="The number of each engagement of the first article.",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=20, help="The number of timed runs per request."
+    )
+    parser.add_argument("--output", default="compression.json")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run even when the app is not using the testing configuration.",
+    )
+    return parser.parse_args(argv)
+
+
+def seed(sizes: dict) -> None:
+    """Reset the database and fill it with generated rows.
+
+    Parameters
+    ----------
+    sizes: dict
+        The number of authors, articles and engagements.
+    """
+    db.drop_all()
+    db.create_all()
+    for statement in SEED_STATEMENTS:
+        db.session.execute(text(statement), {**sizes, "words": list(WORDS)})
+    db.session.commit()
+
+
+def encode_time(encoding: str, body: bytes, runs: int) -> float:
+    """Time the compression of a body.
+
+    Returns
+    -------
+    float:
+        The median CPU time in milliseconds.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.process_time()
+        encoder = ENCODERS[encoding](LEVELS[encoding])
+        encoder.compress(body)
+        encoder.flush()
+        timings.append((time.process_time() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def measure(client, headers: dict, url: str, runs: int) -> dict:
+    """Request an endpoint with each encoding and time it.
+
+    Parameters
+    ----------
+    client:
+        The app's test client.
+    headers: dict
+        The authorization headers.
+    url: str
+        The endpoint.
+    runs: int
+        The number of timed requests per encoding.
+
+    Returns
+    -------
+    dict:
+        The body size, the compression ratio, the median CPU time of
+        the request and of the compression alone, keyed by encoding.
+    """
+    results = {}
+    identity = None
+    algorithms = client.application.extensions["compression"].algorithms
+    for encoding in ["identity", *algorithms]:
+        timings = []
+        for _ in range(runs):
+            start = time.process_time()
+            response = client.get(url, headers={**headers, "Accept-Encoding": encoding})
+            timings.append((time.process_time() - start) * 1000)
+        if response.status_code != 200:
+            sys.exit(f"{url} answered {response.status_code}: {response.data[:200]}")
+        if encoding == "identity":
+            identity = response.data
+        results[encoding] = {
+            "bytes": len(response.data),
+            "ratio": round(len(identity) / len(response.data), 2),
+            "request cpu ms": round(statistics.median(timings), 3),
+            "compress cpu ms": (
+                0.0 if encoding == "identity" else encode_time(encoding, identity, runs)
+            ),
+        }
+    return results
+
+
+def main(argv: list) -> None:
+    """Run the benchmark and report the results."""
+    args = parse_args(argv)
+    app = create_app()
+    if not app.config["TESTING"] and not args.force:
+        sys.exit("This resets the database. Use FLASK_ENV=testing or --force.")
+    sizes = {
+        "authors": args.authors,
+        "articles": args.articles,
+        "engagements": args.engagements,
+    }
+    with app.app_context():
+        seed(sizes)
+        headers = {"Authorization": f"Bearer {create_access_token(identity=1)}"}
+    client = app.test_client()
+    results = {url: measure(client, headers, url, args.runs) for url in ENDPOINTS}
+
+    print(
+        f"{'endpoint':<40}{'encoding':>10}{'bytes':>10}{'ratio':>8}"
+        f"{'request ms':>12}{'compress ms':>13}"
+    )
+    for url, encodings in results.items():
+        for encoding, result in encodings.items():
+            print(
+                f"{url:<40}{encoding:>10}{result['bytes']:>10}{result['ratio']:>8}"
+                f"{result['request cpu ms']:>12}{result['compress cpu ms']:>13}"
+            )
+    with open(args.output, "w") as report:
+        json.dump(
+            {
+                "sizes": sizes,
+                "min size": app.extensions["compression"].min_size,
+                "levels": LEVELS,
+                "results": results,
+            },
+            report,
+            indent=2,
+        )
+    print(f"Wrote the results to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
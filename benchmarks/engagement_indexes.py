@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""This module measures the hot engagement queries with and without
+the indexes declared on the models.
+
+The database is seeded with authors, articles and engagements, then
+each query is run with EXPLAIN (ANALYZE, BUFFERS) after dropping the
+indexes and again after recreating them. The plan, the number of
+buffers touched and the median latency of each query are printed
+and written to a JSON report.
+
+Usage:
+    FLASK_ENV=testing python -m benchmarks.engagement_indexes --views 1000000
+
+Has the following functions:
+1. parse_args():
+    Parses the command line arguments.
+2. seed():
+    Resets the database and fills it with generated rows.
+3. handler_queries():
+    Builds the queries issued by the article and author handlers.
+4. render():
+    Renders a query as SQL with its parameters inlined.
+5. set_indexes():
+    Drops or creates the indexes and unique constraints declared
+    on the models.
+6. explain():
+    Runs a query with EXPLAIN (ANALYZE, BUFFERS) and times it.
+7. measure():
+    Explains all the handler queries.
+8. main():
+    Runs the benchmark and reports the results.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.schema import AddConstraint, CreateIndex, DropConstraint, DropIndex
+
+from api import create_app, db
+from api.article.models import Article, Bookmark, Comment, Like, View
+from api.helpers.pagination import page_query
+
+ENGAGEMENT_MODELS = (Article, View, Like, Comment, Bookmark)
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO authors (id, name, email_address)
+    SELECT i, 'author ' || i, 'author' || i || '@example.com'
+    FROM generate_series(1, :authors) AS i
+    """,
+    """
+    INSERT INTO articles (id, author_id, title, text, date_published, tags)
+    SELECT i, 1 + i % :authors, 'title ' || i, 'text ' || i,
+        now() - (i || ' minutes')::interval, ARRAY['tag' || i % 50]
+    FROM generate_series(1, :articles) AS i
+    """,
+    """
+    INSERT INTO views (author_id, article_id, date)
+    SELECT 1 + (random() * (:authors - 1))::int,
+        1 + (random() * (:articles - 1))::int,
+        now() - random() * interval '365 days'
+    FROM generate_series(1, :views)
+    """,
+    """
+    INSERT INTO likes (author_id, article_id, date)
+    SELECT 1 + i % :authors, 1 + (i / :authors) % :articles,
+        now() - random() * interval '365 days'
+    FROM generate_series(0, :likes - 1) AS i
+    """,
+    """
+    INSERT INTO bookmarks (author_id, article_id, date)
+    SELECT 1 + (i * 7) % :authors, 1 + (i / :authors) % :articles,
+        now() - random() * interval '365 days'
+    FROM generate_series(0, :bookmarks - 1) AS i
+    """,
+    """
+    INSERT INTO comments (author_id, article_id, comment, date)
+    SELECT 1 + (random() * (:authors - 1))::int,
+        1 + (random() * (:articles - 1))::int, 'comment ' || i,
+        now() - random() * interval '365 days'
+    FROM generate_series(1, :comments) AS i
+    """,
+    "SELECT setval('authors_id_seq', :authors)",
+    "SELECT setval('articles_id_seq', :articles)",
+)
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--authors", type=int, default=10000)
+    parser.add_argument("--articles", type=int, default=50000)
+    parser.add_argument("--views", type=int, default=1000000)
+    parser.add_argument("--likes", type=int, default=200000)
+    parser.add_argument("--bookmarks", type=int, default=100000)
+    parser.add_argument("--comments", type=int, default=200000)
+    parser.add_argument(
+        "--runs", type=int, default=20, help="The number of timed runs per query."
+    )
+    parser.add_argument("--output", default="engagement_indexes.json")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run even when the app is not using the testing configuration.",
+    )
+    return parser.parse_args(argv)
+
+
+def seed(sizes: dict) -> None:
+    """Reset the database and fill it with generated rows.
+
+    The likes and bookmarks are generated as distinct (author,
+    article) pairs, so they satisfy the unique constraints.
+
+    Parameters
+    ----------
+    sizes: dict
+        The number of rows of each table.
+    """
+    db.drop_all()
+    db.create_all()
+    for statement in SEED_STATEMENTS:
+        db.session.execute(text(statement), sizes)
+    db.session.commit()
+
+
+def handler_queries(sizes: dict) -> dict:
+    """Build the queries issued by the article and author handlers.
+
+    The ids are picked from the middle of the seeded ranges.
+
+    Parameters
+    ----------
+    sizes: dict
+        The number of rows of each table.
+
+    Returns
+    -------
+    dict:
+        The SQL of each query keyed by a description.
+    """
+    article_id = sizes["articles"] // 2
+    author_id = sizes["authors"] // 2
+    limit = 20
+    queries = {
+        "list articles": page_query(
+            Article.all_articles(), Article.date_published, Article.id, limit
+        ),
+        "list an author's articles": page_query(
+            Article.all_articles(author_id=author_id),
+            Article.date_published,
+            Article.id,
+            limit,
+        ),
+        "list an article's views": page_query(
+            View.for_article(article_id), View.date, View.id, limit
+        ),
+        "list an author's views of an article": page_query(
+            View.for_article(article_id, author_id), View.date, View.id, limit
+        ),
+        "list an article's comments": page_query(
+            Comment.for_article(article_id), Comment.date, Comment.id, limit
+        ),
+        "list an article's likes": page_query(
+            Like.for_article(article_id), Like.date, Like.id, limit
+        ),
+        "count an article's bookmarks": Bookmark.for_article(article_id)
+        .order_by(None)
+        .with_entities(db.func.count()),
+        "article stats": Article.stats_query([article_id]),
+        "batch article stats": Article.stats_query(
+            list(range(article_id, article_id + 100))
+        ),
+        "check for an existing like": Like.query.filter(
+            Like.author_id == author_id, Like.article_id == article_id
+        ).limit(1),
+    }
+    return {name: render(query) for name, query in queries.items()}
+
+
+def render(query) -> str:
+    """Render a query as SQL with its parameters inlined.
+
+    The driver quotes the parameters, so values SQLAlchemy cannot
+    render as literals, such as arrays, are supported.
+
+    Parameters
+    ----------
+    query: Query
+        The query.
+
+    Returns
+    -------
+    str:
+        The SQL of the query.
+    """
+    compiled = query.statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    cursor = db.session.connection().connection.cursor()
+    return cursor.mogrify(str(compiled), compiled.params).decode()
+
+
+def set_indexes(create: bool) -> None:
+    """Drop or create the indexes and unique constraints of the models.
+
+    Parameters
+    ----------
+    create: bool
+        Whether to create or to drop them.
+    """
+    for model in ENGAGEMENT_MODELS:
+        table = model.__table__
+        for index in table.indexes:
+            db.session.execute(CreateIndex(index) if create else DropIndex(index))
+        for constraint in table.constraints:
+            if constraint.name and constraint.name.startswith("uq_"):
+                statement = AddConstraint if create else DropConstraint
+                db.session.execute(statement(constraint))
+    db.session.commit()
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+
+
+def explain(sql: str, runs: int) -> dict:
+    """Run a query with EXPLAIN (ANALYZE, BUFFERS) and time it.
+
+    Parameters
+    ----------
+    sql: str
+        The query.
+    runs: int
+        The number of timed runs.
+
+    Returns
+    -------
+    dict:
+        The top plan node, the buffers touched and the median latency.
+    """
+    db.session.execute(text(sql)).fetchall()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        db.session.execute(text(sql)).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    plan = db.session.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+    ).scalar()[0]
+    root = plan["Plan"]
+    nodes, scans = [root], set()
+    while nodes:
+        node = nodes.pop()
+        if "Scan" in node["Node Type"]:
+            target = node.get("Index Name") or node.get("Relation Name")
+            scans.add(f'{node["Node Type"]} on {target}')
+        nodes.extend(node.get("Plans", []))
+    return {
+        "median ms": round(statistics.median(timings), 3),
+        "execution ms": plan["Execution Time"],
+        "buffers": root["Shared Hit Blocks"] + root["Shared Read Blocks"],
+        "scans": sorted(scans),
+    }
+
+
+def measure(queries: dict, runs: int) -> dict:
+    """Explain all the handler queries.
+
+    Parameters
+    ----------
+    queries: dict
+        The SQL of each query keyed by a description.
+    runs: int
+        The number of timed runs per query.
+
+    Returns
+    -------
+    dict:
+        The results of each query keyed by its description.
+    """
+    return {name: explain(sql, runs) for name, sql in queries.items()}
+
+
+def main(argv: list) -> None:
+    """Run the benchmark and report the results."""
+    args = parse_args(argv)
+    app = create_app()
+    if not app.config["TESTING"] and not args.force:
+        sys.exit("This resets the database. Use FLASK_ENV=testing or --force.")
+    sizes = {
+        "authors": args.authors,
+        "articles": args.articles,
+        "views": args.views,
+        "likes": min(args.likes, args.authors * args.articles),
+        "bookmarks": min(args.bookmarks, args.authors * args.articles),
+        "comments": args.comments,
+    }
+    with app.app_context():
+        seed(sizes)
+        queries = handler_queries(sizes)
+        set_indexes(create=False)
+        before = measure(queries, args.runs)
+        set_indexes(create=True)
+        after = measure(queries, args.runs)
+
+    print(f"{'query':<40}{'before ms':>12}{'after ms':>12}{'buffers':>20}")
+    for name in queries:
+        buffers = f'{before[name]["buffers"]} -> {after[name]["buffers"]}'
+        print(
+            f'{name:<40}{before[name]["median ms"]:>12}'
+            f'{after[name]["median ms"]:>12}{buffers:>20}'
+        )
+    with open(args.output, "w") as report:
+        json.dump(
+            {"sizes": sizes, "queries": queries, "before": before, "after": after},
+            report,
+            indent=2,
+        )
+    print(f"Wrote the plans to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""This module measures the latency the request logging adds.
+
+The health check is requested through the app with the logging
+disabled, with the records emitted by the request thread, and with
+the records queued for the listener thread, with and without the
+response bodies. The records are written to a file, optionally
+with a delay per record standing for a slow log shipper. The median
+and 99th percentile latencies, the overhead over the disabled
+logging and the dropped records are reported.
+
+The database is not used.
+
+Usage:
+    FLASK_ENV=testing python -m benchmarks.logging_overhead --sink-delay-ms 1
+
+Has the following classes:
+1. SlowFileHandler:
+    Writes the records to a file after a delay.
+
+Has the following functions:
+1. parse_args():
+    Parses the command line arguments.
+2. configure():
+    Routes the root logger's records to the sink for a mode.
+3. run():
+    Requests the health check and times each request.
+4. main():
+    Runs the benchmark and reports the results.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from pythonjsonlogger import jsonlogger
+
+from api import create_app
+from api.config.logger import BoundedQueueHandler
+
+MODES = ("disabled", "sync", "queue", "queue with bodies")
+
+
+class SlowFileHandler(logging.FileHandler):
+    """Write the records to a file after a delay.
+
+    Parameters
+    ----------
+    path: str
+        The file the records are appended to.
+    delay: float
+        The number of seconds spent before writing each record.
+    """
+
+    def __init__(self, path: str, delay: float):
+        super().__init__(path)
+        self.delay_seconds = delay
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Wait, then write the record."""
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        super().emit(record)
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="The number of timed requests."
+    )
+    parser.add_argument(
+        "--sink-delay-ms",
+        type=float,
+        default=0.0,
+        help="The time the sink spends writing each record.",
+    )
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--drop-policy", choices=("newest", "oldest"), default="newest")
+    parser.add_argument("--output", default="logging_overhead.json")
+    return parser.parse_args(argv)
+
+
+def configure(mode: str, sink: logging.Handler, args: argparse.Namespace):
+    """Route the root logger's records to the sink for a mode.
+
+    Returns
+    -------
+    BoundedQueueHandler:
+        The queue handler for the queued modes, else None.
+    """
+    root = logging.getLogger()
+    logging.disable(logging.INFO if mode == "disabled" else logging.NOTSET)
+    if mode.startswith("queue"):
+        handler = BoundedQueueHandler([sink], args.queue_size, args.drop_policy)
+        root.handlers = [handler]
+        return handler
+    root.handlers = [sink]
+    return None
+
+
+def run(client, requests: int) -> dict:
+    """Request the health check and time each request.
+
+    Returns
+    -------
+    dict:
+        The median and 99th percentile latencies in milliseconds.
+    """
+    for _ in range(50):
+        client.get("/")
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get("/")
+        timings.append((time.perf_counter() - start) * 1000)
+    cuts = statistics.quantiles(timings, n=100)
+    return {"p50 ms": round(cuts[49], 3), "p99 ms": round(cuts[98], 3)}
+
+
+def main(argv: list) -> None:
+    """Run the benchmark and report the results."""
+    args = parse_args(argv)
+    app = create_app()
+    client = app.test_client()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        sink = SlowFileHandler(
+            os.path.join(directory, "records.log"), args.sink_delay_ms / 1000
+        )
+        sink.setFormatter(
+            jsonlogger.JsonFormatter("%(asctime)s %(name)s %(levelname)s %(message)s")
+        )
+        for mode in MODES:
+            app.config["LOG_RESPONSE_BODIES"] = mode == "queue with bodies"
+            handler = configure(mode, sink, args)
+            results[mode] = run(client, args.requests)
+            if handler:
+                handler.stop()
+                results[mode]["dropped"] = handler.dropped
+        logging.disable(logging.NOTSET)
+        sink.close()
+    baseline = results["disabled"]["p50 ms"]
+    for result in results.values():
+        result["overhead p50 ms"] = round(result["p50 ms"] - baseline, 3)
+
+    print(f"{'mode':<20}{'p50 ms':>10}{'p99 ms':>10}{'overhead':>10}{'dropped':>10}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<20}{result['p50 ms']:>10}{result['p99 ms']:>10}"
+            f"{result['overhead p50 ms']:>10}{result.get('dropped', ''):>10}"
+        )
+    with open(args.output, "w") as report:
+        json.dump(
+            {
+                "requests": args.requests,
+                "sink delay ms": args.sink_delay_ms,
+                "queue size": args.queue_size,
+                "drop policy": args.drop_policy,
+                "results": results,
+            },
+            report,
+            indent=2,
+        )
+    print(f"Wrote the results to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
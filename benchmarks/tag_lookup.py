@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""This module measures the tag browse queries with and without the
+GIN index on the article tags.
+
+The database is seeded with articles tagged from a vocabulary in
+which a few tags are common and most are rare, then each
+/article/by_tag query is explained with the index dropped and again
+with it created.
+
+Usage:
+    FLASK_ENV=testing python -m benchmarks.tag_lookup --articles 2000000
+
+Has the following functions:
+1. parse_args():
+    Parses the command line arguments.
+2. seed():
+    Resets the database and fills it with tagged articles.
+3. tag_queries():
+    Builds the queries issued by the tag browse handler.
+4. set_tags_index():
+    Drops or creates the GIN index on the tags.
+5. main():
+    Runs the benchmark and reports the results.
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from api import create_app, db
+from api.article.models import Article
+from api.helpers.pagination import page_query
+
+from .engagement_indexes import measure, render
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO authors (id, name, email_address)
+    SELECT i, 'author ' || i, 'author' || i || '@example.com'
+    FROM generate_series(1, :authors) AS i
+    """,
+    """
+    INSERT INTO articles (id, author_id, title, text, date_published, tags)
+    SELECT i, 1 + i % :authors, 'title ' || i, 'text ' || i,
+        now() - (i || ' seconds')::interval,
+        ARRAY[
+            'common' || i % 5,
+            'tag' || (random() * :vocabulary)::int,
+            'tag' || (random() * :vocabulary)::int
+        ]
+    FROM generate_series(1, :articles) AS i
+    """,
+    "SELECT setval('authors_id_seq', :authors)",
+    "SELECT setval('articles_id_seq', :articles)",
+)
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--authors", type=int, default=10000)
+    parser.add_argument("--articles", type=int, default=2000000)
+    parser.add_argument(
+        "--vocabulary", type=int, default=50000, help="The number of rare tags."
+    )
+    parser.add_argument(
+        "--runs", type=int, default=20, help="The number of timed runs per query."
+    )
+    parser.add_argument("--output", default="tag_lookup.json")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run even when the app is not using the testing configuration.",
+    )
+    return parser.parse_args(argv)
+
+
+def seed(sizes: dict) -> None:
+    """Reset the database and fill it with tagged articles.
+
+    Parameters
+    ----------
+    sizes: dict
+        The number of authors, articles and rare tags.
+    """
+    db.drop_all()
+    db.create_all()
+    for statement in SEED_STATEMENTS:
+        db.session.execute(text(statement), sizes)
+    db.session.commit()
+
+
+def tag_queries() -> dict:
+    """Build the queries issued by the tag browse handler.
+
+    Returns
+    -------
+    dict:
+        The SQL of each query keyed by a description.
+    """
+    limit = 20
+    queries = {
+        "a rare tag": Article.tagged(["tag42"]),
+        "two rare tags, any": Article.tagged(["tag42", "tag4242"], match_all=False),
+        "a rare and a common tag, all": Article.tagged(["tag42", "common1"]),
+        "a common tag": Article.tagged(["common1"]),
+    }
+    return {
+        name: render(page_query(query, Article.date_published, Article.id, limit))
+        for name, query in queries.items()
+    }
+
+
+def set_tags_index(create: bool) -> None:
+    """Drop or create the GIN index on the article tags.
+
+    Parameters
+    ----------
+    create: bool
+        Whether to create or to drop it.
+    """
+    index = next(
+        index for index in Article.__table__.indexes if index.name == "ix_articles_tags"
+    )
+    db.session.execute(CreateIndex(index) if create else DropIndex(index))
+    db.session.commit()
+    db.session.execute(text("ANALYZE articles"))
+    db.session.commit()
+
+
+def main(argv: list) -> None:
+    """Run the benchmark and report the results."""
+    args = parse_args(argv)
+    app = create_app()
+    if not app.config["TESTING"] and not args.force:
+        sys.exit("This resets the database. Use FLASK_ENV=testing or --force.")
+    sizes = {
+        "authors": args.authors,
+        "articles": args.articles,
+        "vocabulary": args.vocabulary,
+    }
+    with app.app_context():
+        seed(sizes)
+        queries = tag_queries()
+        set_tags_index(create=False)
+        before = measure(queries, args.runs)
+        set_tags_index(create=True)
+        after = measure(queries, args.runs)
+
+    print(f"{'query':<32}{'before ms':>12}{'after ms':>12}  plan")
+    for name in queries:
+        print(
+            f'{name:<32}{before[name]["median ms"]:>12}'
+            f'{after[name]["median ms"]:>12}  {", ".join(after[name]["scans"])}'
+        )
+    with open(args.output, "w") as report:
+        json.dump(
+            {"sizes": sizes, "queries": queries, "before": before, "after": after},
+            report,
+            indent=2,
+        )
+    print(f"Wrote the plans to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""This module measures the peak memory of uploading article images.
+
+Images of --size-mb megabytes are posted to /article/ through the
+app, once with a hook reading each uploaded file the way the request
+logging used to, just to log its size, and once with the request
+logging alone, which takes the size from the end of the spooled
+file. Each mode runs in its own process, since the peak resident set
+size only ever grows, and the peak before and after the uploads is
+reported.
+
+The uploads go through the storage of the article images, so the
+files are written to a temporary folder, and the status codes are
+reported along with the memory since the notification of each upload
+fails when the queue cannot be reached.
+
+Usage:
+    FLASK_ENV=testing python -m benchmarks.upload_memory --size-mb 10
+
+Has the following functions:
+1. parse_args():
+    Parses the command line arguments.
+2. read_upload():
+    Reads the uploaded image the way the request logging used to.
+3. peak_rss():
+    Gets the peak resident set size of the process.
+4. upload():
+    Uploads the images in the current process for a mode.
+5. main():
+    Runs each mode in its own process and reports the results.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from flask import request
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+
+from api import create_app, db
+
+MODES = ("read the upload", "metadata only")
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--uploads", type=int, default=5, help="The number of uploaded images."
+    )
+    parser.add_argument("--size-mb", type=int, default=10)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default="upload_memory.json")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run even when the app is not using the testing configuration.",
+    )
+    return parser.parse_args(argv)
+
+
+def read_upload():
+    """Read the uploaded image the way the request logging used to."""
+    if request.files:
+        len(request.files["Image"].read())
+        request.files["Image"].seek(0)
+
+
+def peak_rss() -> float:
+    """Get the peak resident set size of the process in megabytes."""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def upload(args: argparse.Namespace) -> dict:
+    """Upload the images in the current process for a mode.
+
+    Returns
+    -------
+    dict:
+        The peak resident set size before and after the uploads, in
+        megabytes, and the status codes of the uploads.
+    """
+    app = create_app()
+    if args.mode == "read the upload":
+        app.before_request(read_upload)
+    client = app.test_client()
+    statuses = {}
+    with tempfile.TemporaryDirectory() as directory:
+        app.config["UPLOAD_FOLDER"] = directory
+        # A failed notification of the upload is counted, not raised.
+        app.config["PROPAGATE_EXCEPTIONS"] = False
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.execute(
+                text(
+                    "INSERT INTO authors (id, name, email_address) "
+                    "VALUES (1, 'author', 'author@example.com')"
+                )
+            )
+            db.session.commit()
+            headers = {"Authorization": f"Bearer {create_access_token(identity=1)}"}
+        image = os.urandom(args.size_mb * 1024 * 1024)
+        client.get("/")
+        before = peak_rss()
+        for number in range(args.uploads):
+            response = client.post(
+                "/article/?id=1",
+                data={
+                    "Title": f"title {number}",
+                    "Text": "text",
+                    "Image": (io.BytesIO(image), f"image{number}.png"),
+                },
+                content_type="multipart/form-data",
+                headers=headers,
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return {
+        "peak rss before mb": before,
+        "peak rss after mb": peak_rss(),
+        "statuses": statuses,
+    }
+
+
+def main(argv: list) -> None:
+    """Run each mode in its own process and report the results."""
+    args = parse_args(argv)
+    if args.mode:
+        print(json.dumps(upload(args)))
+        return
+    if not create_app().config["TESTING"] and not args.force:
+        sys.exit("This resets the database. Use FLASK_ENV=testing or --force.")
+    results = {}
+    for mode in MODES:
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.upload_memory",
+            "--mode",
+            mode,
+            "--uploads",
+            str(args.uploads),
+            "--size-mb",
+            str(args.size_mb),
+        ]
+        child = subprocess.run(command, capture_output=True, text=True, check=True)
+        results[mode] = json.loads(child.stdout.strip().splitlines()[-1])
+        results[mode]["growth mb"] = round(
+            results[mode]["peak rss after mb"] - results[mode]["peak rss before mb"], 1
+        )
+
+    print(f"{'mode':<20}{'before mb':>12}{'after mb':>12}{'growth mb':>12}  statuses")
+    for mode, result in results.items():
+        print(
+            f"{mode:<20}{result['peak rss before mb']:>12}"
+            f"{result['peak rss after mb']:>12}{result['growth mb']:>12}"
+            f"  {result['statuses']}"
+        )
+    with open(args.output, "w") as report:
+        json.dump(
+            {"uploads": args.uploads, "size mb": args.size_mb, "results": results},
+            report,
+            indent=2,
+        )
+    print(f"Wrote the results to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,8 +1,19 @@
 # -*- coding: utf-8 -*-
 """This is the application entry point."""
+import json
+import os
+
+import click
+from flask import current_app
 from flask.cli import FlaskGroup
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
 
 from api import create_app, db
+from api.article.models import Article, Bookmark, EngagementRollup, Image, Like, Tag
+from api.article.models.article import ENGAGEMENTS
+from api.author.models.author import Author
+from api.helpers.images import generate_variants
 
 app = create_app()
 cli = FlaskGroup(create_app=create_app)
@@ -16,5 +27,156 @@ def create_db():
     db.session.commit()
 
 
+@cli.command("recount_counters")
+@click.option(
+    "--batch-size",
+    default=1000,
+    show_default=True,
+    help="The number of rows recounted per transaction.",
+)
+def recount_counters(batch_size):
+    """Recompute the article and author engagement counters.
+
+    The rows are recounted in batches of ids, each in its own
+    transaction, so only the rows in the current batch are locked.
+    """
+    for model in (Article, Author):
+        last_id = db.session.query(func.max(model.id)).scalar() or 0
+        for first_id in range(1, last_id + 1, batch_size):
+            model.recount_counters(first_id, first_id + batch_size)
+            db.session.commit()
+        click.echo(f"Recounted the {model.__tablename__} counters.")
+
+
+@cli.command("rollup_engagements")
+@click.option(
+    "--batch-size",
+    default=10000,
+    show_default=True,
+    help="The number of engagement rows aggregated per transaction.",
+)
+def rollup_engagements(batch_size):
+    """Aggregate the new engagement rows into the daily rollups.
+
+    This is meant to be run periodically e.g from cron. Each run
+    only reads the rows added since the previous run.
+    """
+    for metric in ENGAGEMENTS:
+        watermark = EngagementRollup.aggregate(metric, batch_size)
+        click.echo(f"Aggregated the {metric} up to id {watermark}.")
+
+
+@cli.command("rebuild_search_vectors")
+@click.option(
+    "--batch-size",
+    default=1000,
+    show_default=True,
+    help="The number of articles reindexed per transaction.",
+)
+def rebuild_search_vectors(batch_size):
+    """Recompute the full text search vectors of all the articles.
+
+    This has to be run once after the search_vector column is added
+    and again whenever SEARCH_LANGUAGE changes.
+    """
+    last_id = db.session.query(func.max(Article.id)).scalar() or 0
+    for first_id in range(1, last_id + 1, batch_size):
+        Article.rebuild_search_vectors(first_id, first_id + batch_size)
+        db.session.commit()
+    click.echo("Rebuilt the article search vectors.")
+
+
+@cli.command("refresh_tags")
+def refresh_tags():
+    """Recount the articles of every tag used for the tag suggestions.
+
+    This is meant to be run periodically e.g from cron.
+    """
+    count = Tag.refresh()
+    db.session.commit()
+    click.echo(f"Refreshed {count} tags.")
+
+
+@cli.command("dedupe_engagements")
+def dedupe_engagements():
+    """Delete the duplicate likes and bookmarks.
+
+    Only the earliest like or bookmark of an author on an article
+    is kept. This has to be run before the unique constraints on
+    the likes and bookmarks are applied, followed by
+    recount_counters.
+    """
+    for model in (Like, Bookmark):
+        earlier = aliased(model)
+        duplicate = (
+            db.session.query(earlier.id)
+            .filter(
+                earlier.article_id == model.article_id,
+                earlier.author_id == model.author_id,
+                earlier.id < model.id,
+            )
+            .exists()
+        )
+        deleted = model.query.filter(duplicate).delete(synchronize_session=False)
+        db.session.commit()
+        click.echo(f"Deleted {deleted} duplicate {model.__tablename__}.")
+
+
+@cli.command("generate_image_variants")
+@click.option(
+    "--workers",
+    default=os.cpu_count(),
+    show_default=True,
+    help="The number of processes resizing the images.",
+)
+@click.option(
+    "--batch-size",
+    default=32,
+    show_default=True,
+    help="The number of images read at a time.",
+)
+@click.option(
+    "--limit",
+    type=int,
+    default=None,
+    help="The number of articles gone through before stopping.",
+)
+def generate_image_variants(workers, batch_size, limit):
+    """Make the resized copies of the article images which have none.
+
+    The images uploaded through the app are queued for their copies
+    as soon as their article is saved. This is meant to be run once to
+    backfill the existing images, and periodically e.g from cron for
+    the images a worker dropped or exited before processing. It can be
+    stopped and rerun at any point, the articles whose copies are
+    recorded being skipped.
+    """
+
+    def progress(stats):
+        report = stats.report()
+        click.echo(
+            f"Went through {stats.total} articles, "
+            f"{report['images per second']} images per second."
+        )
+
+    stats = generate_variants(batch_size, workers, limit, progress)
+    click.echo(json.dumps(stats.report()))
+
+
+@cli.command("collect_images")
+def collect_images():
+    """Delete the images no article uses anymore from the storage.
+
+    The images are deleted as soon as their last reference is dropped,
+    this collects the ones whose deletion failed, then sweeps the ones
+    stored by a request which was rolled back.
+    """
+    digests = Image.unreferenced()
+    Image.collect(digests)
+    click.echo(f"Went through {len(digests)} images without references.")
+    swept = Image.sweep(current_app.config["STORAGE_ORPHAN_GRACE_SECONDS"])
+    click.echo(f"Swept {swept} images without a row.")
+
+
 if __name__ == "__main__":
     cli()
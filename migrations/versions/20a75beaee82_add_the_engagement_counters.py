@@ -0,0 +1,43 @@
+"""Add the engagement counters
+
+The columns start at 0, which Postgres records without rewriting
+the tables. The existing engagements are counted afterwards with
+`python manage.py recount_counters`, in batches that each lock only
+their own rows. The app keeps the counters up to date from then on.
+
+Revision ID: 20a75beaee82
+Revises: ba8bc7e2ac8a
+Create Date: 2026-10-17 03:45:40.529716
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20a75beaee82'
+down_revision = 'ba8bc7e2ac8a'
+branch_labels = None
+depends_on = None
+
+# The engagement tables, each counted in a <table>_count column.
+COUNTED_TABLES = ("views", "likes", "comments", "bookmarks")
+
+
+def upgrade():
+    for table in ("articles", "authors"):
+        for counted in COUNTED_TABLES:
+            op.add_column(
+                table,
+                sa.Column(
+                    f"{counted}_count",
+                    sa.Integer(),
+                    server_default="0",
+                    nullable=False,
+                ),
+            )
+
+
+def downgrade():
+    for table in ("authors", "articles"):
+        for counted in reversed(COUNTED_TABLES):
+            op.drop_column(table, f"{counted}_count")
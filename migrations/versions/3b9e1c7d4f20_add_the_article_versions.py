@@ -0,0 +1,30 @@
+"""Add the article versions
+
+The column starts at 0, which Postgres records without rewriting the
+table. The articles whose image copies were recorded before keep the
+ETag built from their edit date until they change again.
+
+Revision ID: 3b9e1c7d4f20
+Revises: 5c5f236e91fb
+Create Date: 2026-10-17 05:12:08.402117
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3b9e1c7d4f20'
+down_revision = '5c5f236e91fb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "articles",
+        sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_column("articles", "version")
@@ -0,0 +1,33 @@
+"""Add the rollup gaps
+
+The gaps are only recorded from the next run of rollup_engagements
+on. The engagements committed below a watermark before then are not
+folded in, recount them by rebuilding the rollups if they matter.
+
+Revision ID: 5c5f236e91fb
+Revises: a0677178c4dd
+Create Date: 2026-10-17 04:45:52.311670
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5c5f236e91fb'
+down_revision = 'a0677178c4dd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "rollup_gaps",
+        sa.Column("metric", sa.String(length=20), nullable=False),
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("date_found", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("metric", "id"),
+    )
+
+
+def downgrade():
+    op.drop_table("rollup_gaps")
@@ -0,0 +1,54 @@
+"""Add the article search vectors
+
+The vectors of the existing articles are built here in the
+SEARCH_LANGUAGE of the app, as Article.search_document does. Their
+index is built concurrently, outside of a transaction.
+
+Revision ID: 6f82f4b56886
+Revises: de257d4a8641
+Create Date: 2026-10-17 04:00:21.775031
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from flask import current_app
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '6f82f4b56886'
+down_revision = 'de257d4a8641'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "articles", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True)
+    )
+    op.execute(
+        sa.text(
+            "UPDATE articles SET search_vector = "
+            "setweight(to_tsvector(CAST(:language AS regconfig), "
+            "coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector(CAST(:language AS regconfig), "
+            "coalesce(text, '')), 'B')"
+        ).bindparams(language=current_app.config["SEARCH_LANGUAGE"])
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_articles_search_vector",
+            "articles",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_articles_search_vector",
+            table_name="articles",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("articles", "search_vector")
@@ -0,0 +1,57 @@
+"""Add the content addressed images
+
+The images stored before have no row and keep being served from
+their url, see Article.delete_image. The image urls are widened to
+fit the storage url of a digest key.
+
+Revision ID: a0677178c4dd
+Revises: da3cf12e186b
+Create Date: 2026-10-17 04:37:40.084129
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'a0677178c4dd'
+down_revision = 'da3cf12e186b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column(
+        "articles",
+        "image",
+        existing_type=sa.String(length=100),
+        type_=sa.String(length=255),
+        existing_nullable=True,
+    )
+    op.create_table(
+        "images",
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("url", sa.String(length=255), nullable=False),
+        sa.Column("content_type", sa.String(length=50), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("references_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "variants",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+        sa.Column("date_created", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("digest"),
+        sa.UniqueConstraint("url"),
+    )
+
+
+def downgrade():
+    op.drop_table("images")
+    op.alter_column(
+        "articles",
+        "image",
+        existing_type=sa.String(length=255),
+        type_=sa.String(length=100),
+        existing_nullable=True,
+    )
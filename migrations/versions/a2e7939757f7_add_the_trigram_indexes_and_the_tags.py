@@ -0,0 +1,60 @@
+"""Add the trigram indexes and the tags
+
+The gin_trgm_ops operator class comes from the pg_trgm extension,
+which is created first. The extension is left in place on downgrade,
+other schemas of the database may use it. The tags are counted here,
+refresh_tags counts them again from then on. The indexes are built
+concurrently, outside of a transaction, so the articles and authors
+keep taking writes meanwhile.
+
+Revision ID: a2e7939757f7
+Revises: 6f82f4b56886
+Create Date: 2026-10-17 04:03:47.390562
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'a2e7939757f7'
+down_revision = '6f82f4b56886'
+branch_labels = None
+depends_on = None
+
+# The trigram indexes, by table, with the column they lower case.
+TRIGRAM_INDEXES = {
+    "articles": ("ix_articles_title_trgm", "title"),
+    "authors": ("ix_authors_name_trgm", "name"),
+    "tags": ("ix_tags_name_trgm", "name"),
+}
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_table(
+        "tags",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("articles_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.execute(
+        "INSERT INTO tags (name, articles_count) "
+        "SELECT name, count(*) FROM articles, unnest(articles.tags) AS name "
+        "GROUP BY name"
+    )
+    with op.get_context().autocommit_block():
+        for table, (name, column) in TRIGRAM_INDEXES.items():
+            op.create_index(
+                name,
+                table,
+                [sa.text(f"lower({column}) gin_trgm_ops")],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table, (name, column) in TRIGRAM_INDEXES.items():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    op.drop_table("tags")
@@ -0,0 +1,77 @@
+"""Create the baseline tables
+
+The schema of the app before its migrations were kept. A database
+created from that schema with create_db is brought under the
+migrations with `flask db stamp ba8bc7e2ac8a`.
+
+Revision ID: ba8bc7e2ac8a
+Revises:
+Create Date: 2026-10-17 03:45:02.113904
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'ba8bc7e2ac8a'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# The tables holding only an author, an article and a date.
+ENGAGEMENT_TABLES = ("likes", "bookmarks", "views", "shares")
+
+
+def upgrade():
+    op.create_table(
+        "authors",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("email_address", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email_address"),
+    )
+    op.create_table(
+        "articles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("author_id", sa.Integer(), nullable=True),
+        sa.Column("title", sa.String(length=100), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("image", sa.String(length=100), nullable=True),
+        sa.Column("date_published", sa.DateTime(), nullable=True),
+        sa.Column("date_edited", sa.DateTime(), nullable=True),
+        sa.Column("tags", postgresql.ARRAY(sa.String(length=100)), nullable=True),
+        sa.ForeignKeyConstraint(["author_id"], ["authors.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "comments",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("author_id", sa.Integer(), nullable=True),
+        sa.Column("article_id", sa.Integer(), nullable=True),
+        sa.Column("date", sa.DateTime(), nullable=True),
+        sa.Column("comment", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(["article_id"], ["articles.id"]),
+        sa.ForeignKeyConstraint(["author_id"], ["authors.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    for table in ENGAGEMENT_TABLES:
+        op.create_table(
+            table,
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("author_id", sa.Integer(), nullable=True),
+            sa.Column("article_id", sa.Integer(), nullable=True),
+            sa.Column("date", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["article_id"], ["articles.id"]),
+            sa.ForeignKeyConstraint(["author_id"], ["authors.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+
+def downgrade():
+    for table in reversed(ENGAGEMENT_TABLES):
+        op.drop_table(table)
+    op.drop_table("comments")
+    op.drop_table("articles")
+    op.drop_table("authors")
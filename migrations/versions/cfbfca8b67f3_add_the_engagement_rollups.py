@@ -0,0 +1,51 @@
+"""Add the engagement rollups
+
+The rollups start empty. The first run of rollup_engagements
+aggregates the existing engagements, from a watermark of 0.
+
+Revision ID: cfbfca8b67f3
+Revises: 20a75beaee82
+Create Date: 2026-10-17 03:47:58.218413
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'cfbfca8b67f3'
+down_revision = '20a75beaee82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("metric", sa.String(length=20), nullable=False),
+        sa.Column("last_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("metric"),
+    )
+    op.create_table(
+        "engagement_rollups",
+        sa.Column("article_id", sa.Integer(), nullable=False),
+        sa.Column("author_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("metric", sa.String(length=20), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["article_id"], ["articles.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["author_id"], ["authors.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("article_id", "author_id", "day", "metric"),
+    )
+    op.create_index(
+        "ix_engagement_rollups_author_id_day",
+        "engagement_rollups",
+        ["author_id", "day"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_engagement_rollups_author_id_day", table_name="engagement_rollups"
+    )
+    op.drop_table("engagement_rollups")
+    op.drop_table("rollup_watermarks")
@@ -0,0 +1,34 @@
+"""Add the article image variants
+
+The copies of the existing images are generated afterwards with
+generate_image_variants.
+
+Revision ID: da3cf12e186b
+Revises: a2e7939757f7
+Create Date: 2026-10-17 04:33:12.657348
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'da3cf12e186b'
+down_revision = 'a2e7939757f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "articles",
+        sa.Column(
+            "image_variants",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("articles", "image_variants")
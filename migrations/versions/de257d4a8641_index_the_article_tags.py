@@ -0,0 +1,35 @@
+"""Index the article tags
+
+The index is built concurrently, outside of a transaction, so the
+articles keep taking writes meanwhile.
+
+Revision ID: de257d4a8641
+Revises: ed4ac2f9082d
+Create Date: 2026-10-17 03:58:10.446287
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'de257d4a8641'
+down_revision = 'ed4ac2f9082d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_articles_tags",
+            "articles",
+            ["tags"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_articles_tags", table_name="articles", postgresql_concurrently=True
+        )
@@ -0,0 +1,84 @@
+"""Index the engagement tables
+
+The duplicate likes and bookmarks are deleted before their unique
+constraints are added, keeping the earliest like or bookmark of an
+author on an article. Their counters are counted again afterwards
+with `python manage.py recount_counters`.
+
+The indexes are built concurrently, outside of a transaction, so the
+tables keep taking writes meanwhile. The unique constraints are then
+added on their indexes, which only locks the tables briefly. A build
+that fails, e.g on a duplicate added after the deletion, leaves an
+invalid index behind, which has to be dropped before running the
+migration again.
+
+Revision ID: ed4ac2f9082d
+Revises: cfbfca8b67f3
+Create Date: 2026-10-17 03:53:31.902117
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'ed4ac2f9082d'
+down_revision = 'cfbfca8b67f3'
+branch_labels = None
+depends_on = None
+
+# The tables where an author engages with an article at most once.
+UNIQUE_TABLES = ("likes", "bookmarks")
+
+# The columns of the indexes, by table.
+INDEXES = {
+    "articles": [("date_published", "id"), ("author_id", "date_published", "id")],
+    "likes": [("article_id", "date", "id"), ("author_id", "date", "id")],
+    "bookmarks": [("article_id", "date", "id"), ("author_id", "date", "id")],
+    "comments": [("article_id", "date", "id"), ("author_id", "article_id")],
+    "views": [("article_id", "date", "id"), ("author_id", "article_id")],
+    "shares": [("article_id", "author_id"), ("author_id",)],
+}
+
+
+def upgrade():
+    for table in UNIQUE_TABLES:
+        op.execute(
+            f"DELETE FROM {table} AS later USING {table} AS earlier "
+            "WHERE earlier.article_id = later.article_id "
+            "AND earlier.author_id = later.author_id "
+            "AND earlier.id < later.id"
+        )
+    with op.get_context().autocommit_block():
+        for table in UNIQUE_TABLES:
+            op.create_index(
+                f"uq_{table}_article_id_author_id",
+                table,
+                ["article_id", "author_id"],
+                unique=True,
+                postgresql_concurrently=True,
+            )
+        for table, indexes in INDEXES.items():
+            for columns in indexes:
+                op.create_index(
+                    f"ix_{table}_{'_'.join(columns)}",
+                    table,
+                    list(columns),
+                    postgresql_concurrently=True,
+                )
+    for table in UNIQUE_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT uq_{table}_article_id_author_id "
+            f"UNIQUE USING INDEX uq_{table}_article_id_author_id"
+        )
+
+
+def downgrade():
+    for table in UNIQUE_TABLES:
+        op.drop_constraint(f"uq_{table}_article_id_author_id", table, type_="unique")
+    with op.get_context().autocommit_block():
+        for table, indexes in INDEXES.items():
+            for columns in indexes:
+                op.drop_index(
+                    f"ix_{table}_{'_'.join(columns)}",
+                    table_name=table,
+                    postgresql_concurrently=True,
+                )
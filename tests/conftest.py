@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""This module declares the fixtures shared by the tests.
+
+The tests run against the Postgres started by `make test`, reached
+through the POSTGRES_* variables of the testing configuration. Each
+test gets a new app and empty tables. The app context is not kept
+pushed, so the requests do not share the session of the test.
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from api import create_app, db
+from api.author.models.author import Author
+
+
+@pytest.fixture
+def app():
+    """Create an app with empty tables."""
+    app = create_app("testing")
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """Create a client of the app."""
+    return app.test_client()
+
+
+@pytest.fixture
+def authors(app):
+    """Create the authors the articles and engagements belong to.
+
+    Returns
+    -------
+    list:
+        The ids of the authors.
+    """
+    with app.app_context():
+        authors = [
+            Author(name=f"author {number}", email_address=f"author{number}@example.com")
+            for number in range(5)
+        ]
+        db.session.add_all(authors)
+        db.session.commit()
+        return [author.id for author in authors]
+
+
+@pytest.fixture
+def headers(app, authors):
+    """Get the headers authenticating the first author."""
+    with app.app_context():
+        token = create_access_token(identity=authors[0])
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""This module tests the validators of the article and author routes."""
+import pytest
+
+from api import db
+from api.article.models import Article
+
+
+def test_counters_change_the_etag(app, client, authors, headers):
+    """A client holding the article gets it again once its counters
+    change, though it was not edited."""
+    with app.app_context():
+        article = Article(title="title", text="text", author_id=authors[0])
+        db.session.add(article)
+        db.session.commit()
+        article_id = article.id
+    route = f"/article/?id={article_id}&author id={authors[0]}"
+    first = client.get(route, headers=headers)
+    etag = first.headers["ETag"]
+    assert (
+        client.get(route, headers={**headers, "If-None-Match": etag}).status_code == 304
+    )
+
+    with app.app_context():
+        Article.update_counter(article_id, "likes_count")
+        db.session.commit()
+        Article.invalidate(article_id)
+    second = client.get(route, headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != etag
+    assert second.headers["Last-Modified"] == first.headers["Last-Modified"]
+
+
+@pytest.mark.parametrize(
+    "action, counter",
+    [
+        ("like", "likes_count"),
+        ("bookmark", "bookmarks_count"),
+        ("comment", "comments_count"),
+    ],
+)
+def test_engagements_refresh_the_cached_article(
+    app, client, authors, headers, action, counter
+):
+    """A like, bookmark or comment is seen in the next read of the
+    article, though it was cached before."""
+    with app.app_context():
+        article = Article(title="title", text="text", author_id=authors[0])
+        db.session.add(article)
+        db.session.commit()
+        article_id = article.id
+    route = f"/article/?id={article_id}&author id={authors[0]}"
+    first = client.get(route, headers=headers)
+    assert first.json[counter] == 0
+
+    query = {"article id": article_id, "author id": authors[1]}
+    if action == "comment":
+        response = client.post(
+            "/article/comment",
+            query_string=query,
+            json={"comment": "a comment"},
+            headers=headers,
+        )
+    else:
+        response = client.get(f"/article/{action}", query_string=query, headers=headers)
+    assert response.status_code in (200, 201)
+    second = client.get(
+        route, headers={**headers, "If-None-Match": first.headers["ETag"]}
+    )
+    assert second.status_code == 200
+    assert second.json[counter] == 1
+
+
+def test_counters_change_the_list_etag(app, client, authors, headers):
+    """A client holding a page of articles gets it again once the
+    counters of one of them change."""
+    with app.app_context():
+        article = Article(title="title", text="text", author_id=authors[0])
+        db.session.add(article)
+        db.session.commit()
+        article_id = article.id
+    etag = client.get("/article/articles", headers=headers).headers["ETag"]
+
+    response = client.get(
+        "/article/like",
+        query_string={"article id": article_id, "author id": authors[1]},
+        headers=headers,
+    )
+    assert response.status_code in (200, 201)
+    second = client.get("/article/articles", headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != etag
+
+
+def test_author_stats_etag(app, client, authors, headers):
+    """The stats of an author are validated from its row alone, and
+    change with its counters."""
+    route = f"/author/stats?id={authors[0]}"
+    first = client.get(route, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    cached = client.get(route, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert int(cached.headers["X-Query-Count"]) == 1
+
+    with app.app_context():
+        article = Article(title="title", text="text", author_id=authors[1])
+        db.session.add(article)
+        db.session.commit()
+        article_id = article.id
+    client.get(
+        "/article/like",
+        query_string={"article id": article_id, "author id": authors[0]},
+        headers=headers,
+    )
+    second = client.get(route, headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.json["likes"] == first.json["likes"] + 1
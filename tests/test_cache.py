@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""This module tests the read-through cache against a fake Redis.
+
+Two caches sharing the fake server stand for two workers. The
+loaders count their calls and can be held until the test lets them
+return, so the concurrent lookups overlap.
+"""
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from api.helpers import cache as cache_module
+from api.helpers.cache import ReadThroughCache, RedisBackend
+
+
+class FakeRedis:
+    """Keep the keys of a Redis server in a dict, with their expiry."""
+
+    def __init__(self):
+        self.keys = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value, expires = self.keys.get(key, (None, 0))
+            return value if expires > time.monotonic() else None
+
+    def set(self, key, value, px=None, nx=False):
+        with self.lock:
+            current, expires = self.keys.get(key, (None, 0))
+            if nx and expires > time.monotonic():
+                return None
+            self.keys[key] = (value, time.monotonic() + px / 1000)
+            return True
+
+    def delete(self, key):
+        with self.lock:
+            self.keys.pop(key, None)
+
+    def eval(self, script, count, key, token):
+        with self.lock:
+            if self.keys.get(key, (None, 0))[0] == token:
+                del self.keys[key]
+
+    def info(self, section):
+        return {"evicted_keys": 0}
+
+    def scan_iter(self, pattern):
+        return [key for key in list(self.keys) if key.startswith(pattern[:-1])]
+
+
+class Loader:
+    """Load a value, counting the calls, once released."""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.released = threading.Event()
+        self.released.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.released.wait(5)
+        return self.value
+
+
+def make_cache(server: FakeRedis, **config) -> ReadThroughCache:
+    """Create a cache of a new app, stored in the fake server."""
+    app = Flask(__name__)
+    app.config.update(
+        CACHE_BACKEND="memory",
+        CACHE_MAX_ENTRIES=100,
+        CACHE_TTL_SECONDS=60,
+        CACHE_STALE_SECONDS=60,
+        CACHE_LOCK_TIMEOUT_SECONDS=2,
+        WEB_CONCURRENCY=1,
+    )
+    app.config.update(config)
+    cache = ReadThroughCache()
+    cache.init_app(app)
+    cache.backend = RedisBackend(server)
+    return cache
+
+
+def run_concurrently(function, number: int) -> list:
+    """Call a function with the index of each of several threads,
+    returning the results."""
+    results = [None] * number
+
+    def run(index):
+        results[index] = function(index)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(number)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def wait_for_refresh(cache: ReadThroughCache) -> None:
+    """Wait for the background refreshes to finish."""
+    deadline = time.monotonic() + 5
+    while cache.flights and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_single_flight_within_a_worker():
+    """The concurrent misses of a worker load the value once."""
+    cache = make_cache(FakeRedis())
+    loader = Loader({"id": 1})
+    loader.released.clear()
+    threading.Timer(0.2, loader.released.set).start()
+    results = run_concurrently(lambda index: cache.get("article:1", loader), 10)
+    assert results == [{"id": 1}] * 10
+    assert loader.calls == 1
+    assert cache.coalesced == 9
+
+
+def test_single_flight_across_workers():
+    """The concurrent misses of two workers load the value once."""
+    server = FakeRedis()
+    workers = [make_cache(server), make_cache(server)]
+    loader = Loader({"id": 1})
+    loader.released.clear()
+    threading.Timer(0.2, loader.released.set).start()
+    results = run_concurrently(
+        lambda index: workers[index % 2].get("article:1", loader), 10
+    )
+    assert results == [{"id": 1}] * 10
+    assert loader.calls == 1
+
+
+def test_stale_while_revalidate(monkeypatch):
+    """An expired value is served while it is reloaded in the background."""
+    cache = make_cache(FakeRedis())
+    assert cache.get("article:1", Loader("old")) == "old"
+    now = time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 61)
+    loader = Loader("new")
+    assert cache.get("article:1", loader) == "old"
+    assert cache.stale_hits == 1
+    wait_for_refresh(cache)
+    assert loader.calls == 1
+    assert cache.get("article:1", Loader("unused")) == "new"
+
+
+def test_invalidate_reaches_every_worker():
+    """A change made through a worker is seen by the others."""
+    server = FakeRedis()
+    first, second = make_cache(server), make_cache(server)
+    assert first.get("article:1", Loader("old")) == "old"
+    assert second.get("article:1", Loader("unused")) == "old"
+    first.invalidate("article:1")
+    assert second.get("article:1", Loader("new")) == "new"
+
+
+def test_refresh_started_before_invalidate(monkeypatch):
+    """A refresh reading the value before a change does not store it
+    over the change."""
+    cache = make_cache(FakeRedis())
+    cache.get("article:1", Loader("old"))
+    now = time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 61)
+    slow = Loader("old")
+    slow.released.clear()
+    assert cache.get("article:1", slow) == "old"
+    cache.invalidate("article:1")
+    slow.released.set()
+    wait_for_refresh(cache)
+    assert cache.get("article:1", Loader("new")) == "new"
+
+
+def test_memory_backend_refuses_several_workers():
+    """The memory backend is refused with more than one worker."""
+    with pytest.raises(ValueError):
+        make_cache(FakeRedis(), WEB_CONCURRENCY=2)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""This module tests the compression middleware."""
+import zlib
+
+from flask import Flask, Response
+
+from api.helpers.compression import compression
+
+
+def make_app(name: str) -> Flask:
+    """Create an app streaming two chunks, wrapped by the shared
+    compression extension."""
+    app = Flask(name)
+    app.config.update(COMPRESSION_ALGORITHMS=["gzip"], COMPRESSION_MIN_SIZE=0)
+
+    @app.route("/")
+    def stream():
+        return Response(
+            (f'{{"app": "{name}", "chunk": {number}}}\n' for number in range(2)),
+            mimetype="application/json",
+        )
+
+    compression.init_app(app)
+    return app
+
+
+def test_streamed_chunks_are_flushed():
+    """Each streamed chunk can be decompressed as soon as it is sent."""
+    response = (
+        make_app("first")
+        .test_client()
+        .get("/", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    decoder = zlib.decompressobj(31)
+    chunks = iter(response.response)
+    assert decoder.decompress(next(chunks)) == b'{"app": "first", "chunk": 0}\n'
+    assert decoder.decompress(next(chunks)) == b'{"app": "first", "chunk": 1}\n'
+    response.close()
+
+
+def test_apps_keep_their_middleware():
+    """An app created after another does not take over its requests."""
+    first, second = make_app("first"), make_app("second")
+    for app, name in ((first, b"first"), (second, b"second")):
+        response = app.test_client().get("/", headers={"Accept-Encoding": "gzip"})
+        assert name in zlib.decompress(response.data, 31)
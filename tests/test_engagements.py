@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""This module tests the likes and bookmarks under concurrent requests.
+
+The requests are fired from threads released together, each request
+running in its own app context and so with its own session and
+connection, as the requests of a double-tapping client do. Whatever
+the order they commit in, an author has at most one row per article
+and the counters match the rows.
+"""
+import threading
+
+import pytest
+
+from api import db
+from api.article.models import Article, Bookmark, Like
+from api.author.models.author import Author
+
+# The requests fired at once, within the pool of connections.
+THREADS = 8
+
+ENGAGEMENTS = [
+    ("like", "unlike", Like, "likes_count"),
+    ("bookmark", "unbookmark", Bookmark, "bookmarks_count"),
+]
+
+
+def fire(client, headers: dict, routes: list, query: dict) -> list:
+    """Request the routes from threads released together.
+
+    Returns
+    -------
+    list:
+        The status codes, in the order of the routes.
+    """
+    barrier = threading.Barrier(len(routes))
+    codes = [None] * len(routes)
+
+    def request(index: int, route: str):
+        barrier.wait()
+        response = client.get(f"/article/{route}", query_string=query, headers=headers)
+        codes[index] = response.status_code
+
+    threads = [
+        threading.Thread(target=request, args=(index, route))
+        for index, route in enumerate(routes)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return codes
+
+
+def engagement_state(app, model, counter: str, article_id: int, author_id: int):
+    """Get the rows of an engagement and the counters of its article
+    and author."""
+    with app.app_context():
+        rows = model.query.filter_by(article_id=article_id, author_id=author_id).count()
+        article = getattr(db.session.get(Article, article_id), counter)
+        author = getattr(db.session.get(Author, author_id), counter)
+        return rows, article, author
+
+
+@pytest.fixture
+def article_id(app, authors):
+    """Create the article the engagements go to."""
+    with app.app_context():
+        article = Article(title="title", text="text", author_id=authors[0])
+        db.session.add(article)
+        db.session.commit()
+        return article.id
+
+
+@pytest.mark.parametrize("add, remove, model, counter", ENGAGEMENTS)
+def test_concurrent_adds_keep_one_row(
+    app, client, authors, headers, article_id, add, remove, model, counter
+):
+    """Only one of the concurrent likes or bookmarks is recorded."""
+    query = {"article id": article_id, "author id": authors[1]}
+    codes = fire(client, headers, [add] * THREADS, query)
+    assert len([code for code in codes if code < 400]) == 1
+    assert codes.count(400) == THREADS - 1
+    assert engagement_state(app, model, counter, article_id, authors[1]) == (1, 1, 1)
+
+
+@pytest.mark.parametrize("add, remove, model, counter", ENGAGEMENTS)
+def test_concurrent_removes_drop_one_row(
+    app, client, authors, headers, article_id, add, remove, model, counter
+):
+    """Only one of the concurrent unlikes or unbookmarks is recorded."""
+    query = {"article id": article_id, "author id": authors[1]}
+    assert fire(client, headers, [add], query)[0] < 400
+    codes = fire(client, headers, [remove] * THREADS, query)
+    assert len([code for code in codes if code < 400]) == 1
+    assert codes.count(400) == THREADS - 1
+    assert engagement_state(app, model, counter, article_id, authors[1]) == (0, 0, 0)
+
+
+@pytest.mark.parametrize("add, remove, model, counter", ENGAGEMENTS)
+def test_concurrent_toggles_match_the_counters(
+    app, client, authors, headers, article_id, add, remove, model, counter
+):
+    """The counters match the rows left by concurrent toggles."""
+    query = {"article id": article_id, "author id": authors[1]}
+    for _ in range(5):
+        fire(client, headers, [add, remove] * (THREADS // 2), query)
+        rows, article, author = engagement_state(
+            app, model, counter, article_id, authors[1]
+        )
+        assert rows in (0, 1)
+        assert article == author == rows
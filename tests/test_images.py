@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""This module tests the generation, the recording and the discarding
+of the resized copies of images."""
+import io
+import json
+import os
+
+from PIL import Image as Picture
+
+from api import db
+from api.article.models import Article, Image
+from api.helpers import images
+from api.helpers.images import (
+    VARIANTS,
+    discard_variants,
+    generate_variants,
+    record_variants,
+    render_variants,
+    store_variants,
+    variant_key,
+    variant_urls,
+)
+from api.helpers.storage import content_digest, storage
+from api.helpers.variant_queue import variant_queue
+
+
+def make_png() -> bytes:
+    """Encode a small image."""
+    buffer = io.BytesIO()
+    Picture.new("RGB", (640, 480), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def render_or_crash(data: bytes) -> list:
+    """Make the copies of an image, killing the worker on b'crash'."""
+    if data == b"crash":
+        os._exit(1)
+    return render_variants(data)
+
+
+def stored(url: str) -> bool:
+    """Check whether an image is in the local storage."""
+    return os.path.exists(storage.backend.path(os.path.basename(url)))
+
+
+def test_shared_copies_are_kept(app, authors):
+    """The copies of a content addressed image are left to
+    collect_images, other articles may use them."""
+    data = make_png()
+    with app.app_context():
+        digest, size = content_digest(io.BytesIO(data))
+        url = storage.put(data, f"{digest}.png", "image/png")
+        Image.acquire(digest, url, "image/png", size)
+        db.session.add(
+            Article(title="title", text="text", author_id=authors[0], image=url)
+        )
+        db.session.commit()
+        variants = store_variants(url, render_variants(data))
+        discard_variants(url, variants)
+        assert all(stored(variant["url"]) for variant in variants.values())
+
+
+def test_unused_copies_are_deleted(app, authors):
+    """The copies of an image stored by name that no article uses are
+    deleted."""
+    data = make_png()
+    with app.app_context():
+        url = storage.put(data, "legacy.png", "image/png")
+        variants = store_variants(url, render_variants(data))
+        discard_variants(url, variants)
+        assert not any(stored(variant["url"]) for variant in variants.values())
+
+
+def test_collect_deletes_unrecorded_copies(app):
+    """Collecting an image deletes its copies even if none were recorded."""
+    data = make_png()
+    with app.app_context():
+        digest, size = content_digest(io.BytesIO(data))
+        url = storage.put(data, f"{digest}.png", "image/png")
+        Image.acquire(digest, url, "image/png", size)
+        db.session.commit()
+        variants = store_variants(url, render_variants(data))
+        assert Image.release(url)
+        db.session.commit()
+        assert not stored(url)
+        assert not any(stored(variant["url"]) for variant in variants.values())
+
+
+def test_recorded_copies_bump_the_version(app, authors):
+    """Recording the copies of an image changes the version of the
+    article, not the date it was edited."""
+    data = make_png()
+    with app.app_context():
+        url = storage.put(data, "recorded.png", "image/png")
+        article = Article(title="title", text="text", author_id=authors[0], image=url)
+        db.session.add(article)
+        db.session.commit()
+        article_id = article.id
+        assert record_variants(article_id, url, {"variants": {}})
+        article = db.session.get(Article, article_id)
+        assert article.version == 1
+        assert article.date_edited is None
+
+
+def test_copy_keys_do_not_repeat_the_extension():
+    """The WebP copy of an image is not named '.webp.webp', nor after
+    a WebP image."""
+    keys = [variant_key("cover.webp", variant) for variant in VARIANTS]
+    assert keys == ["cover.thumbnail.jpg", "cover.medium.jpg", "cover.medium.webp"]
+    assert "cover.webp.webp" in {
+        os.path.basename(url) for url in variant_urls("https://images/cover.webp")
+    }
+
+
+def test_uploaded_images_get_their_copies(app, client, authors, headers, monkeypatch):
+    """An article created with an image is queued for its copies."""
+    app.config["VARIANT_QUEUE_ENABLED"] = True
+    monkeypatch.setattr(variant_queue, "start", lambda: None)
+    response = client.post(
+        f"/article/?id={authors[0]}",
+        data={
+            "Title": "a title",
+            "Text": "a text",
+            "Image": (io.BytesIO(make_png()), "queued.png"),
+        },
+        content_type="multipart/form-data",
+        headers=headers,
+    )
+    assert response.status_code == 201
+    assert variant_queue.drain() == 1
+    with app.app_context():
+        article = db.session.get(Article, json.loads(response.data)["id"])
+        variants = article.image_variants["variants"]
+        assert set(variants) == {variant["name"] for variant in VARIANTS}
+        assert variants["webp"]["url"].endswith(".medium.webp")
+
+
+def test_broken_pool_fails_only_its_images(app, authors, monkeypatch):
+    """A worker dying fails the image it was making, and the next
+    images get their copies from a new pool."""
+    monkeypatch.setattr(images, "render_variants", render_or_crash)
+    with app.app_context():
+        crashing = Article(
+            title="title",
+            text="text",
+            author_id=authors[0],
+            image=storage.put(b"crash", "crash.png", "image/png"),
+        )
+        fine = Article(
+            title="title",
+            text="text",
+            author_id=authors[0],
+            image=storage.put(make_png(), "fine.png", "image/png"),
+        )
+        db.session.add_all([crashing, fine])
+        db.session.commit()
+        stats = generate_variants(batch_size=1, workers=1)
+        assert (stats.failed, stats.processed) == (1, 1)
+        assert db.session.get(Article, crashing.id).image_variants is None
+        assert "variants" in db.session.get(Article, fine.id).image_variants
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""This module tests the migrations against the models.
+
+The migrations are run on an empty database, which then has to hold
+the schema the models declare. The data migrations are checked on
+rows inserted at the revision before them.
+"""
+import os
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import inspect, text
+
+from api import create_app, db
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), os.pardir, "migrations")
+
+
+@pytest.fixture
+def app():
+    """Create an app with an empty database."""
+    app = create_app("testing")
+    with app.app_context():
+        db.drop_all()
+        db.session.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        db.session.commit()
+
+
+def test_upgrade_matches_the_models(app):
+    """The migrated schema is the schema of the models."""
+    with app.app_context():
+        upgrade(MIGRATIONS)
+        with db.engine.connect() as connection:
+            context = MigrationContext.configure(
+                connection, opts={"compare_type": True}
+            )
+            assert compare_metadata(context, db.metadata) == []
+
+
+def test_downgrade_to_base(app):
+    """Every migration can be reverted and applied again."""
+    with app.app_context():
+        upgrade(MIGRATIONS)
+        downgrade(MIGRATIONS, "base")
+        assert inspect(db.engine).get_table_names() == ["alembic_version"]
+        upgrade(MIGRATIONS)
+
+
+def test_duplicate_engagements_are_deleted(app):
+    """The duplicates are deleted before the unique constraints are
+    added."""
+    with app.app_context():
+        upgrade(MIGRATIONS, "cfbfca8b67f3")
+        db.session.execute(
+            text(
+                "INSERT INTO authors (id, name, email_address) "
+                "VALUES (1, 'author', 'author@example.com')"
+            )
+        )
+        db.session.execute(
+            text(
+                "INSERT INTO articles (id, author_id, title, text) "
+                "VALUES (1, 1, 'a title', 'a text')"
+            )
+        )
+        for table in ("likes", "bookmarks"):
+            for number in range(3):
+                db.session.execute(
+                    text(
+                        f"INSERT INTO {table} (id, author_id, article_id) "
+                        f"VALUES ({number + 1}, 1, 1)"
+                    )
+                )
+        db.session.commit()
+        upgrade(MIGRATIONS)
+        for table in ("likes", "bookmarks"):
+            ids = db.session.execute(text(f"SELECT id FROM {table}")).scalars()
+            assert list(ids) == [1]
+            constraints = inspect(db.engine).get_unique_constraints(table)
+            assert [constraint["column_names"] for constraint in constraints] == [
+                ["article_id", "author_id"]
+            ]
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""This module locks the number of queries of the article and author
+routes.
+
+Each route is requested with one and with several articles, each
+with engagements from several authors, and has to issue the same
+number of queries, read from the X-Query-Count header. A route
+loading a relationship per row fails here.
+"""
+import pytest
+
+from api import db
+from api.article.models import Article, Bookmark, Comment, Like, View
+
+# The queries of each route, whatever the number of rows.
+QUERIES = {
+    "/article/articles": 1,
+    "/article/articles?limit=3": 1,
+    "/article/by_tag?tag=tech": 1,
+    "/article/comments?id={id}": 2,
+    "/article/likes?id={id}": 2,
+    "/article/bookmarks?id={id}": 2,
+    "/article/articles_views?id={id}": 2,
+    "/article/stats?id={id}": 1,
+    "/article/tag?article id={id}&author id={author}&tag=news": 3,
+    "/author/stats?id={author}": 1,
+}
+
+
+def add_articles(app, authors: list, number: int) -> list:
+    """Add articles engaged with by every author.
+
+    Returns
+    -------
+    list:
+        The ids of the articles.
+    """
+    with app.app_context():
+        articles = [
+            Article(
+                title=f"title {count}",
+                text=f"text {count}",
+                author_id=authors[count % len(authors)],
+                tags=["tech"],
+            )
+            for count in range(number)
+        ]
+        db.session.add_all(articles)
+        db.session.flush()
+        for article in articles:
+            for author_id in authors:
+                engagement = {"article_id": article.id, "author_id": author_id}
+                db.session.add_all(
+                    [
+                        Like(**engagement),
+                        Bookmark(**engagement),
+                        View(**engagement),
+                        Comment(**engagement, comment="a comment"),
+                    ]
+                )
+        db.session.commit()
+        return [article.id for article in articles]
+
+
+@pytest.mark.parametrize("route", QUERIES)
+@pytest.mark.parametrize("number", [1, 5])
+def test_query_count(app, client, authors, headers, route, number):
+    """The number of queries does not grow with the rows returned."""
+    articles = add_articles(app, authors, number)
+    response = client.get(
+        route.format(id=articles[0], author=authors[0]), headers=headers
+    )
+    assert response.status_code in (200, 201)
+    assert int(response.headers["X-Query-Count"]) == QUERIES[route]
+
+
+def test_article_query_count(app, client, authors, headers):
+    """The article is read from the database once, then from the cache."""
+    articles = add_articles(app, authors, 5)
+    route = f"/article/?id={articles[0]}&author id={authors[0]}"
+    first = client.get(route, headers=headers)
+    second = client.get(route, headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert int(first.headers["X-Query-Count"]) == 2
+    assert int(second.headers["X-Query-Count"]) == 1
+
+
+@pytest.mark.parametrize("number", [1, 5])
+def test_log_in_query_count(app, client, authors, number):
+    """The author logging in is read once by id, after its email."""
+    add_articles(app, authors, number)
+    response = client.post(
+        "/author/login",
+        query_string={"id": authors[0]},
+        json={"email": "author0@example.com"},
+    )
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) == 2
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""This module tests the storage of the article images.
+
+The direct uploads run against a local S3 served by moto. The client
+asks for an upload url, posts the image to it with the signed fields
+and its checksum, and the image is then verified and adopted under the
+digest of its content. The other tests use the local storage of the
+testing configuration.
+"""
+import base64
+import hashlib
+import io
+import os
+import time
+
+import boto3
+import pytest
+import requests
+from moto import mock_s3
+
+from api import db
+from api.article.models import Image
+from api.helpers.blueprint_helpers import adopt_image
+from api.helpers.storage import CHECKSUM_FIELD, DigestStream, S3Backend, storage
+
+BUCKET = "blog-images"
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 16
+
+
+@pytest.fixture
+def s3(app):
+    """Store the images in a bucket of the local S3."""
+    with mock_s3():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        client.head_object = head_with_checksum(client)
+        backend = storage.backend
+        storage.backend = S3Backend(
+            client,
+            BUCKET,
+            f"https://{BUCKET}.s3.amazonaws.com/",
+            app.config["STORAGE_PART_SIZE"],
+        )
+        yield client
+        storage.backend = backend
+
+
+def checksum(data: bytes) -> str:
+    """Get the base64 SHA-256 an image is posted with."""
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def head_with_checksum(client):
+    """Have head_object return the checksum of the objects, as S3 does
+    for the objects posted with one, which moto does not keep."""
+    head_object = client.head_object
+
+    def head(ChecksumMode=None, **kwargs):
+        metadata = head_object(**kwargs)
+        if ChecksumMode == "ENABLED":
+            data = client.get_object(**kwargs)["Body"].read()
+            metadata["ChecksumSHA256"] = checksum(data)
+        return metadata
+
+    return head
+
+
+def upload(data: bytes, content_type: str = "image/png") -> str:
+    """Post an image with a signed form, returning its key."""
+    form = storage.upload_url(content_type)
+    response = requests.post(
+        form["url"],
+        data={**form["fields"], CHECKSUM_FIELD: checksum(data)},
+        files={"file": ("image", data)},
+    )
+    assert response.status_code == 204
+    return form["key"]
+
+
+def keys(client) -> set:
+    """Get the keys in the bucket."""
+    return {
+        item["Key"]
+        for item in client.list_objects_v2(Bucket=BUCKET).get("Contents", [])
+    }
+
+
+def test_adopt_stores_the_image_under_its_digest(app, s3):
+    """The uploaded image is moved under its digest and counted."""
+    with app.app_context():
+        key = upload(PNG)
+        url = adopt_image(key)
+        digest = hashlib.sha256(PNG).hexdigest()
+        assert url == f"https://{BUCKET}.s3.amazonaws.com/{digest}.png"
+        assert keys(s3) == {f"{digest}.png"}
+        assert Image.query.get(digest).references_count == 1
+
+
+def test_adopt_reuses_a_stored_image(app, s3):
+    """The same image uploaded again is not stored twice."""
+    with app.app_context():
+        first = adopt_image(upload(PNG))
+        second = adopt_image(upload(PNG))
+        assert first == second
+        assert len(keys(s3)) == 1
+        assert Image.query.one().references_count == 2
+
+
+def test_adopt_does_not_read_the_image(app, s3, monkeypatch):
+    """The uploaded image is hashed from its checksum and copied within
+    the bucket."""
+
+    def read(url):
+        raise AssertionError(f"{url} was read")
+
+    monkeypatch.setattr(storage, "open", read)
+    monkeypatch.setattr(storage, "read", read)
+    with app.app_context():
+        url = adopt_image(upload(PNG))
+        assert url.endswith(f"{hashlib.sha256(PNG).hexdigest()}.png")
+
+
+def test_verify_rejects_a_mismatched_image(app, s3):
+    """An upload whose content does not match its type is deleted."""
+    with app.app_context():
+        key = upload(b"not an image")
+        with pytest.raises(ValueError):
+            adopt_image(key)
+        assert keys(s3) == set()
+
+
+def test_verify_rejects_a_missing_upload(app, s3):
+    """A key signed but never posted is rejected."""
+    with app.app_context():
+        key = storage.upload_url("image/png")["key"]
+        with pytest.raises(ValueError):
+            adopt_image(key)
+
+
+def post_article(client, headers: dict, data: bytes, name: str):
+    """Create an article with an uploaded image."""
+    return client.post(
+        "/article/?id=1",
+        data={"Title": "a title", "Text": "a text", "Image": (io.BytesIO(data), name)},
+        content_type="multipart/form-data",
+        headers=headers,
+    )
+
+
+def test_uploads_share_the_stored_image(app, client, headers):
+    """The same image uploaded under two names is stored once."""
+    with app.app_context():
+        before = {key for key, _ in storage.keys()}
+    assert post_article(client, headers, PNG, "cover.png").status_code == 201
+    assert post_article(client, headers, PNG, "other.png").status_code == 201
+    digest = hashlib.sha256(PNG).hexdigest()
+    with app.app_context():
+        assert Image.query.get(digest).references_count == 2
+        added = {key for key, _ in storage.keys()} - before
+        assert {key for key in added if key.startswith(digest)} == {f"{digest}.png"}
+
+
+def test_sweep_deletes_the_images_without_a_row(app):
+    """The images left by a rolled back request are swept once settled."""
+    with app.app_context():
+        for key in os.listdir(storage.backend.folder):
+            storage.backend.delete(key)
+        orphan = storage.put(PNG, f"{'a' * 64}.png", "image/png")
+        recent = storage.put(PNG, f"{'b' * 64}.png", "image/png")
+        known = storage.put(PNG, f"{'c' * 64}.png", "image/png")
+        Image.acquire("c" * 64, known, "image/png", len(PNG))
+        db.session.commit()
+        settled = time.time() - 7200
+        for url in (orphan, known):
+            os.utime(storage.backend.path(os.path.basename(url)), (settled, settled))
+        assert Image.sweep(3600, batch_size=1) == 1
+        remaining = {key for key, _ in storage.keys()}
+        assert remaining == {os.path.basename(recent), os.path.basename(known)}
+
+
+def post_upload(client, data: bytes, fields: dict):
+    """Post an image to the local storage with a signed form."""
+    form = storage.upload_url("image/png")
+    response = client.post(
+        form["url"],
+        data={**form["fields"], **fields, "file": (io.BytesIO(data), "image")},
+        content_type="multipart/form-data",
+    )
+    return form["key"], response
+
+
+@pytest.mark.parametrize("fields", [{}, {CHECKSUM_FIELD: checksum(b"other")}])
+def test_receive_rejects_a_wrong_checksum(app, client, fields):
+    """An image posted without its checksum, or with another one, is
+    not stored."""
+    with app.app_context():
+        key, response = post_upload(client, PNG, fields)
+        assert response.status_code == 400
+        assert storage.backend.head(key, 8) is None
+
+
+def test_receive_takes_the_checksum(app, client):
+    """An image posted with its checksum is adopted under its digest."""
+    data = PNG + b"received"
+    with app.app_context():
+        key, response = post_upload(client, data, {CHECKSUM_FIELD: checksum(data)})
+        assert response.status_code == 204
+        url = adopt_image(key)
+        assert url.endswith(f"{hashlib.sha256(data).hexdigest()}.png")
+        storage.delete(url)
+
+
+def test_uploads_are_read_once(app, client, headers, monkeypatch):
+    """An image posted to the app is hashed while it is received, and
+    only read again to be stored."""
+    reads = []
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        reads.append(len(data))
+        return data
+
+    data = PNG + b"read once"
+    monkeypatch.setattr(DigestStream, "read", read, raising=False)
+    response = post_article(client, headers, data, "once.png")
+    assert response.status_code == 201
+    assert sum(reads) == len(data)
+    with app.app_context():
+        storage.delete(f"{hashlib.sha256(data).hexdigest()}.png")
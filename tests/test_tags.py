@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""This module tests the validation of the tags added to an article."""
+import pytest
+
+from api import db
+from api.article.models import Article
+
+
+@pytest.fixture
+def article_id(app, authors) -> int:
+    """Create an article of the first author, tagged as tech."""
+    with app.app_context():
+        article = Article(
+            title="title", text="text", author_id=authors[0], tags=["tech"]
+        )
+        db.session.add(article)
+        db.session.commit()
+        return article.id
+
+
+def tag(client, headers: dict, article_id: int, author_id: int, name: str):
+    """Tag an article."""
+    return client.get(
+        "/article/tag",
+        query_string={"article id": article_id, "author id": author_id, "tag": name},
+        headers=headers,
+    )
+
+
+def test_tag_is_added(app, client, authors, headers, article_id):
+    """A valid tag is appended to the tags."""
+    response = tag(client, headers, article_id, authors[0], " python ")
+    assert response.status_code == 201
+    assert response.json == {"article tags": ["tech", "python"]}
+
+
+def test_long_tag_is_refused(app, client, authors, headers, article_id):
+    """A tag over 100 characters is refused before reaching the database."""
+    response = tag(client, headers, article_id, authors[0], "x" * 101)
+    assert response.status_code == 400
+    with app.app_context():
+        assert Article.query.get(article_id).tags == ["tech"]
+
+
+def test_tags_are_capped(app, client, authors, headers, article_id):
+    """An article cannot get more than MAX_TAGS_PER_ARTICLE tags."""
+    app.config["MAX_TAGS_PER_ARTICLE"] = 2
+    assert tag(client, headers, article_id, authors[0], "python").status_code == 201
+    response = tag(client, headers, article_id, authors[0], "flask")
+    assert response.status_code == 400
+    with app.app_context():
+        assert Article.query.get(article_id).tags == ["tech", "python"]
+
+
+def test_tags_are_capped_in_the_update(app, authors, article_id):
+    """The cap holds against a tag added since the article was read."""
+    with app.app_context():
+        assert Article.add_tag(article_id, authors[0], "python", 1) is None
+        db.session.rollback()
+        assert Article.add_tag(article_id, authors[0], "python", 2) == [
+            "tech",
+            "python",
+        ]
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""This module tests the write-behind recorder of article views."""
+from api import create_app
+from api.helpers import view_recorder as view_recorder_module
+from api.helpers.view_recorder import ViewRecorder
+
+
+def test_exit_handler_is_registered_once(monkeypatch):
+    """Creating several apps does not pile up exit handlers."""
+    handlers = []
+    monkeypatch.setattr(view_recorder_module.atexit, "register", handlers.append)
+    recorder = ViewRecorder()
+    for _ in range(3):
+        recorder.init_app(create_app("testing"))
+        recorder.start()
+    assert handlers == [recorder.close]
+    recorder.close()
+    assert not recorder.worker.is_alive()